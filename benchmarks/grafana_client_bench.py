@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark GrafanaClient and AsyncGrafanaClient against the in-process fake Grafana.
+
+Measures throughput (ops/sec) and per-request p50/p99 latency for three modes:
+
+- single:     one request at a time on a GrafanaClient
+- concurrent: a thread pool sharing one pooled GrafanaClient
+- bulk:       AsyncGrafanaClient bulk helpers (requires httpx)
+
+Example:
+    python -m benchmarks.grafana_client_bench --requests 500 --workers 16 --latency 0.005
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import click
+
+from grafana_agent.fake_grafana import FakeGrafana
+from grafana_agent.grafana_client import AsyncGrafanaClient, GrafanaClient
+
+
+MODES = ("single", "concurrent", "bulk")
+ENDPOINTS = {
+    "get": "GET /api/dashboards/uid/{uid}",
+    "create": "POST /api/dashboards/db",
+}
+
+
+def make_dashboard(i: int) -> Dict[str, Any]:
+    """A small but realistic dashboard body."""
+    return {
+        "uid": f"bench-{i:05d}",
+        "title": f"Benchmark {i}",
+        "tags": ["benchmark"],
+        "panels": [
+            {"id": p, "type": "timeseries", "title": f"Panel {p}",
+             "targets": [{"refId": "A", "expr": f"rate(http_requests_total{{job=\"svc{p}\"}}[5m])"}],
+             "gridPos": {"h": 8, "w": 12, "x": 12 * (p % 2), "y": 8 * (p // 2)}}
+            for p in range(6)
+        ],
+    }
+
+
+def _result(mode: str, op: str, count: int, elapsed: float, stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "mode": mode,
+        "op": op,
+        "requests": count,
+        "seconds": round(elapsed, 3),
+        "ops_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(stats.get("p50", 0.0) * 1000, 2),
+        "p99_ms": round(stats.get("p99", 0.0) * 1000, 2),
+        "errors": stats.get("errors", 0),
+        "retries": stats.get("retries", 0),
+    }
+
+
+def run_sync(server: FakeGrafana, mode: str, op: str, count: int, workers: int) -> Dict[str, Any]:
+    """Run one benchmark with the synchronous client."""
+    client = GrafanaClient(server.url, api_key="bench", pool_maxsize=workers)
+    calls: Dict[str, Callable[[int], Any]] = {
+        "get": lambda i: client.get_dashboard(f"bench-{i % len(server.dashboards):05d}"),
+        "create": lambda i: client.create_dashboard(make_dashboard(i), overwrite=True),
+    }
+    call = calls[op]
+
+    start = time.perf_counter()
+    if mode == "single":
+        for i in range(count):
+            call(i)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(call, range(count)))
+    elapsed = time.perf_counter() - start
+
+    client.close()
+    return _result(mode, op, count, elapsed, client.stats.summary(ENDPOINTS[op]))
+
+
+def run_bulk(server: FakeGrafana, op: str, count: int, workers: int) -> Dict[str, Any]:
+    """Run one benchmark with the async client's bulk helpers."""
+    async def run() -> Any:
+        async with AsyncGrafanaClient(server.url, api_key="bench", concurrency=workers,
+                                      max_connections=workers) as client:
+            start = time.perf_counter()
+            if op == "get":
+                uids = [f"bench-{i % len(server.dashboards):05d}" for i in range(count)]
+                await client.get_dashboards(uids)
+            else:
+                await client.create_dashboards([make_dashboard(i) for i in range(count)], overwrite=True)
+            return time.perf_counter() - start, client.stats.summary(ENDPOINTS[op])
+
+    elapsed, stats = asyncio.run(run())
+    return _result("bulk", op, count, elapsed, stats)
+
+
+@click.command()
+@click.option('--requests', 'count', default=200, show_default=True, type=click.IntRange(min=1),
+              help='Requests per mode')
+@click.option('--workers', '-w', default=8, show_default=True, type=click.IntRange(min=1),
+              help='Concurrency for the concurrent and bulk modes')
+@click.option('--mode', 'modes', multiple=True, type=click.Choice(MODES),
+              help='Modes to run (default: all)')
+@click.option('--op', 'ops', multiple=True, type=click.Choice(sorted(ENDPOINTS)),
+              help='Operations to run (default: all)')
+@click.option('--latency', default=0.0, show_default=True, help='Server latency per request, seconds')
+@click.option('--jitter', default=0.0, show_default=True, help='Extra random server latency, seconds')
+@click.option('--error-rate', default=0.0, show_default=True, help='Fraction of requests failing with 500')
+@click.option('--throttle-rate', default=0.0, show_default=True, help='Fraction of requests throttled with 429')
+@click.option('--seed', default=0, show_default=True, help='Seed for latency and fault injection')
+@click.option('--json', 'as_json', is_flag=True, help='Print results as JSON lines')
+def main(count, workers, modes, ops, latency, jitter, error_rate, throttle_rate, seed, as_json):
+    """Benchmark the Grafana clients against a local fake Grafana."""
+    results: List[Dict[str, Any]] = []
+    with FakeGrafana(latency=latency, jitter=jitter, error_rate=error_rate,
+                     throttle_rate=throttle_rate, retry_after=0, seed=seed) as server:
+        for i in range(min(count, 1000)):
+            server.add_dashboard(make_dashboard(i))
+        for op in ops or sorted(ENDPOINTS):
+            for mode in modes or MODES:
+                if mode == "bulk":
+                    try:
+                        results.append(run_bulk(server, op, count, workers))
+                    except ImportError as e:
+                        click.echo(f"skipping bulk: {e}", err=True)
+                else:
+                    results.append(run_sync(server, mode, op, count, workers))
+
+    if as_json:
+        for result in results:
+            click.echo(json.dumps(result))
+        return
+    columns = list(results[0]) if results else []
+    click.echo("  ".join(f"{c:>11}" for c in columns))
+    for result in results:
+        click.echo("  ".join(f"{result[c]!s:>11}" for c in columns))
+
+
+if __name__ == '__main__':
+    main()
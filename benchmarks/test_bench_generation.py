@@ -0,0 +1,105 @@
+"""
+Benchmarks for dashboard generation and summarization, using the offline fake LLM.
+
+Run with:
+    pip install pytest-benchmark
+    pytest benchmarks/ --benchmark-only -p no:cacheprovider
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+from click.testing import CliRunner
+from grafana_agent.cli import cli
+from grafana_agent.dashboard_generator import DashboardGenerator
+from grafana_agent.llm_client import FakeLLMClient
+
+pytest.importorskip("pytest_benchmark")
+
+
+def make_dashboard(panels: int = 60, rows: int = 6):
+    """A large dashboard with rows, queries and thresholds."""
+    items = []
+    per_row = panels // rows
+    for r in range(rows):
+        items.append({"type": "row", "title": f"Service {r}", "collapsed": False, "panels": []})
+        for p in range(per_row):
+            items.append({
+                "id": r * per_row + p,
+                "type": "timeseries",
+                "title": f"Service {r} metric {p}",
+                "datasource": {"type": "prometheus", "uid": "prom"},
+                "gridPos": {"h": 8, "w": 12, "x": 12 * (p % 2), "y": 8 * p},
+                "targets": [{"refId": "A", "expr": f'sum(rate(http_requests_total{{service="s{r}",code=~"5.."}}[5m]))'}],
+                "fieldConfig": {"defaults": {"unit": "reqps", "thresholds": {"mode": "absolute", "steps": [
+                    {"color": "green", "value": None}, {"color": "red", "value": 80}]}}, "overrides": []},
+                "options": {"legend": {"displayMode": "list", "placement": "bottom"}, "tooltip": {"mode": "single"}},
+            })
+    return {"dashboard": {"title": "Large", "uid": "large", "panels": items}}
+
+
+@pytest.fixture
+def generator():
+    """Generator backed by an instant fake LLM."""
+    return DashboardGenerator(FakeLLMClient())
+
+
+class TestGenerationBenchmarks:
+    """Benchmarks for the local parts of generation and summarization."""
+    
+    def test_parse_response(self, benchmark, generator):
+        """Benchmark parsing a large fenced LLM response."""
+        response = "Here is your dashboard:\n```json\n" + json.dumps(make_dashboard(), indent=2) + "\n```"
+        result = benchmark(generator._parse_dashboard_response, response)
+        assert len(result["dashboard"]["panels"]) == 66
+    
+    def test_fill_defaults(self, benchmark, generator):
+        """Benchmark filling required fields into a bare dashboard model."""
+        response = json.dumps({"panels": [{"type": "stat", "title": "Up"}]})
+        result = benchmark(generator._parse_dashboard_response, response, "Availability")
+        assert result["dashboard"]["uid"] == "availability"
+    
+    def test_build_summarize_messages(self, benchmark, generator):
+        """Benchmark compacting a large dashboard into a summarization prompt."""
+        dashboard = make_dashboard()
+        messages = benchmark(generator._build_summarize_messages, dashboard)
+        assert messages[-1]["content"]
+    
+    def test_map_reduce_prompts(self, benchmark):
+        """Benchmark splitting a dashboard over the token budget into chunks."""
+        generator = DashboardGenerator(FakeLLMClient(), summary_token_budget=1500)
+        dashboard = make_dashboard(panels=120)
+        split = benchmark(generator._split_for_map_reduce, dashboard)
+        assert split is not None and len(split[1]) > 1
+
+
+class TestCLIBenchmarks:
+    """End-to-end CLI benchmarks with simulated LLM latency."""
+    
+    def run_cli(self, args, llm_client):
+        with patch("grafana_agent.cli.get_llm_client", return_value=llm_client):
+            result = CliRunner().invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        return result
+    
+    def test_create(self, benchmark):
+        """Benchmark a single create with 20 ms of model latency."""
+        llm_client = FakeLLMClient(latency=0.02)
+        benchmark(self.run_cli, ['create', 'API latency and errors', '--provider', 'fake'], llm_client)
+    
+    def test_create_batch_concurrent(self, benchmark, tmp_path):
+        """Benchmark 16 creates over 8 workers with 20 ms of model latency."""
+        batch = tmp_path / "batch.jsonl"
+        batch.write_text("".join(json.dumps({"description": f"service {i}", "name": f"s{i}"}) + "\n"
+                                 for i in range(16)))
+        llm_client = FakeLLMClient(latency=0.02)
+        args = ['create-batch', str(batch), '-o', str(tmp_path / "out"), '--workers', '8', '--provider', 'fake']
+        benchmark.pedantic(self.run_cli, args=(args, llm_client), rounds=5)
+    
+    def test_summarize_map_reduce(self, benchmark, tmp_path):
+        """Benchmark summarizing a large dashboard map-reduce style with 4 workers."""
+        path = tmp_path / "large.json"
+        path.write_text(json.dumps(make_dashboard(panels=120)))
+        llm_client = FakeLLMClient(latency=0.02, tokens_per_second=2000)
+        args = ['summarize', str(path), '--provider', 'fake', '--token-budget', '1500', '--workers', '4']
+        benchmark.pedantic(self.run_cli, args=(args, llm_client), rounds=5)
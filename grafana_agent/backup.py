@@ -0,0 +1,418 @@
+"""Content-addressed dashboard archives for export, backup and import."""
+
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Iterator, Sequence, Tuple, cast
+from .concurrency import RateLimiter
+
+if TYPE_CHECKING:
+    from .grafana_client import GrafanaClient
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+ARCHIVE_FORMAT = 1
+
+# Fields Grafana rewrites on every save; they do not change what a dashboard shows
+VOLATILE_FIELDS = ("id", "version")
+
+
+def normalize_dashboard(dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a dashboard model without instance-specific bookkeeping fields."""
+    return {k: v for k, v in dashboard.items() if k not in VOLATILE_FIELDS}
+
+
+def dashboard_hash(dashboard: Dict[str, Any]) -> str:
+    """
+    Content hash of a dashboard model.
+
+    Dashboards that differ only in ``id`` or ``version`` share a hash.
+
+    Args:
+        dashboard: Dashboard model (not the ``{dashboard, meta}`` API response)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = json.dumps(normalize_dashboard(dashboard), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DashboardArchive:
+    """
+    Directory of gzip-compressed dashboard blobs plus a manifest.
+
+    Layout::
+
+        manifest.json                  uid -> {hash, version, title, folder_uid, folder_title}
+        objects/ab/abcdef....json.gz   one blob per unique dashboard content
+
+    Blobs are never rewritten, so re-exporting an unchanged dashboard costs no
+    disk space and older blobs stay available as history.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) an archive.
+
+        Args:
+            path: Archive directory
+        """
+        self.path = path
+        self.manifest = self._load_manifest()
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Manifest entries keyed by dashboard UID."""
+        return cast(Dict[str, Dict[str, Any]], self.manifest["dashboards"])
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.path, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {"format": ARCHIVE_FORMAT, "dashboards": {}}
+        with open(path, 'r') as f:
+            manifest: Dict[str, Any] = json.load(f)
+        if manifest.get("format") != ARCHIVE_FORMAT:
+            raise ValueError(f"Unsupported archive format: {manifest.get('format')}")
+        return manifest
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        path = os.path.join(self.path, MANIFEST_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def blob_path(self, digest: str) -> str:
+        """Path of the blob for a content hash."""
+        return os.path.join(self.path, "objects", digest[:2], f"{digest}.json.gz")
+
+    def put(self, dashboard: Dict[str, Any]) -> str:
+        """
+        Store a dashboard model, skipping the write if its content is already present.
+
+        Args:
+            dashboard: Dashboard model
+
+        Returns:
+            Content hash of the dashboard
+        """
+        digest = dashboard_hash(dashboard)
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(dashboard, f, sort_keys=True, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Dict[str, Any]:
+        """Load a dashboard model by content hash."""
+        with gzip.open(self.blob_path(digest), 'rt', encoding='utf-8') as f:
+            return cast(Dict[str, Any], json.load(f))
+
+    def dashboards(self) -> Iterator[Dict[str, Any]]:
+        """Yield every dashboard in the manifest, one blob at a time."""
+        for uid in sorted(self.entries):
+            yield self.get(self.entries[uid]["hash"])
+
+
+@dataclass
+class ExportResult:
+    """Counts from one export run."""
+
+    downloaded: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether every dashboard was exported."""
+        return not self.errors
+
+
+def _latest_version(client: "GrafanaClient", uid: str) -> Optional[int]:
+    """Latest saved version number of a dashboard, or None if unknown."""
+    try:
+        versions = client.get_dashboard_versions(uid, limit=1)
+    except Exception as e:
+        # No permission, versions disabled or an older Grafana: download the dashboard instead
+        logger.debug("Could not list versions of dashboard %s: %s", uid, e)
+        return None
+    if isinstance(versions, dict):
+        # Grafana 11+ wraps the list with a continuation token
+        versions = versions.get("versions") or []
+    return versions[0].get("version") if versions else None
+
+
+def _export_one(client: "GrafanaClient", hit: Dict[str, Any],
+                known: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Fetch one dashboard, or return None if the archived version is current."""
+    uid = hit["uid"]
+    if known is not None:
+        latest = _latest_version(client, uid)
+        if latest is not None and latest == known.get("version"):
+            return None
+    response = client.get_dashboard(uid)
+    dashboard = response.get("dashboard", response)
+    meta = response.get("meta") or {}
+    return {
+        "dashboard": dashboard,
+        "title": dashboard.get("title") or hit.get("title"),
+        "version": dashboard.get("version"),
+        "folder_uid": meta.get("folderUid") or hit.get("folderUid"),
+        "folder_title": meta.get("folderTitle") or hit.get("folderTitle"),
+    }
+
+
+def export_dashboards(client: "GrafanaClient", archive: DashboardArchive, max_workers: int = 8,
+                      query: str = "", folder_ids: Optional[Sequence[int]] = None,
+                      on_result: Any = None) -> ExportResult:
+    """
+    Export every matching dashboard into an archive.
+
+    Dashboards already in the archive are only downloaded again when their
+    ``version`` has changed. Dashboards no longer present in Grafana are removed
+    from the manifest (their blobs are kept). The manifest is saved at the end,
+    even if some dashboards failed.
+
+    Args:
+        client: Grafana client
+        archive: Archive to write to
+        max_workers: Maximum number of concurrent downloads (size the client's
+            connection pool to match)
+        query: Search query restricting which dashboards are exported
+        folder_ids: Only export dashboards in these folders
+        on_result: Optional callback ``(uid, status, error)`` called as each
+            dashboard finishes, with status 'downloaded', 'unchanged' or 'error'
+
+    Returns:
+        ExportResult with per-run counts
+    """
+    start = time.perf_counter()
+    result = ExportResult()
+    seen: List[str] = []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {}
+        for hit in client.iter_dashboards(query=query, folder_ids=folder_ids, prefetch=True):
+            uid = hit["uid"]
+            seen.append(uid)
+            futures[pool.submit(_export_one, client, hit, archive.entries.get(uid))] = uid
+
+        for future in as_completed(futures):
+            uid = futures[future]
+            error = None
+            try:
+                exported = future.result()
+            except Exception as e:
+                error = str(e)
+                result.errors[uid] = error
+                status = "error"
+            else:
+                if exported is None:
+                    result.unchanged += 1
+                    status = "unchanged"
+                else:
+                    digest = archive.put(exported.pop("dashboard"))
+                    archive.entries[uid] = dict(exported, hash=digest)
+                    result.downloaded += 1
+                    status = "downloaded"
+            if on_result is not None:
+                on_result(uid, status, error)
+
+    if not query and not folder_ids:
+        for uid in set(archive.entries) - set(seen):
+            del archive.entries[uid]
+            result.removed += 1
+    archive.save()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+@dataclass
+class ImportItem:
+    """A dashboard to import, with where it came from."""
+
+    source: str
+    dashboard: Dict[str, Any]
+    folder_uid: Optional[str] = None
+
+
+@dataclass
+class ImportResult:
+    """Counts from one import run; ``changes`` maps source to action and diff."""
+
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    changes: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether every dashboard was imported (or planned)."""
+        return not self.errors
+
+
+def load_import_items(path: str) -> List[ImportItem]:
+    """
+    Load dashboards to import from an export archive or a directory of JSON files.
+
+    JSON files may hold a bare dashboard model or an API ``{dashboard, meta}``
+    response; ``meta.folderUid`` is kept when present.
+
+    Args:
+        path: Archive directory (containing ``manifest.json``) or directory of ``*.json`` files
+
+    Returns:
+        Dashboards to import
+    """
+    if os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        archive = DashboardArchive(path)
+        return [
+            ImportItem(source=uid, dashboard=archive.get(entry["hash"]),
+                       folder_uid=entry.get("folder_uid"))
+            for uid, entry in sorted(archive.entries.items())
+        ]
+
+    items = []
+    for file_path in sorted(glob.glob(os.path.join(path, "**", "*.json"), recursive=True)):
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{file_path} does not contain a dashboard object")
+        dashboard = data.get("dashboard", data)
+        folder_uid = (data.get("meta") or {}).get("folderUid")
+        items.append(ImportItem(source=os.path.relpath(file_path, path), dashboard=dashboard,
+                                folder_uid=folder_uid))
+    return items
+
+
+def diff_summary(old: Dict[str, Any], new: Dict[str, Any]) -> str:
+    """
+    One-line description of how a dashboard's content changed.
+
+    Args:
+        old: Current dashboard model
+        new: Incoming dashboard model
+
+    Returns:
+        Summary such as ``"title; panels +1 -0 ~2"``
+    """
+    old, new = normalize_dashboard(old), normalize_dashboard(new)
+    parts = sorted(k for k in set(old) | set(new) if k != "panels" and old.get(k) != new.get(k))
+
+    def by_title(dashboard: Dict[str, Any]) -> Dict[str, str]:
+        return {str(p.get("title") or p.get("id")): json.dumps(p, sort_keys=True)
+                for p in dashboard.get("panels") or []}
+
+    old_panels, new_panels = by_title(old), by_title(new)
+    added = len(set(new_panels) - set(old_panels))
+    removed = len(set(old_panels) - set(new_panels))
+    changed = sum(1 for t in set(old_panels) & set(new_panels) if old_panels[t] != new_panels[t])
+    if added or removed or changed:
+        parts.append(f"panels +{added} -{removed} ~{changed}")
+    return "; ".join(parts) or "no content change"
+
+
+def _is_not_found(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 404
+
+
+def _import_one(client: "GrafanaClient", item: ImportItem, folder_id: int, dry_run: bool,
+                limiter: Optional[RateLimiter]) -> Tuple[str, str]:
+    """Compare one dashboard with Grafana and upload it if it differs."""
+    uid = item.dashboard.get("uid")
+    existing = None
+    if uid:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            existing = client.get_dashboard(uid)
+        except Exception as e:
+            if not _is_not_found(e):
+                raise
+    if existing is not None:
+        current = existing.get("dashboard", existing)
+        if dashboard_hash(current) == dashboard_hash(item.dashboard):
+            return "unchanged", ""
+        action, detail = "update", diff_summary(current, item.dashboard)
+    else:
+        action, detail = "create", f"{len(item.dashboard.get('panels') or [])} panels"
+
+    if not dry_run:
+        # Dashboard ids are instance-specific; Grafana matches on uid
+        dashboard = dict(normalize_dashboard(item.dashboard), id=None)
+        if limiter is not None:
+            limiter.acquire()
+        client.create_dashboard(dashboard, folder_id=folder_id, overwrite=True,
+                                folder_uid=item.folder_uid)
+    return action, detail
+
+
+def import_dashboards(client: "GrafanaClient", items: Sequence[ImportItem], max_workers: int = 8,
+                      rate_limit: Optional[float] = None, folder_id: int = 0, dry_run: bool = False,
+                      on_result: Any = None) -> ImportResult:
+    """
+    Upload dashboards whose content differs from what Grafana already has.
+
+    Each dashboard with a UID is fetched and compared by normalized content
+    hash; unchanged dashboards are skipped, the rest are created or overwritten.
+
+    Args:
+        client: Grafana client
+        items: Dashboards to import
+        max_workers: Maximum number of concurrent comparisons and uploads
+        rate_limit: Maximum Grafana requests per second across all workers (None for no limit)
+        folder_id: Folder ID for dashboards without a folder UID (0 for General)
+        dry_run: Only compare and report what would change
+        on_result: Optional callback ``(source, action, detail)`` called as each
+            dashboard finishes, with action 'create', 'update', 'unchanged' or 'error'
+
+    Returns:
+        ImportResult with counts and the per-dashboard changes
+    """
+    start = time.perf_counter()
+    result = ImportResult()
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_import_one, client, item, folder_id, dry_run, limiter): item.source
+                   for item in items}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                action, detail = future.result()
+            except Exception as e:
+                action, detail = "error", str(e)
+                result.errors[source] = detail
+            else:
+                if action == "create":
+                    result.created += 1
+                elif action == "update":
+                    result.updated += 1
+                else:
+                    result.unchanged += 1
+                if action != "unchanged":
+                    result.changes[source] = f"{action}: {detail}"
+            if on_result is not None:
+                on_result(source, action, detail)
+
+    result.elapsed = time.perf_counter() - start
+    return result
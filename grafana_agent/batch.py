@@ -0,0 +1,175 @@
+"""Batch dashboard generation with bounded parallelism."""
+
+import contextvars
+import itertools
+import json
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterator, Iterable, Set
+from .dashboard_generator import DashboardGenerator
+from .llm_client import PRIORITY_BATCH, llm_priority
+
+
+@dataclass
+class BatchItem:
+    """A single dashboard request in a batch."""
+
+    index: int
+    description: str
+    title: Optional[str] = None
+    name: Optional[str] = None
+
+    @property
+    def output_name(self) -> str:
+        """File name stem for this item's generated dashboard."""
+        if self.name:
+            return _slugify(self.name)
+        return f"{self.index:04d}-{_slugify(self.title or self.description)}"
+
+
+@dataclass
+class BatchResult:
+    """Outcome of generating one batch item."""
+
+    item: BatchItem
+    dashboard: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the dashboard was generated successfully."""
+        return self.error is None
+
+    def to_record(self) -> Dict[str, Any]:
+        """Serializable summary of this result (without the dashboard body)."""
+        return {
+            "index": self.item.index,
+            "name": self.item.output_name,
+            "description": self.item.description,
+            "title": self.item.title,
+            "status": "ok" if self.ok else "error",
+            "error": self.error,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+def _slugify(text: str, max_length: int = 60) -> str:
+    """Turn free text into a safe file name stem."""
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:max_length].rstrip("-") or "dashboard"
+
+
+def _to_item(index: int, entry: Any) -> BatchItem:
+    """Convert a raw batch entry into a BatchItem."""
+    if isinstance(entry, str):
+        return BatchItem(index=index, description=entry)
+    if not isinstance(entry, dict) or not entry.get("description"):
+        raise ValueError(f"Batch entry {index} must be a string or an object with a 'description'")
+    return BatchItem(
+        index=index,
+        description=entry["description"],
+        title=entry.get("title"),
+        name=entry.get("name"),
+    )
+
+
+def load_batch_items(path: str) -> List[BatchItem]:
+    """
+    Load dashboard requests from a JSONL, JSON or YAML file.
+
+    Each entry is either a description string or an object with ``description``
+    and optional ``title`` and ``name`` keys. JSON and YAML files may contain a
+    list of entries or an object with a ``dashboards`` list.
+
+    Args:
+        path: Path to the batch file
+
+    Returns:
+        Parsed batch items
+
+    Raises:
+        ValueError: If an entry is invalid or two entries would write the same output file
+    """
+    with open(path, 'r') as f:
+        content = f.read()
+
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("pyyaml package is required for YAML batch files. "
+                              "Install with: pip install pyyaml")
+        entries = yaml.safe_load(content) or []
+    elif path.endswith('.jsonl'):
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    else:
+        entries = json.loads(content)
+
+    if isinstance(entries, dict):
+        entries = entries.get("dashboards", [])
+    if not isinstance(entries, list):
+        raise ValueError("Batch file must contain a list of dashboard requests")
+
+    items = [_to_item(index, entry) for index, entry in enumerate(entries)]
+    seen: Dict[str, int] = {}
+    for item in items:
+        if item.output_name in seen:
+            raise ValueError(f"Batch entries {seen[item.output_name]} and {item.index} "
+                             f"have the same name: {item.output_name}")
+        seen[item.output_name] = item.index
+    return items
+
+
+def _generate(generator: DashboardGenerator, item: BatchItem) -> BatchResult:
+    """Generate a single item, capturing any failure in the result."""
+    start = time.perf_counter()
+    try:
+        with llm_priority(PRIORITY_BATCH):
+            dashboard = generator.create_dashboard(item.description, item.title)
+        return BatchResult(item=item, dashboard=dashboard, elapsed=time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(item=item, error=str(e), elapsed=time.perf_counter() - start)
+
+
+def run_batch(generator: DashboardGenerator, items: Iterable[BatchItem],
+              max_workers: int = 4) -> Iterator[BatchResult]:
+    """
+    Generate dashboards for every item using a bounded worker pool.
+
+    Results are yielded as soon as each item finishes, so callers can write
+    outputs incrementally. Failures are reported per item rather than raised.
+    Only a few items are queued ahead of the workers, so stopping early (e.g.
+    on Ctrl-C) waits for the running generations only.
+    LLM calls are made at batch priority, so a rate-limited client serves
+    interactive requests first.
+
+    Args:
+        generator: Dashboard generator to use
+        items: Batch items to generate
+        max_workers: Maximum number of concurrent generations
+
+    Yields:
+        BatchResult for each item, in completion order
+    """
+    workers = max(1, max_workers)
+    remaining = iter(items)
+    pending: "Set[Future[BatchResult]]" = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                # Each item runs in a copy of the caller's context, so its spans nest
+                # under the caller's
+                for item in itertools.islice(remaining, 2 * workers - len(pending)):
+                    pending.add(pool.submit(contextvars.copy_context().run,
+                                            _generate, generator, item))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
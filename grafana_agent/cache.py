@@ -0,0 +1,259 @@
+"""Content-addressed response caching for LLM clients."""
+
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+from .llm_client import LLMClient
+
+
+def make_cache_key(provider: str, model: str, messages: List[Dict[str, str]], **kwargs) -> str:
+    """
+    Build a content-addressed cache key for an LLM request.
+
+    The key is a SHA-256 hash over the provider, model, the full message list and
+    every request parameter (temperature included), so any change to the prompt
+    or sampling settings produces a different key.
+
+    Args:
+        provider: Provider name (e.g. 'openai')
+        model: Model name
+        messages: Chat messages
+        **kwargs: Request parameters passed to the provider
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = {
+        "provider": provider,
+        "model": model,
+        "messages": messages,
+        "params": kwargs,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Abstract base class for response caches."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._counter_lock = threading.Lock()
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """Look up a value, returning None if missing or expired."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store a value."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a value and update hit/miss counters."""
+        value = self._get(key)
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+class MemoryCache(ResponseCache):
+    """In-memory LRU cache with optional TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize memory cache.
+
+        Args:
+            max_entries: Maximum number of entries before least-recently-used eviction
+            ttl: Time-to-live in seconds (None for no expiry)
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache stored in a SQLite database, with TTL and LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: Optional[float] = None):
+        """
+        Initialize SQLite cache.
+
+        Args:
+            path: Path to the SQLite database file (created if missing)
+            max_entries: Maximum number of entries before least-recently-used eviction
+            ttl: Time-to-live in seconds (None for no expiry)
+        """
+        import sqlite3  # deferred so commands without a cache do not load it
+
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return str(value)
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+
+
+class CachedLLMClient(LLMClient):
+    """LLM client wrapper that serves repeated requests from a cache."""
+
+    def __init__(self, llm_client: LLMClient, cache: Optional[ResponseCache] = None,
+                 provider: Optional[str] = None, model: Optional[str] = None):
+        """
+        Initialize cached client.
+
+        Args:
+            llm_client: Client to forward cache misses to
+            cache: Cache backend (defaults to an in-memory LRU cache)
+            provider: Provider name used in cache keys (defaults to the client's)
+            model: Model name used in cache keys (defaults to the client's)
+        """
+        self.llm_client = llm_client
+        self.cache = cache if cache is not None else MemoryCache()
+        self.provider = provider or str(getattr(llm_client, "provider", type(llm_client).__name__))
+        self.model = model or str(getattr(llm_client, "model", "") or "")
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Return a cached response if available, otherwise call the wrapped client."""
+        key = make_cache_key(self.provider, self.model, messages, **kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.llm_client.chat(messages, **kwargs)
+        # An empty response is more likely a provider hiccup than an answer; don't replay it
+        if response:
+            self.cache.set(key, response)
+        return response
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Stream a cached response, or stream from the wrapped client and cache the result."""
+        key = make_cache_key(self.provider, self.model, messages, **kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in self.llm_client.stream_chat(messages, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        response = "".join(chunks)
+        if response:
+            self.cache.set(key, response)
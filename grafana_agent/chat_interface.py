@@ -1,26 +1,39 @@
 """Conversational chat interface for dashboard operations."""
 
-from typing import Optional, Dict, Any
-from .llm_client import LLMClient
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Union, Iterator
+from .llm_client import LLMClient, AsyncLLMClient, chat_async, sync_client, llm_task, TASK_CHAT
 from .dashboard_generator import DashboardGenerator
-from .grafana_client import GrafanaClient
+from .memory import ConversationMemory
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing it loads requests
+    from .grafana_client import GrafanaClient
 
 
 class ChatInterface:
     """Conversational interface for interacting with Grafana dashboards."""
     
-    def __init__(self, llm_client: LLMClient, grafana_client: Optional[GrafanaClient] = None):
+    def __init__(self, llm_client: Union[LLMClient, AsyncLLMClient],
+                 grafana_client: Optional["GrafanaClient"] = None,
+                 memory: Optional[ConversationMemory] = None):
         """
         Initialize chat interface.
         
         Args:
             llm_client: LLM client for conversations
             grafana_client: Optional Grafana client for direct operations
+            memory: Conversation memory (defaults to a token-bounded memory that
+                summarizes evicted turns with ``llm_client``)
         """
         self.llm_client = llm_client
         self.grafana_client = grafana_client
         self.dashboard_generator = DashboardGenerator(llm_client)
-        self.conversation_history = []
+        self.memory = memory if memory is not None else ConversationMemory(llm_client=llm_client)
+    
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Messages retained verbatim in the conversation memory."""
+        return self.memory.messages
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the chat interface."""
@@ -50,21 +63,87 @@ If the user wants to create a dashboard, use the create_dashboard function. If t
         Returns:
             Assistant's response
         """
-        # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        try:
+            with llm_task(TASK_CHAT):
+                messages = self._start_turn(user_message)
+                
+                # Get response from LLM
+                response = sync_client(self.llm_client).chat(messages, temperature=0.7)
+        except BaseException:
+            self._abort_turn()
+            raise
         
-        # Build messages with system prompt
-        messages = [{"role": "system", "content": self._get_system_prompt()}]
-        messages.extend(self.conversation_history)
+        # Add assistant response to history
+        self.memory.add("assistant", response)
+        
+        return response
+    
+    def stream_chat(self, user_message: str) -> Iterator[str]:
+        """
+        Process a user message, yielding the response as it is generated.
         
-        # Get response from LLM
-        response = self.llm_client.chat(messages, temperature=0.7)
+        The full response is added to the conversation history once the stream
+        ends (or whatever was received, if the caller stops early or the stream
+        fails part-way). If the stream fails before yielding any text, the user
+        message is dropped again so the history never holds an empty reply.
         
-        # Add assistant response to history
-        self.conversation_history.append({"role": "assistant", "content": response})
+        Args:
+            user_message: User's message
         
+        Yields:
+            Assistant response chunks
+        """
+        chunks = []
+        completed = False
+        try:
+            with llm_task(TASK_CHAT):
+                messages = self._start_turn(user_message)
+                for chunk in sync_client(self.llm_client).stream_chat(messages, temperature=0.7):
+                    chunks.append(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            response = "".join(chunks)
+            if completed or response:
+                self.memory.add("assistant", response)
+            else:
+                self._abort_turn()
+    
+    async def achat(self, user_message: str) -> str:
+        """
+        Process a user message without blocking the event loop.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            Assistant's response
+        """
+        self.memory.add("user", user_message)
+        try:
+            with llm_task(TASK_CHAT):
+                messages = await self.memory.abuild_messages(self._get_system_prompt())
+                response = await chat_async(self.llm_client, messages, temperature=0.7)
+        except BaseException:
+            self._abort_turn()
+            raise
+        self.memory.add("assistant", response)
         return response
     
+    def _abort_turn(self) -> None:
+        """Forget the user message of a turn that got no reply."""
+        messages = self.memory.messages
+        if messages and messages[-1]["role"] == "user":
+            messages.pop()
+    
+    def _start_turn(self, user_message: str) -> List[Dict[str, str]]:
+        """Record a user message and build the messages to send to the LLM."""
+        # Add user message to history
+        self.memory.add("user", user_message)
+        
+        # Build messages with system prompt, evicting old turns if over budget
+        return self.memory.build_messages(self._get_system_prompt())
+    
     def create_dashboard(self, description: str, title: Optional[str] = None) -> Dict[str, Any]:
         """
         Create a dashboard based on description.
@@ -90,7 +169,16 @@ If the user wants to create a dashboard, use the create_dashboard function. If t
         """
         return self.dashboard_generator.summarize_dashboard(dashboard_json)
     
+    async def acreate_dashboard(self, description: str,
+                                title: Optional[str] = None) -> Dict[str, Any]:
+        """Create a dashboard based on description without blocking the event loop."""
+        return await self.dashboard_generator.acreate_dashboard(description, title)
+    
+    async def asummarize_dashboard(self, dashboard_json: Dict[str, Any]) -> str:
+        """Summarize a dashboard without blocking the event loop."""
+        return await self.dashboard_generator.asummarize_dashboard(dashboard_json)
+    
     def reset_conversation(self):
         """Reset the conversation history."""
-        self.conversation_history = []
+        self.memory.reset()
 
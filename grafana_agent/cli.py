@@ -4,22 +4,173 @@ import json
 import os
 import sys
 import click
-from typing import Optional
-from .llm_client import get_llm_client
-from .grafana_client import GrafanaClient
+from typing import List
+from .llm_client import LLM_PROVIDERS, get_llm_client, build_llm_client, total_usage
 from .chat_interface import ChatInterface
+from .memory import ConversationMemory
 from .dashboard_generator import DashboardGenerator
+from .batch import load_batch_items, run_batch
+from .cache import CachedLLMClient, SQLiteCache
+from .tracing import configure_tracing, span, traced, tracing_enabled, spans_observed
+from .profiling import CPU_PROFILERS, Profiler, write_report
+
+
+def _init_llm_client(provider, model, api_key, cache_dir=None, rpm=None, tpm=None, timeout=None,
+                     retries=0, hedge=False, fallbacks=(), routes=None, hooks=()):
+    """Create the LLM client for a command, exiting with an error message on failure."""
+    try:
+        if tracing_enabled():
+            from .instrumentation import OpenTelemetryHook
+            hooks = list(hooks) + [OpenTelemetryHook()]
+        with span("setup.llm_client", {"llm.provider": provider}):
+            # Policies go inside the cache, so cache hits do not use quota or worker threads
+            llm_client = build_llm_client(provider, model=model, api_key=api_key,
+                                          fallbacks=fallbacks, routes=routes, timeout=timeout,
+                                          max_retries=retries, hedge=hedge,
+                                          requests_per_minute=rpm, tokens_per_minute=tpm,
+                                          factory=get_llm_client, hooks=hooks)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+                cache = SQLiteCache(os.path.join(cache_dir, 'responses.sqlite'))
+                llm_client = CachedLLMClient(llm_client, cache, provider=provider)
+        return llm_client
+    except Exception as e:
+        click.echo(f"❌ Error initializing LLM client: {e}", err=True)
+        sys.exit(1)
+
+
+def _llm_policy_options(command):
+    """Add the LLM deadline, retry, hedging and failover options to a command."""
+    options = [
+        click.option('--llm-timeout', default=120.0, show_default=True,
+                     envvar='GRAFANA_AGENT_LLM_TIMEOUT',
+                     type=click.FloatRange(min=0, min_open=True),
+                     help='Deadline in seconds for each LLM call, including retries'),
+        click.option('--llm-retries', default=2, show_default=True,
+                     envvar='GRAFANA_AGENT_LLM_RETRIES',
+                     type=click.IntRange(min=0), help='Retries after transient LLM errors'),
+        click.option('--hedge', is_flag=True, envvar='GRAFANA_AGENT_HEDGE',
+                     help='Send a second LLM request when the first is slower than the p95 '
+                          'latency'),
+        click.option('--fallback', 'fallbacks', multiple=True, metavar='PROVIDER[:MODEL]',
+                     help='Backend to route to when the primary one is failing or slow '
+                          '(repeatable)'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _parse_route(spec):
+    """Split a 'task=provider[:model]' route option."""
+    task, sep, backend = spec.partition('=')
+    if not sep or not task.strip() or not backend.strip():
+        raise ValueError(f"Invalid route '{spec}': expected TASK=PROVIDER[:MODEL]")
+    return task.strip(), backend.strip()
+
+
+def _init_grafana_client(grafana_url, grafana_api_key, grafana_user, grafana_password, **kwargs):
+    """Create the Grafana client for a command, exiting with an error message on failure."""
+    from .grafana_client import GrafanaClient
+    
+    if not grafana_url:
+        click.echo("❌ Grafana URL required (--grafana-url or GRAFANA_URL)", err=True)
+        sys.exit(1)
+    try:
+        if grafana_api_key:
+            return GrafanaClient(grafana_url, api_key=grafana_api_key, **kwargs)
+        return GrafanaClient(grafana_url, username=grafana_user, password=grafana_password,
+                             **kwargs)
+    except Exception as e:
+        click.echo(f"❌ Error initializing Grafana client: {e}", err=True)
+        sys.exit(1)
+
+
+def _forward(op, params, no_daemon, on_event=None):
+    """
+    Run an operation in the agent daemon if one is running.
+    
+    Returns the result, or None when there is no daemon and the command should
+    run locally. Errors raised by the operation itself propagate. Traced and
+    profiled runs stay local, so they cover the whole operation.
+    """
+    if no_daemon or spans_observed():
+        return None
+    from .daemon import DaemonClient
+    
+    client = DaemonClient()
+    if not os.path.exists(client.path):
+        return None
+    received = []
+    
+    def relay(event):
+        received.append(event)
+        if on_event is not None:
+            on_event(event)
+    
+    try:
+        return client.request(op, params, relay)
+    except OSError:
+        if received:
+            # Output was already produced; running again locally would repeat it
+            raise
+        return None
 
 
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option('--trace-file', envvar='GRAFANA_AGENT_TRACE_FILE', type=click.Path(dir_okay=False),
+              help='Append OpenTelemetry spans for this run to a JSON Lines file')
+@click.option('--otlp-endpoint', envvar='GRAFANA_AGENT_OTLP_ENDPOINT',
+              help='Send OpenTelemetry spans to this OTLP gRPC endpoint (e.g. http://tempo:4317)')
+@click.option('--profile', 'profile_path', envvar='GRAFANA_AGENT_PROFILE',
+              type=click.Path(dir_okay=False),
+              help='Write a JSON profile of this run (per-phase timings, peak memory); '
+                   '.jsonl files are appended to')
+@click.option('--profile-cpu', type=click.Choice(CPU_PROFILERS),
+              help='With --profile, also record a CPU profile next to the report')
+@click.option('--profile-memory/--no-profile-memory', default=True, show_default=True,
+              help='With --profile, measure peak memory with tracemalloc '
+                   '(slows allocation-heavy code)')
+@click.pass_context
+def cli(ctx, trace_file, otlp_endpoint, profile_path, profile_cpu, profile_memory):
     """Grafana AI Agent - Create and summarize Grafana dashboards using LLMs."""
-    pass
+    if trace_file or otlp_endpoint:
+        try:
+            provider = configure_tracing(trace_file, otlp_endpoint)
+        except ImportError as e:
+            click.echo(f"❌ {e}", err=True)
+            sys.exit(1)
+        # Flush buffered spans when the command finishes
+        ctx.call_on_close(provider.shutdown)
+    if profile_path:
+        _start_profile(ctx, profile_path, profile_cpu, profile_memory)
+
+
+def _start_profile(ctx, path, cpu, memory):
+    """Profile the invoked command, writing the report when it finishes."""
+    base = path[:-len('.jsonl')] if path.endswith('.jsonl') else os.path.splitext(path)[0]
+    cpu_output = f"{base}.{'prof' if cpu == 'cprofile' else 'html'}" if cpu else None
+    profiler = Profiler(cpu=cpu, cpu_output=cpu_output, memory=memory)
+    try:
+        profiler.start()
+    except ImportError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    
+    def finish():
+        profiler.stop()
+        report = profiler.report(ctx.invoked_subcommand)
+        write_report(report, path)
+        top = ", ".join(f"{name} {seconds:.2f}s"
+                        for name, seconds in list(report['categories'].items())[:3])
+        click.echo(f"⏱️  Profile written to {path} ({report['wall_time']:.2f}s: {top})", err=True)
+    
+    ctx.call_on_close(finish)
 
 
 @cli.command()
-@click.option('--provider', default='openai', type=click.Choice(['openai', 'anthropic']), 
+@click.option('--provider', default='openai', type=click.Choice(LLM_PROVIDERS), 
               help='LLM provider to use')
 @click.option('--model', help='Model name to use (overrides default)')
 @click.option('--api-key', help='API key for LLM provider')
@@ -27,27 +178,23 @@ def cli():
 @click.option('--grafana-api-key', envvar='GRAFANA_API_KEY', help='Grafana API key')
 @click.option('--grafana-user', envvar='GRAFANA_USER', help='Grafana username')
 @click.option('--grafana-password', envvar='GRAFANA_PASSWORD', help='Grafana password')
-def chat(provider, model, api_key, grafana_url, grafana_api_key, grafana_user, grafana_password):
+@click.option('--history-tokens', default=8000, show_default=True, type=click.IntRange(min=1),
+              help='Token budget for conversation history; older turns are summarized')
+@_llm_policy_options
+def chat(provider, model, api_key, grafana_url, grafana_api_key, grafana_user, grafana_password,
+         history_tokens, llm_timeout, llm_retries, hedge, fallbacks):
     """Start an interactive conversational chat session."""
     click.echo("🤖 Grafana AI Agent - Conversational Mode")
     click.echo("Type 'exit' or 'quit' to end the session\n")
     
     # Initialize LLM client
-    try:
-        llm_kwargs = {}
-        if model:
-            llm_kwargs['model'] = model
-        if api_key:
-            llm_kwargs['api_key'] = api_key
-        
-        llm_client = get_llm_client(provider, **llm_kwargs)
-    except Exception as e:
-        click.echo(f"❌ Error initializing LLM client: {e}", err=True)
-        sys.exit(1)
+    llm_client = _init_llm_client(provider, model, api_key, timeout=llm_timeout,
+                                  retries=llm_retries, hedge=hedge, fallbacks=fallbacks)
     
     # Initialize Grafana client if credentials provided
     grafana_client = None
     if grafana_url:
+        from .grafana_client import GrafanaClient
         try:
             if grafana_api_key:
                 grafana_client = GrafanaClient(grafana_url, api_key=grafana_api_key)
@@ -59,7 +206,10 @@ def chat(provider, model, api_key, grafana_url, grafana_api_key, grafana_user, g
             click.echo(f"⚠️  Warning: Could not initialize Grafana client: {e}", err=True)
     
     # Initialize chat interface
-    chat_interface = ChatInterface(llm_client, grafana_client)
+    chat_interface = ChatInterface(
+        llm_client, grafana_client,
+        memory=ConversationMemory(token_budget=history_tokens, llm_client=llm_client)
+    )
     
     # Interactive loop
     while True:
@@ -138,12 +288,21 @@ def chat(provider, model, api_key, grafana_url, grafana_api_key, grafana_user, g
                 chat_interface.reset_conversation()
                 click.echo("🔄 Conversation history reset")
             
+            elif user_input.startswith('/stats'):
+                stats = chat_interface.memory.stats()
+                click.echo(f"📈 Turns: {stats['turns']}, "
+                           f"tokens sent last turn: {stats['last_tokens_sent']}, "
+                           f"total: {stats['total_tokens_sent']}, "
+                           f"messages kept: {stats['retained_messages']}, "
+                           f"summarized: {stats['evicted_messages']}")
+            
             elif user_input.startswith('/help'):
                 click.echo("""
 📖 Available Commands:
   /create <description>    - Create a new dashboard
   /summarize <file_or_uid> - Summarize a dashboard
   /reset                  - Reset conversation history
+  /stats                  - Show conversation token usage
   /help                   - Show this help message
   exit/quit/q             - Exit the chat session
 
@@ -151,9 +310,11 @@ You can also just chat naturally about dashboards!
                 """)
             
             else:
-                # Regular chat
-                response = chat_interface.chat(user_input)
-                click.echo(f"\n🤖 Assistant: {response}")
+                # Regular chat, printing tokens as they arrive
+                click.echo("\n🤖 Assistant: ", nl=False)
+                for chunk in chat_interface.stream_chat(user_input):
+                    click.echo(chunk, nl=False)
+                click.echo()
         
         except KeyboardInterrupt:
             click.echo("\n\n👋 Goodbye!")
@@ -169,41 +330,54 @@ You can also just chat naturally about dashboards!
 @click.argument('description')
 @click.option('--title', help='Dashboard title')
 @click.option('--output', '-o', help='Output file path')
-@click.option('--provider', default='openai', type=click.Choice(['openai', 'anthropic']), 
+@click.option('--provider', default='openai', type=click.Choice(LLM_PROVIDERS), 
               help='LLM provider to use')
 @click.option('--model', help='Model name to use')
 @click.option('--api-key', help='API key for LLM provider')
 @click.option('--grafana-url', envvar='GRAFANA_URL', help='Grafana base URL')
 @click.option('--grafana-api-key', envvar='GRAFANA_API_KEY', help='Grafana API key')
+@click.option('--cache-dir', envvar='GRAFANA_AGENT_CACHE_DIR',
+              help='Directory for the on-disk LLM response cache')
 @click.option('--upload', is_flag=True, help='Upload to Grafana after creation')
-def create(description, title, output, provider, model, api_key, grafana_url, grafana_api_key, upload):
+@click.option('--stream', is_flag=True,
+              help='Stream the response and report panels as they are generated')
+@click.option('--no-daemon', is_flag=True, envvar='GRAFANA_AGENT_NO_DAEMON',
+              help='Run locally even if the agent daemon is running')
+@_llm_policy_options
+@traced('cli.create')
+def create(description, title, output, provider, model, api_key, grafana_url, grafana_api_key,
+           upload, cache_dir, stream, no_daemon, llm_timeout, llm_retries, hedge, fallbacks):
     """Create a Grafana dashboard from a description."""
     click.echo("🔄 Generating dashboard...")
     
-    # Initialize LLM client
-    try:
-        llm_kwargs = {}
-        if model:
-            llm_kwargs['model'] = model
-        if api_key:
-            llm_kwargs['api_key'] = api_key
-        
-        llm_client = get_llm_client(provider, **llm_kwargs)
-    except Exception as e:
-        click.echo(f"❌ Error initializing LLM client: {e}", err=True)
-        sys.exit(1)
+    def report_panel(panel):
+        click.echo(f"  • {panel.get('title') or panel.get('type', 'panel')}", err=True)
     
-    # Generate dashboard
-    generator = DashboardGenerator(llm_client)
     try:
-        dashboard = generator.create_dashboard(description, title)
+        dashboard = _forward('create', {
+            'description': description, 'title': title, 'provider': provider, 'model': model,
+            'api_key': api_key, 'cache_dir': os.path.abspath(cache_dir) if cache_dir else None,
+            'stream': stream, 'llm_timeout': llm_timeout, 'llm_retries': llm_retries,
+            'hedge': hedge, 'fallbacks': list(fallbacks),
+        }, no_daemon, on_event=lambda event: report_panel(event['panel']))
+        if dashboard is None:
+            # Initialize LLM client
+            llm_client = _init_llm_client(provider, model, api_key, cache_dir, timeout=llm_timeout,
+                                          retries=llm_retries, hedge=hedge, fallbacks=fallbacks)
+            
+            # Generate dashboard
+            generator = DashboardGenerator(llm_client)
+            if stream:
+                dashboard = generator.create_dashboard(description, title, on_panel=report_panel)
+            else:
+                dashboard = generator.create_dashboard(description, title)
     except Exception as e:
         click.echo(f"❌ Error creating dashboard: {e}", err=True)
         sys.exit(1)
     
     # Save to file
     if output:
-        with open(output, 'w') as f:
+        with span("dashboard.save"), open(output, 'w') as f:
             json.dump(dashboard, f, indent=2)
         click.echo(f"✅ Dashboard saved to {output}")
     else:
@@ -216,52 +390,432 @@ def create(description, title, output, provider, model, api_key, grafana_url, gr
             sys.exit(1)
         
         try:
-            grafana_client = GrafanaClient(grafana_url, api_key=grafana_api_key)
-            result = grafana_client.create_dashboard(dashboard.get("dashboard", dashboard))
+            body = dashboard.get("dashboard", dashboard)
+            result = _forward('upload', {
+                'grafana_url': grafana_url, 'grafana_api_key': grafana_api_key, 'dashboard': body,
+            }, no_daemon)
+            if result is None:
+                from .grafana_client import GrafanaClient
+                grafana_client = GrafanaClient(grafana_url, api_key=grafana_api_key)
+                result = grafana_client.create_dashboard(body)
             click.echo(f"✅ Dashboard uploaded! URL: {result.get('url', 'N/A')}")
         except Exception as e:
             click.echo(f"❌ Error uploading to Grafana: {e}", err=True)
             sys.exit(1)
 
 
+@cli.command('create-batch')
+@click.argument('batch_file', type=click.Path(exists=True))
+@click.option('--output-dir', '-o', default='dashboards', show_default=True,
+              help='Directory to write generated dashboards to')
+@click.option('--results',
+              help='JSONL file for per-item results (default: <output-dir>/results.jsonl)')
+@click.option('--workers', '-w', default=4, show_default=True, type=click.IntRange(min=1),
+              help='Maximum number of dashboards generated in parallel')
+@click.option('--provider', default='openai', type=click.Choice(LLM_PROVIDERS), 
+              help='LLM provider to use')
+@click.option('--model', help='Model name to use')
+@click.option('--api-key', help='API key for LLM provider')
+@click.option('--grafana-url', envvar='GRAFANA_URL', help='Grafana base URL')
+@click.option('--grafana-api-key', envvar='GRAFANA_API_KEY', help='Grafana API key')
+@click.option('--cache-dir', envvar='GRAFANA_AGENT_CACHE_DIR',
+              help='Directory for the on-disk LLM response cache')
+@click.option('--upload', is_flag=True, help='Upload each dashboard to Grafana after creation')
+@click.option('--rpm', type=click.FloatRange(min=0, min_open=True),
+              help='Requests per minute allowed by the LLM provider quota')
+@click.option('--tpm', type=click.FloatRange(min=0, min_open=True),
+              help='Tokens per minute allowed by the LLM provider quota')
+@click.option('--llm-log', type=click.Path(dir_okay=False),
+              help='JSONL file to append per-call LLM tokens, latency, retries and cost to')
+@_llm_policy_options
+@traced('cli.create_batch')
+def create_batch(batch_file, output_dir, results, workers, provider, model, api_key,
+                 grafana_url, grafana_api_key, upload, cache_dir, rpm, tpm, llm_log, llm_timeout,
+                 llm_retries, hedge, fallbacks):
+    """Create many Grafana dashboards from a JSONL, JSON or YAML file."""
+    try:
+        items = load_batch_items(batch_file)
+    except Exception as e:
+        click.echo(f"❌ Error reading batch file: {e}", err=True)
+        sys.exit(1)
+    
+    if upload and (not grafana_url or not grafana_api_key):
+        click.echo("❌ Grafana URL and API key required for upload", err=True)
+        sys.exit(1)
+    
+    hooks = []
+    if llm_log:
+        from .instrumentation import CallStats, JSONLinesHook
+        call_stats = CallStats()
+        hooks = [call_stats, JSONLinesHook(llm_log)]
+    llm_client = _init_llm_client(provider, model, api_key, cache_dir, rpm=rpm, tpm=tpm,
+                                  timeout=llm_timeout, retries=llm_retries, hedge=hedge,
+                                  fallbacks=fallbacks, hooks=hooks)
+    generator = DashboardGenerator(llm_client)
+    grafana_client = None
+    if upload:
+        from .grafana_client import GrafanaClient
+        grafana_client = GrafanaClient(grafana_url, api_key=grafana_api_key)
+    
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = results or os.path.join(output_dir, 'results.jsonl')
+    click.echo(f"🔄 Generating {len(items)} dashboards with {workers} workers...")
+    
+    failures = 0
+    with open(results_path, 'w') as results_file:
+        for result in run_batch(generator, items, max_workers=workers):
+            record = result.to_record()
+            if result.ok and result.dashboard is not None:
+                path = os.path.join(output_dir, f"{result.item.output_name}.json")
+                with open(path, 'w') as f:
+                    json.dump(result.dashboard, f, indent=2)
+                record['output'] = path
+                
+                if grafana_client:
+                    try:
+                        uploaded = grafana_client.create_dashboard(
+                            result.dashboard.get("dashboard", result.dashboard))
+                        record['url'] = uploaded.get('url')
+                    except Exception as e:
+                        record['status'] = 'error'
+                        record['error'] = f"Upload failed: {e}"
+            
+            if record['status'] == 'ok':
+                click.echo(f"✅ [{result.item.index}] {record['output']}")
+            else:
+                failures += 1
+                click.echo(f"❌ [{result.item.index}] {record['error']}", err=True)
+            
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+    
+    click.echo(f"\n📦 {len(items) - failures}/{len(items)} dashboards generated. "
+               f"Results: {results_path}")
+    usage = total_usage(llm_client)
+    if usage.calls:
+        click.echo(f"🧮 Input tokens: {usage.input_tokens} ({usage.cached_input_tokens} cached, "
+                   f"{usage.uncached_input_tokens} uncached); output tokens: {usage.output_tokens}")
+    if llm_log:
+        click.echo(f"💰 Estimated LLM cost: ${call_stats.total_cost():.4f}. Call log: {llm_log}")
+    if failures:
+        sys.exit(1)
+
+
 @cli.command()
 @click.argument('input_file', type=click.Path(exists=True))
-@click.option('--provider', default='openai', type=click.Choice(['openai', 'anthropic']), 
+@click.option('--provider', default='openai', type=click.Choice(LLM_PROVIDERS), 
               help='LLM provider to use')
 @click.option('--model', help='Model name to use')
 @click.option('--api-key', help='API key for LLM provider')
-def summarize(input_file, provider, model, api_key):
+@click.option('--cache-dir', envvar='GRAFANA_AGENT_CACHE_DIR',
+              help='Directory for the on-disk LLM response cache')
+@click.option('--stream/--no-stream', default=True, show_default=True,
+              help='Print the summary as it is generated')
+@click.option('--token-budget', default=8000, show_default=True, type=click.IntRange(min=1),
+              help='Maximum estimated tokens of dashboard JSON sent to the LLM')
+@click.option('--map-reduce/--no-map-reduce', default=True, show_default=True,
+              help='Summarize dashboards over the token budget chunk by chunk')
+@click.option('--workers', '-w', default=4, show_default=True, type=click.IntRange(min=1),
+              help='Maximum number of chunk summaries generated in parallel')
+@click.option('--no-daemon', is_flag=True, envvar='GRAFANA_AGENT_NO_DAEMON',
+              help='Run locally even if the agent daemon is running')
+@_llm_policy_options
+@traced('cli.summarize')
+def summarize(input_file, provider, model, api_key, cache_dir, stream, token_budget, map_reduce,
+              workers, no_daemon, llm_timeout, llm_retries, hedge, fallbacks):
     """Summarize a Grafana dashboard from a JSON file."""
     click.echo("🔄 Analyzing dashboard...")
     
+    params = {
+        'path': os.path.abspath(input_file), 'provider': provider, 'model': model,
+        'api_key': api_key,
+        'cache_dir': os.path.abspath(cache_dir) if cache_dir else None, 'stream': stream,
+        'token_budget': token_budget,
+        'map_reduce': map_reduce, 'workers': workers,
+        'llm_timeout': llm_timeout, 'llm_retries': llm_retries, 'hedge': hedge,
+        'fallbacks': list(fallbacks),
+    }
+    streamed: List[str] = []
+    
+    def show_chunk(event):
+        if not streamed:
+            click.echo("\n📊 Dashboard Summary:\n")
+        streamed.append(event['chunk'])
+        click.echo(event['chunk'], nl=False)
+    
+    try:
+        summary = _forward('summarize', params, no_daemon, on_event=show_chunk)
+    except Exception as e:
+        click.echo(f"❌ Error summarizing dashboard: {e}", err=True)
+        sys.exit(1)
+    if summary is not None:
+        if streamed:
+            click.echo()
+        else:
+            click.echo(f"\n📊 Dashboard Summary:\n\n{summary}")
+        return
+    
     # Load dashboard
     try:
-        with open(input_file, 'r') as f:
+        with span("dashboard.load"), open(input_file, 'r') as f:
             dashboard_json = json.load(f)
     except Exception as e:
         click.echo(f"❌ Error reading file: {e}", err=True)
         sys.exit(1)
     
     # Initialize LLM client
+    llm_client = _init_llm_client(provider, model, api_key, cache_dir, timeout=llm_timeout,
+                                  retries=llm_retries, hedge=hedge, fallbacks=fallbacks)
+    
+    # Generate summary
+    generator = DashboardGenerator(llm_client, summary_token_budget=token_budget,
+                                   map_reduce_summaries=map_reduce, max_workers=workers)
     try:
-        llm_kwargs = {}
-        if model:
-            llm_kwargs['model'] = model
-        if api_key:
-            llm_kwargs['api_key'] = api_key
-        
-        llm_client = get_llm_client(provider, **llm_kwargs)
+        if stream:
+            click.echo("\n📊 Dashboard Summary:\n")
+            for chunk in generator.stream_summarize_dashboard(dashboard_json):
+                click.echo(chunk, nl=False)
+            click.echo()
+        else:
+            summary = generator.summarize_dashboard(dashboard_json)
+            click.echo(f"\n📊 Dashboard Summary:\n\n{summary}")
     except Exception as e:
-        click.echo(f"❌ Error initializing LLM client: {e}", err=True)
+        click.echo(f"❌ Error summarizing dashboard: {e}", err=True)
         sys.exit(1)
+
+
+@cli.group('daemon')
+def daemon_group():
+    """Manage the optional background agent daemon.
+    
+    While the daemon is running, `create` and `summarize` forward their work to
+    it over a Unix socket, reusing warm LLM and Grafana connections, caches and
+    parsed dashboard files. Pass --no-daemon to run a command locally.
+    """
+    pass
+
+
+@daemon_group.command('start')
+@click.option('--socket', 'socket_file', envvar='GRAFANA_AGENT_SOCKET',
+              help='Socket path (default: ~/.grafana-agent/agent.sock)')
+@click.option('--foreground', is_flag=True,
+              help='Serve in this process instead of in the background')
+def daemon_start(socket_file, foreground):
+    """Start the agent daemon."""
+    from .daemon import AgentDaemon, spawn_daemon
     
-    # Generate summary
-    generator = DashboardGenerator(llm_client)
     try:
-        summary = generator.summarize_dashboard(dashboard_json)
-        click.echo(f"\n📊 Dashboard Summary:\n\n{summary}")
+        if foreground:
+            agent = AgentDaemon(socket_file)
+            agent.bind()
+            click.echo(f"🟢 Agent daemon listening on {agent.path}")
+            agent.serve_forever()
+        else:
+            pid = spawn_daemon(socket_file)
+            click.echo(f"🟢 Agent daemon started (pid {pid})")
     except Exception as e:
-        click.echo(f"❌ Error summarizing dashboard: {e}", err=True)
+        click.echo(f"❌ Error starting daemon: {e}", err=True)
+        sys.exit(1)
+
+
+@daemon_group.command('stop')
+@click.option('--socket', 'socket_file', envvar='GRAFANA_AGENT_SOCKET',
+              help='Socket path (default: ~/.grafana-agent/agent.sock)')
+def daemon_stop(socket_file):
+    """Stop the agent daemon."""
+    from .daemon import DaemonClient
+    
+    client = DaemonClient(socket_file)
+    if not client.available():
+        click.echo("Agent daemon is not running")
+        return
+    result = client.request('shutdown')
+    click.echo(f"🛑 Agent daemon stopped (pid {result['pid']})")
+
+
+@daemon_group.command('status')
+@click.option('--socket', 'socket_file', envvar='GRAFANA_AGENT_SOCKET',
+              help='Socket path (default: ~/.grafana-agent/agent.sock)')
+def daemon_status(socket_file):
+    """Show whether the agent daemon is running."""
+    from .daemon import DaemonClient
+    
+    client = DaemonClient(socket_file)
+    if not client.available():
+        click.echo("Agent daemon is not running")
+        sys.exit(1)
+    stats = client.request('stats')
+    click.echo(f"🟢 Agent daemon running on {client.path}")
+    for key, value in stats.items():
+        click.echo(f"  {key}: {value}")
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Interface to bind')
+@click.option('--port', default=8080, show_default=True, type=int, help='Port to bind')
+@click.option('--provider', default='openai', type=click.Choice(LLM_PROVIDERS), 
+              help='LLM provider to use')
+@click.option('--model', help='Model name to use')
+@click.option('--api-key', help='API key for LLM provider')
+@click.option('--cache-dir', envvar='GRAFANA_AGENT_CACHE_DIR',
+              help='Directory for the on-disk LLM response cache')
+@click.option('--max-concurrency', default=8, show_default=True, type=click.IntRange(min=1),
+              help='Maximum LLM requests processed at once')
+@click.option('--max-queue', default=64, show_default=True, type=click.IntRange(min=0),
+              help='Maximum requests waiting for a slot before new ones get a 503')
+@click.option('--history-tokens', default=8000, show_default=True, type=click.IntRange(min=1),
+              help='Token budget for each chat session\'s conversation history')
+@click.option('--session-ttl', default=3600, show_default=True, type=click.IntRange(min=1),
+              help='Seconds of inactivity after which a chat session expires')
+@click.option('--rpm', type=click.FloatRange(min=0, min_open=True),
+              help='Requests per minute allowed by the LLM provider quota')
+@click.option('--tpm', type=click.FloatRange(min=0, min_open=True),
+              help='Tokens per minute allowed by the LLM provider quota')
+@_llm_policy_options
+@click.option('--route', 'route_specs', multiple=True, metavar='TASK=PROVIDER[:MODEL]',
+              help='Preferred backend for a task: chat, create_dashboard or summarize '
+                   '(repeatable)')
+@click.option('--metrics', is_flag=True,
+              help='Expose LLM call metrics for Prometheus at /metrics '
+                   '(requires prometheus-client)')
+def serve(host, port, provider, model, api_key, cache_dir, max_concurrency, max_queue,
+          history_tokens, session_ttl, rpm, tpm, llm_timeout, llm_retries, hedge, fallbacks,
+          route_specs, metrics):
+    """Serve dashboard creation, summaries and chat sessions over HTTP.
+    
+    Responses stream as server-sent events when requested with ?stream=1 or
+    Accept: text/event-stream. See the README for the endpoints.
+    """
+    try:
+        from .server import AgentServer, run_server
+    except ImportError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    
+    try:
+        routes = dict(_parse_route(route) for route in route_specs)
+    except ValueError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    hooks = []
+    if metrics:
+        try:
+            from .instrumentation import PrometheusHook
+            hooks.append(PrometheusHook())
+        except ImportError as e:
+            click.echo(f"❌ {e}", err=True)
+            sys.exit(1)
+    llm_client = _init_llm_client(provider, model, api_key, cache_dir, rpm=rpm, tpm=tpm,
+                                  timeout=llm_timeout, retries=llm_retries, hedge=hedge,
+                                  fallbacks=fallbacks, routes=routes,
+                                  hooks=hooks)
+    server = AgentServer(llm_client, max_concurrency=max_concurrency, max_queue=max_queue,
+                         session_ttl=session_ttl, history_tokens=history_tokens,
+                         metrics_registry=hooks[0].registry if hooks else None)
+    click.echo(f"🟢 Agent API listening on http://{host}:{port}")
+    try:
+        run_server(server, host=host, port=port)
+    except ImportError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+
+
+@cli.command('export')
+@click.argument('archive_dir', type=click.Path(file_okay=False))
+@click.option('--grafana-url', envvar='GRAFANA_URL', help='Grafana base URL')
+@click.option('--grafana-api-key', envvar='GRAFANA_API_KEY', help='Grafana API key')
+@click.option('--grafana-user', envvar='GRAFANA_USER', help='Grafana username')
+@click.option('--grafana-password', envvar='GRAFANA_PASSWORD', help='Grafana password')
+@click.option('--workers', '-w', default=8, show_default=True, type=click.IntRange(min=1),
+              help='Maximum number of dashboards downloaded in parallel')
+@click.option('--query', default='', help='Only export dashboards matching this search query')
+@click.option('--folder-id', 'folder_ids', multiple=True, type=int,
+              help='Only export dashboards in this folder (repeatable)')
+def export(archive_dir, grafana_url, grafana_api_key, grafana_user, grafana_password, workers,
+           query, folder_ids):
+    """Back up every Grafana dashboard into a compressed, content-addressed archive.
+    
+    Re-running against the same ARCHIVE_DIR only downloads dashboards whose
+    version changed since the last export.
+    """
+    from .backup import DashboardArchive, export_dashboards
+    
+    grafana_client = _init_grafana_client(grafana_url, grafana_api_key, grafana_user,
+                                          grafana_password, pool_maxsize=workers)
+    try:
+        archive = DashboardArchive(archive_dir)
+    except Exception as e:
+        click.echo(f"❌ Error opening archive: {e}", err=True)
+        sys.exit(1)
+    
+    def report(uid, status, error):
+        if status == 'error':
+            click.echo(f"❌ {uid}: {error}", err=True)
+        elif status == 'downloaded':
+            click.echo(f"✅ {uid}")
+    
+    click.echo(f"🔄 Exporting dashboards to {archive_dir} with {workers} workers...")
+    try:
+        result = export_dashboards(grafana_client, archive, max_workers=workers, query=query,
+                                   folder_ids=list(folder_ids), on_result=report)
+    except Exception as e:
+        click.echo(f"❌ Error exporting dashboards: {e}", err=True)
+        sys.exit(1)
+    
+    click.echo(f"\n📦 {result.downloaded} downloaded, {result.unchanged} unchanged, "
+               f"{result.removed} removed, {len(result.errors)} failed in {result.elapsed:.1f}s")
+    if not result.ok:
+        sys.exit(1)
+
+
+@cli.command('import')
+@click.argument('source', type=click.Path(exists=True, file_okay=False))
+@click.option('--grafana-url', envvar='GRAFANA_URL', help='Grafana base URL')
+@click.option('--grafana-api-key', envvar='GRAFANA_API_KEY', help='Grafana API key')
+@click.option('--grafana-user', envvar='GRAFANA_USER', help='Grafana username')
+@click.option('--grafana-password', envvar='GRAFANA_PASSWORD', help='Grafana password')
+@click.option('--workers', '-w', default=8, show_default=True, type=click.IntRange(min=1),
+              help='Maximum number of dashboards compared and uploaded in parallel')
+@click.option('--rate-limit', type=click.FloatRange(min=0, min_open=True),
+              help='Maximum Grafana requests per second')
+@click.option('--folder-id', default=0, show_default=True, type=int,
+              help='Folder ID for dashboards without a folder UID (0 for General)')
+@click.option('--dry-run', is_flag=True, help='Only report what would be created or updated')
+def import_(source, grafana_url, grafana_api_key, grafana_user, grafana_password, workers,
+            rate_limit, folder_id, dry_run):
+    """Import dashboards from an export archive or a directory of JSON files.
+    
+    Dashboards whose content already matches Grafana are skipped; only new and
+    changed dashboards are uploaded.
+    """
+    from .backup import import_dashboards, load_import_items
+    
+    try:
+        items = load_import_items(source)
+    except Exception as e:
+        click.echo(f"❌ Error reading {source}: {e}", err=True)
+        sys.exit(1)
+    
+    grafana_client = _init_grafana_client(grafana_url, grafana_api_key, grafana_user,
+                                          grafana_password, pool_maxsize=workers)
+    
+    def report(name, action, detail):
+        if action == 'error':
+            click.echo(f"❌ {name}: {detail}", err=True)
+        elif action != 'unchanged':
+            prefix = "would " if dry_run else ""
+            click.echo(f"{'📝' if dry_run else '✅'} {name}: {prefix}{action} ({detail})")
+    
+    click.echo(f"🔄 Comparing {len(items)} dashboards with Grafana...")
+    result = import_dashboards(grafana_client, items, max_workers=workers, rate_limit=rate_limit,
+                               folder_id=folder_id, dry_run=dry_run, on_result=report)
+    
+    verb = "to create" if dry_run else "created"
+    updated = 'to update' if dry_run else 'updated'
+    click.echo(f"\n📦 {result.created} {verb}, {result.updated} {updated}, "
+               f"{result.unchanged} unchanged, {len(result.errors)} failed "
+               f"in {result.elapsed:.1f}s")
+    if not result.ok:
         sys.exit(1)
 
 
@@ -0,0 +1,347 @@
+"""Compact, token-budgeted encoding of dashboards for LLM prompts."""
+
+import json
+from typing import Optional, Dict, Any, List, Tuple
+from .tokens import estimate_tokens
+
+
+# Query fields used by common data sources, in order of preference
+QUERY_FIELDS = ("expr", "query", "rawSql", "rawQuery", "target", "queryText", "expression",
+                "metric")
+
+# Field values that Grafana fills in by default and carry no meaning for a summary
+DEFAULT_VALUES = {
+    "legendFormat": "__auto",
+    "editorMode": "code",
+    "hide": False,
+    "transparent": False,
+    "instant": False,
+    "range": True,
+}
+
+# Longest free text (descriptions, text panel content) kept verbatim
+MAX_TEXT_LENGTH = 300
+# Longest query kept at the most aggressive compaction level
+MAX_QUERY_LENGTH = 120
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _prune(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty values and fields that are set to Grafana defaults."""
+    return {
+        k: v for k, v in obj.items()
+        if not _is_empty(v) and not (k in DEFAULT_VALUES and DEFAULT_VALUES[k] == v)
+    }
+
+
+def _datasource(value: Any) -> Optional[str]:
+    """Reduce a datasource reference to a short string."""
+    if isinstance(value, dict):
+        ds_type, uid = value.get("type"), value.get("uid")
+        if ds_type and uid:
+            return f"{ds_type}:{uid}"
+        return ds_type or uid
+    return value if isinstance(value, str) and value else None
+
+
+def _compact_target(target: Dict[str, Any], panel_datasource: Optional[str]) -> Dict[str, Any]:
+    query = next((target[f] for f in QUERY_FIELDS
+                  if isinstance(target.get(f), str) and target[f]), None)
+    compact = {
+        "query": query,
+        "legend": target.get("legendFormat"),
+        "hide": target.get("hide"),
+    }
+    datasource = _datasource(target.get("datasource"))
+    if datasource != panel_datasource:
+        compact["datasource"] = datasource
+    if query is None:
+        # Unknown data source: keep its fields minus bookkeeping
+        compact.update({k: v for k, v in target.items()
+                        if k not in ("refId", "datasource", "key")
+                        and not isinstance(v, (dict, list))})
+    if compact.get("legend") == "__auto":
+        compact.pop("legend")
+    return _prune(compact)
+
+
+def _compact_panel(panel: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a panel onto the fields that describe what it shows."""
+    datasource = _datasource(panel.get("datasource"))
+    defaults = (panel.get("fieldConfig") or {}).get("defaults") or {}
+    options = panel.get("options") or {}
+    thresholds = [step.get("value") for step in (defaults.get("thresholds") or {}).get("steps", [])
+                  if step.get("value") is not None]
+
+    compact = {
+        "title": panel.get("title"),
+        "type": panel.get("type"),
+        "description": _truncate(panel.get("description") or "", MAX_TEXT_LENGTH),
+        "datasource": datasource,
+        "targets": [_compact_target(t, datasource) for t in panel.get("targets") or []],
+        "unit": defaults.get("unit"),
+        "min": defaults.get("min"),
+        "max": defaults.get("max"),
+        "thresholds": thresholds,
+        "calcs": (options.get("reduceOptions") or {}).get("calcs"),
+        "content": _truncate(options.get("content") or panel.get("content") or "", MAX_TEXT_LENGTH),
+        "transformations": [t.get("id") for t in panel.get("transformations") or [] if t.get("id")],
+        "repeat": panel.get("repeat"),
+        "overrides": len((panel.get("fieldConfig") or {}).get("overrides") or []) or None,
+    }
+    if panel.get("collapsed") is True:
+        compact["collapsed"] = True
+    if panel.get("panels"):
+        compact["panels"] = [_compact_panel(p) for p in panel["panels"]]
+    return _prune(compact)
+
+
+def _dedupe_panels(panels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace configuration repeated across panels with a reference to the first panel using it."""
+    seen: Dict[str, str] = {}
+    result = []
+    for panel in panels:
+        if "panels" in panel:
+            panel = dict(panel, panels=_dedupe_panels(panel["panels"]))
+        if panel.get("type") == "row":
+            # Rows mark section boundaries and have no configuration worth sharing
+            result.append(panel)
+            continue
+        shared = {k: v for k, v in panel.items()
+                  if k not in ("title", "targets", "description", "content", "panels")}
+        if len(shared) > 1:
+            key = json.dumps(shared, sort_keys=True)
+            if key in seen and seen[key] != panel.get("title"):
+                # The type stays: it is what identifies rows and labels reduced panels
+                panel = {k: v for k, v in panel.items() if k not in shared or k == "type"}
+                panel["same_config_as"] = seen[key]
+            else:
+                seen.setdefault(key, panel.get("title") or "")
+        result.append(panel)
+    return result
+
+
+def _unwrap(dashboard_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the dashboard model from a bare model or an API ``{dashboard, meta}`` response."""
+    model = dashboard_json.get("dashboard")
+    return model if isinstance(model, dict) else dashboard_json
+
+
+def compact_dashboard(dashboard_json: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a compact, schema-aware representation of a dashboard.
+
+    Layout, plugin versions, styling and fields left at Grafana defaults are
+    removed; panels keep their title, type, queries, units and thresholds, and
+    configuration repeated across panels is replaced with a ``same_config_as``
+    reference.
+
+    Args:
+        dashboard_json: Dashboard JSON object (bare model or API response)
+
+    Returns:
+        Compact dashboard representation
+    """
+    dashboard = _unwrap(dashboard_json)
+    meta = dashboard_json.get("meta") or {}
+    templating = [
+        _prune({
+            "name": var.get("name"),
+            "type": var.get("type"),
+            "query": var.get("query") if isinstance(var.get("query"), str) else None,
+            "multi": var.get("multi") or None,
+        })
+        for var in (dashboard.get("templating") or {}).get("list", [])
+    ]
+    annotations = [a.get("name") for a in (dashboard.get("annotations") or {}).get("list", [])
+                   if not a.get("builtIn")]
+
+    return _prune({
+        "title": dashboard.get("title"),
+        "uid": dashboard.get("uid"),
+        "folder": meta.get("folderTitle"),
+        "description": _truncate(dashboard.get("description") or "", MAX_TEXT_LENGTH),
+        "tags": dashboard.get("tags"),
+        "time": dashboard.get("time"),
+        "refresh": dashboard.get("refresh"),
+        "variables": templating,
+        "annotations": annotations,
+        "links": [link.get("title") for link in dashboard.get("links") or [] if link.get("title")],
+        "panels": _dedupe_panels([_compact_panel(p) for p in dashboard.get("panels") or []]),
+    })
+
+
+def _strip_details(panels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Level 1: keep titles, types, queries and units only."""
+    keep = ("title", "type", "targets", "unit", "same_config_as", "collapsed")
+    result = []
+    for panel in panels:
+        slim = {k: v for k, v in panel.items() if k in keep}
+        if "panels" in panel:
+            slim["panels"] = _strip_details(panel["panels"])
+        result.append(slim)
+    return result
+
+
+def _queries_only(panels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Level 2: titles, types and shortened queries."""
+    result = []
+    for panel in panels:
+        slim = {"title": panel.get("title"), "type": panel.get("type")}
+        queries = [_truncate(t["query"], MAX_QUERY_LENGTH)
+                   for t in panel.get("targets", []) if "query" in t]
+        if queries:
+            slim["queries"] = queries
+        if "panels" in panel:
+            slim["panels"] = _queries_only(panel["panels"])
+        result.append(_prune(slim))
+    return result
+
+
+def _titles_only(panels: List[Dict[str, Any]]) -> List[Any]:
+    """Level 3: one ``title (type)`` string per panel."""
+    result: List[Any] = []
+    for panel in panels:
+        label = f"{panel.get('title') or 'untitled'} ({panel.get('type', 'panel')})"
+        if "panels" in panel:
+            result.append({label: _titles_only(panel["panels"])})
+        else:
+            result.append(label)
+    return result
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), sort_keys=False, ensure_ascii=False)
+
+
+def encode_dashboard(dashboard_json: Dict[str, Any], token_budget: Optional[int] = None,
+                     compacted: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Encode a dashboard as compact JSON that fits within a token budget.
+
+    The compact representation is tried first; if it exceeds the budget,
+    progressively coarser levels of detail are used (dropping thresholds and
+    options, then keeping only queries, then only panel titles), and finally the
+    panel list is truncated with a note of how many panels were omitted.
+
+    Args:
+        dashboard_json: Dashboard JSON object
+        token_budget: Maximum estimated tokens (None for no limit)
+        compacted: Result of ``compact_dashboard`` for the dashboard, if already built
+
+    Returns:
+        Compact JSON text
+    """
+    compact = compacted if compacted is not None else compact_dashboard(dashboard_json)
+    encoded = _encode(compact)
+    if token_budget is None or estimate_tokens(encoded) <= token_budget:
+        return encoded
+
+    panels = compact.get("panels", [])
+    header = {k: v for k, v in compact.items()
+              if k not in ("panels", "variables", "annotations", "links")}
+    header["variables"] = [v.get("name") for v in compact.get("variables", [])]
+
+    for reduce in (_strip_details, _queries_only, _titles_only):
+        panels = reduce(panels)
+        encoded = _encode(dict(header, panels=panels))
+        if estimate_tokens(encoded) <= token_budget:
+            return encoded
+
+    # Still too large: keep as many panels as fit
+    low, high = 0, len(panels)
+    while low < high:
+        mid = (low + high + 1) // 2
+        candidate = _encode(dict(header, panels=panels[:mid], omitted_panels=len(panels) - mid))
+        if estimate_tokens(candidate) <= token_budget:
+            low = mid
+        else:
+            high = mid - 1
+    return _encode(dict(header, panels=panels[:low], omitted_panels=len(panels) - low))
+
+
+def _fit_panel(panel: Dict[str, Any], token_budget: int) -> Tuple[Any, int]:
+    """Reduce a panel's detail until it fits the budget alone; return it with its tokens."""
+    tokens = estimate_tokens(_encode(panel))
+    if tokens <= token_budget:
+        return panel, tokens
+    for reduce in (_strip_details, _queries_only):
+        reduced = reduce([panel])[0]
+        tokens = estimate_tokens(_encode(reduced))
+        if tokens <= token_budget:
+            return reduced, tokens
+    label = _titles_only([panel])[0]
+    return label, estimate_tokens(_encode(label))
+
+
+def _row_groups(panels: List[Dict[str, Any]]) -> List[Tuple[Optional[str], List[Dict[str, Any]]]]:
+    """Group a flat panel list into (row title, panels) sections."""
+    groups: List[Tuple[Optional[str], List[Dict[str, Any]]]] = [(None, [])]
+    for panel in panels:
+        # Anything holding nested panels is a row, so its panels can be split across chunks
+        if panel.get("type") == "row" or "panels" in panel:
+            groups.append((panel.get("title"), list(panel.get("panels", []))))
+        else:
+            groups[-1][1].append(panel)
+    return [(title, members) for title, members in groups if members]
+
+
+def split_dashboard(dashboard_json: Dict[str, Any], token_budget: int,
+                    compacted: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Split a dashboard into compact chunks that each fit within a token budget.
+
+    Panels are grouped by row; rows larger than the budget are split across
+    several chunks and small adjacent rows are packed into one chunk. Each
+    panel is encoded once: token estimates of compact JSON add up over its
+    elements (every element starts and ends with punctuation), so chunk sizes
+    are tracked as running totals.
+
+    Args:
+        dashboard_json: Dashboard JSON object
+        token_budget: Maximum estimated tokens per chunk
+        compacted: Result of ``compact_dashboard`` for the dashboard, if already built
+
+    Returns:
+        Tuple of (compact dashboard header without panels, encoded chunks)
+    """
+    compact = compacted if compacted is not None else compact_dashboard(dashboard_json)
+    header = {k: v for k, v in compact.items() if k != "panels"}
+
+    # Split each row into pieces that fit the budget inside the chunk's sections list
+    wrapper = estimate_tokens(_encode({"sections": []}))
+    pieces: List[Tuple[Dict[str, Any], int]] = []
+    for title, members in _row_groups(compact.get("panels", [])):
+        # Tokens of the piece with an empty panel list; each panel adds its own tokens and a comma
+        empty = estimate_tokens(_encode(dict(_prune({"section": title}), panels=[])))
+        panels: List[Any] = []
+        tokens = empty
+        for panel in members:
+            panel, panel_tokens = _fit_panel(panel, token_budget // 2)
+            if panels and wrapper + tokens + 1 + panel_tokens > token_budget:
+                pieces.append((_prune({"section": title, "panels": panels}), tokens))
+                panels, tokens = [], empty
+            tokens += panel_tokens + (1 if panels else 0)
+            panels.append(panel)
+        pieces.append((_prune({"section": title, "panels": panels}), tokens))
+
+    # Pack adjacent pieces together while they fit
+    chunks: List[str] = []
+    sections: List[Dict[str, Any]] = []
+    tokens = wrapper
+    for piece, piece_tokens in pieces:
+        if sections and tokens + 1 + piece_tokens > token_budget:
+            chunks.append(_encode({"sections": sections}))
+            sections, tokens = [], wrapper
+        tokens += piece_tokens + (1 if sections else 0)
+        sections.append(piece)
+    if sections:
+        chunks.append(_encode({"sections": sections}))
+    return header, chunks
@@ -0,0 +1,56 @@
+"""Helpers for bounded fan-out and request pacing."""
+
+import threading
+import time
+from typing import Any, Awaitable, Iterable, List
+
+
+async def gather_bounded(coros: Iterable[Awaitable[Any]], limit: int,
+                         return_exceptions: bool = False) -> List[Any]:
+    """
+    Await coroutines concurrently with at most ``limit`` running at once.
+
+    Args:
+        coros: Coroutines to run
+        limit: Maximum number running concurrently
+        return_exceptions: Return failures in place instead of raising the first one
+
+    Returns:
+        Results in input order
+    """
+    import asyncio  # deferred to keep CLI startup from loading it
+
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(coro: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros),
+                                return_exceptions=return_exceptions)
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at a maximum rate."""
+
+    def __init__(self, rate: float):
+        """
+        Initialize limiter.
+
+        Args:
+            rate: Maximum calls per second
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may proceed."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
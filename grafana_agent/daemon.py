@@ -0,0 +1,321 @@
+"""Optional local daemon that keeps LLM and Grafana clients warm between CLI invocations."""
+
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Tuple
+from .llm_client import LLMClient, build_llm_client
+from .dashboard_generator import DashboardGenerator
+
+
+# Socket used when neither --socket nor GRAFANA_AGENT_SOCKET is given
+DEFAULT_SOCKET_PATH = os.path.join("~", ".grafana-agent", "agent.sock")
+
+
+def socket_path(path: Optional[str] = None) -> str:
+    """Resolve the daemon socket path from an argument, the environment or the default."""
+    return os.path.expanduser(path or os.environ.get("GRAFANA_AGENT_SOCKET") or DEFAULT_SOCKET_PATH)
+
+
+class DaemonError(RuntimeError):
+    """A request was delivered to the daemon but failed there."""
+
+
+class DaemonClient:
+    """
+    Client for the agent daemon's newline-delimited JSON protocol.
+
+    Each request is one JSON line ``{"op": ..., "params": {...}}``. The daemon
+    replies with zero or more ``{"event": ...}`` lines (streamed chunks or
+    panels) followed by one ``{"ok": true, "result": ...}`` or
+    ``{"ok": false, "error": ...}`` line.
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: Optional[float] = 600.0):
+        """
+        Initialize daemon client.
+
+        Args:
+            path: Socket path (defaults to GRAFANA_AGENT_SOCKET or ~/.grafana-agent/agent.sock)
+            timeout: Socket timeout in seconds for each read
+        """
+        self.path = socket_path(path)
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        """Whether a daemon is listening on the socket."""
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(self.path):
+            return False
+        try:
+            self.request("ping")
+            return True
+        except (OSError, DaemonError):
+            return False
+
+    def request(self, op: str, params: Optional[Dict[str, Any]] = None,
+                on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Any:
+        """
+        Send one request and wait for its result.
+
+        Args:
+            op: Operation name (e.g. 'create', 'summarize', 'ping')
+            params: Operation parameters
+            on_event: Optional callback for streamed events
+
+        Returns:
+            Operation result
+
+        Raises:
+            OSError: If the daemon cannot be reached (callers fall back to running locally)
+            DaemonError: If the operation failed in the daemon
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            sock.sendall(json.dumps({"op": op, "params": params or {}}).encode("utf-8") + b"\n")
+            with sock.makefile("r", encoding="utf-8") as reader:
+                for line in reader:
+                    message = json.loads(line)
+                    if "event" in message:
+                        if on_event is not None:
+                            on_event(message["event"])
+                    elif message.get("ok"):
+                        return message.get("result")
+                    else:
+                        raise DaemonError(message.get("error") or "Unknown daemon error")
+        raise ConnectionError("Daemon closed the connection without a result")
+
+
+class AgentDaemon:
+    """
+    Long-lived process serving dashboard requests over a Unix socket.
+
+    LLM clients (and their HTTP connection pools), dashboard generators with
+    their chunk-summary caches, Grafana clients and parsed dashboard files are
+    kept between requests, so scripted loops of CLI invocations skip SDK setup,
+    TLS handshakes and repeated parsing.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_dashboards: int = 64):
+        """
+        Initialize daemon (call ``serve_forever`` to start serving).
+
+        Args:
+            path: Socket path (defaults to GRAFANA_AGENT_SOCKET or ~/.grafana-agent/agent.sock)
+            max_dashboards: Maximum number of parsed dashboard files kept in memory
+        """
+        self.path = socket_path(path)
+        self.max_dashboards = max_dashboards
+        self.started = time.time()
+        self.requests = 0
+        self._llm_clients: Dict[Tuple[Any, ...], LLMClient] = {}
+        self._generators: Dict[Tuple[Any, ...], DashboardGenerator] = {}
+        self._grafana_clients: Dict[Tuple[Any, ...], Any] = {}
+        self._dashboards: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    # Warm resources
+
+    def _llm_client(self, params: Dict[str, Any]) -> LLMClient:
+        provider = params.get("provider") or "openai"
+        key = (provider, params.get("model"), params.get("api_key"), params.get("cache_dir"),
+               params.get("llm_timeout"), params.get("llm_retries"), params.get("hedge"),
+               tuple(params.get("fallbacks") or ()))
+        with self._lock:
+            client = self._llm_clients.get(key)
+            if client is None:
+                client = build_llm_client(provider, model=params.get("model"),
+                                          api_key=params.get("api_key"),
+                                          fallbacks=params.get("fallbacks") or (),
+                                          timeout=params.get("llm_timeout"),
+                                          max_retries=params.get("llm_retries") or 0,
+                                          hedge=bool(params.get("hedge")))
+                if params.get("cache_dir"):
+                    from .cache import CachedLLMClient, SQLiteCache
+                    os.makedirs(params["cache_dir"], exist_ok=True)
+                    cache = SQLiteCache(os.path.join(params["cache_dir"], "responses.sqlite"))
+                    client = CachedLLMClient(client, cache, provider=provider)
+                self._llm_clients[key] = client
+            return client
+
+    def _generator(self, params: Dict[str, Any], **options: Any) -> DashboardGenerator:
+        llm_client = self._llm_client(params)
+        key = (id(llm_client),) + tuple(sorted(options.items()))
+        with self._lock:
+            generator = self._generators.get(key)
+            if generator is None:
+                generator = self._generators[key] = DashboardGenerator(llm_client, **options)
+            return generator
+
+    def _grafana_client(self, params: Dict[str, Any]) -> Any:
+        from .grafana_client import GrafanaClient
+
+        key = (params["grafana_url"], params["grafana_api_key"])
+        with self._lock:
+            client = self._grafana_clients.get(key)
+            if client is None:
+                client = self._grafana_clients[key] = GrafanaClient(key[0], api_key=key[1])
+            return client
+
+    def _load_dashboard(self, path: str) -> Dict[str, Any]:
+        """Parse a dashboard file, reusing the parsed copy while the file is unchanged."""
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._dashboards:
+                self._dashboards.move_to_end(key)
+                return self._dashboards[key]
+        with open(path, 'r') as f:
+            dashboard: Dict[str, Any] = json.load(f)
+        with self._lock:
+            self._dashboards[key] = dashboard
+            while len(self._dashboards) > self.max_dashboards:
+                self._dashboards.popitem(last=False)
+        return dashboard
+
+    # Operations
+
+    def _op_ping(self, params: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1)}
+
+    def _op_stats(self, params: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "llm_clients": len(self._llm_clients),
+                "grafana_clients": len(self._grafana_clients),
+                "dashboards_cached": len(self._dashboards),
+            }
+
+    def _op_create(self, params: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        generator = self._generator(params)
+        on_panel = (lambda panel: emit({"panel": panel})) if params.get("stream") else None
+        return generator.create_dashboard(params["description"], params.get("title"),
+                                          on_panel=on_panel)
+
+    def _op_summarize(self, params: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        dashboard = self._load_dashboard(params["path"])
+        generator = self._generator(
+            params,
+            summary_token_budget=params.get("token_budget", 8000),
+            map_reduce_summaries=params.get("map_reduce", True),
+            max_workers=params.get("workers", 4),
+        )
+        if not params.get("stream"):
+            return generator.summarize_dashboard(dashboard)
+        chunks = []
+        for chunk in generator.stream_summarize_dashboard(dashboard):
+            chunks.append(chunk)
+            emit({"chunk": chunk})
+        return "".join(chunks)
+
+    def _op_upload(self, params: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        return self._grafana_client(params).create_dashboard(params["dashboard"])
+
+    def _op_shutdown(self, params: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        # shutdown() blocks until serve_forever returns, so it cannot run on a handler thread
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return {"pid": os.getpid()}
+
+    def handle(self, request: Dict[str, Any], emit: Callable[[Any], None]) -> Any:
+        """Run one request, passing streamed events to ``emit``."""
+        handler = getattr(self, f"_op_{request.get('op')}", None)
+        if handler is None:
+            raise ValueError(f"Unknown operation: {request.get('op')}")
+        with self._lock:
+            self.requests += 1
+        return handler(request.get("params") or {}, emit)
+
+    # Serving
+
+    def _handler_class(self) -> type:
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _send(self, message: Dict[str, Any]) -> None:
+                self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+            def handle(self) -> None:
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                        result = daemon.handle(request, lambda event: self._send({"event": event}))
+                        self._send({"ok": True, "result": result})
+                    except Exception as e:
+                        self._send({"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+        return Handler
+
+    def bind(self) -> socketserver.ThreadingUnixStreamServer:
+        """Create the socket, readable and writable by the current user only, and its server."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            if DaemonClient(self.path, timeout=2).available():
+                raise RuntimeError(f"A daemon is already running on {self.path}")
+            os.unlink(self.path)  # stale socket from a daemon that did not exit cleanly
+        self._server = socketserver.ThreadingUnixStreamServer(self.path, self._handler_class())
+        self._server.daemon_threads = True
+        os.chmod(self.path, 0o600)
+        return self._server
+
+    def serve_forever(self) -> None:
+        """Bind (if needed) and serve until ``shutdown`` is called."""
+        server = self._server if self._server is not None else self.bind()
+        try:
+            server.serve_forever(poll_interval=0.2)
+        finally:
+            server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def shutdown(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def spawn_daemon(path: Optional[str] = None, wait: float = 10.0) -> int:
+    """
+    Start the daemon in a background process and wait until it answers.
+
+    Args:
+        path: Socket path
+        wait: Seconds to wait for the daemon to come up
+
+    Returns:
+        PID of the daemon process
+    """
+    path = socket_path(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    log = open(os.path.join(directory, "agent.log"), "ab")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "grafana_agent.cli", "daemon", "start", "--foreground",
+         "--socket", path],
+        stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True,
+    )
+    log.close()
+
+    client = DaemonClient(path, timeout=2)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Daemon exited with status {process.returncode}; "
+                               f"see {directory}/agent.log")
+        if client.available():
+            return process.pid
+        time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"Daemon did not start within {wait:.0f}s")
@@ -1,21 +1,49 @@
 """Dashboard generator using LLM to create Grafana dashboards."""
 
+import contextvars
 import json
-from typing import Dict, Any, Optional
-from .llm_client import LLMClient
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Tuple, Union, Callable
+from .llm_client import (LLMClient, AsyncLLMClient, chat_async, sync_client, llm_task,
+                         TASK_CREATE_DASHBOARD, TASK_SUMMARIZE)
+from .json_stream import StreamingJSONParser
+from .compaction import compact_dashboard, encode_dashboard, split_dashboard
+from .cache import ResponseCache, MemoryCache, make_cache_key
+from .tokens import estimate_tokens, estimate_message_tokens
+from .concurrency import gather_bounded
+from .tracing import span
+
+logger = logging.getLogger(__name__)
 
 
 class DashboardGenerator:
     """Generate Grafana dashboards using LLM."""
     
-    def __init__(self, llm_client: LLMClient):
+    def __init__(self, llm_client: Union[LLMClient, AsyncLLMClient],
+                 summary_token_budget: Optional[int] = 8000, compact_summaries: bool = True,
+                 map_reduce_summaries: bool = True, max_workers: int = 4,
+                 chunk_cache: Optional[ResponseCache] = None):
         """
         Initialize dashboard generator.
         
         Args:
-            llm_client: LLM client instance
+            llm_client: LLM client instance (synchronous or asynchronous)
+            summary_token_budget: Maximum estimated tokens of dashboard JSON sent
+                for summarization (None for no limit)
+            compact_summaries: Send a compact representation of the dashboard
+                instead of the full indented JSON when summarizing
+            map_reduce_summaries: Summarize dashboards that exceed the token budget
+                chunk by chunk and combine the results, instead of trimming detail
+            max_workers: Maximum number of chunk summaries generated in parallel
+            chunk_cache: Cache for per-chunk summaries (defaults to in-memory)
         """
         self.llm_client = llm_client
+        self.summary_token_budget = summary_token_budget
+        self.compact_summaries = compact_summaries
+        self.map_reduce_summaries = map_reduce_summaries
+        self.max_workers = max_workers
+        self.chunk_cache = chunk_cache if chunk_cache is not None else MemoryCache()
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for dashboard generation."""
@@ -42,69 +70,276 @@ When summarizing a dashboard, you should:
 4. Note any important features or configurations
 5. Provide insights about the dashboard's structure
 
+The dashboard may be given in a compact form: layout, styling and default settings are omitted, "same_config_as" marks a panel configured like the named panel, and "omitted_panels" counts panels left out for length.
+
 Be clear and concise in your summary."""
 
-    def create_dashboard(self, user_request: str, dashboard_title: Optional[str] = None) -> Dict[str, Any]:
+    def _span_attributes(self, task: str) -> Dict[str, Any]:
+        """Attributes for spans around LLM calls."""
+        return {
+            "llm.task": task,
+            "llm.provider": str(getattr(self.llm_client, "provider",
+                                        type(self.llm_client).__name__)),
+            "llm.model": str(getattr(self.llm_client, "model", "") or ""),
+        }
+    
+    def _build_create_messages(self, user_request: str,
+                               dashboard_title: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build the chat messages for a dashboard generation request."""
+        return [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "user", "content": f"Create a Grafana dashboard for: {user_request}" + 
+             (f"\nTitle: {dashboard_title}" if dashboard_title else "")}
+        ]
+    
+    def _build_summarize_messages(
+            self, dashboard_json: Dict[str, Any],
+            compacted: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """Build the chat messages for a dashboard summarization request."""
+        if self.compact_summaries:
+            encoded = encode_dashboard(dashboard_json, self.summary_token_budget, compacted)
+        else:
+            encoded = json.dumps(dashboard_json, indent=2)
+        return [
+            {"role": "system", "content": self._get_summarize_prompt()},
+            {"role": "user", "content": f"Summarize this Grafana dashboard:\n{encoded}"}
+        ]
+    
+    def _parse_dashboard_response(self, response: str,
+                                  dashboard_title: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse an LLM response into a dashboard JSON object.
+        
+        Args:
+            response: Raw LLM response text
+            dashboard_title: Optional title used when the response has none
+        
+        Returns:
+            Dashboard JSON object
+        """
+        parser = StreamingJSONParser()
+        with span("dashboard.parse", {"llm.response_chars": len(response)}):
+            parser.feed(response)
+        return self._finish_dashboard(parser, response, dashboard_title)
+    
+    def _finish_dashboard(self, parser: StreamingJSONParser, response: str,
+                          dashboard_title: Optional[str] = None) -> Dict[str, Any]:
+        """Take the parsed response and fill in required dashboard fields."""
+        with span("dashboard.repair") as current:
+            try:
+                dashboard = parser.result()
+            except ValueError as e:
+                raise ValueError(f"Failed to parse LLM response as JSON: {e}\n"
+                                 f"Response: {response.strip()}")
+            current.set_attribute("dashboard.salvaged", parser.salvaged)
+        if parser.salvaged:
+            logger.warning("LLM response was truncated; using the salvaged dashboard JSON")
+        
+        with span("dashboard.validate"):
+            return self._ensure_dashboard_fields(dashboard, dashboard_title)
+    
+    def _ensure_dashboard_fields(self, dashboard: Dict[str, Any],
+                                 dashboard_title: Optional[str] = None) -> Dict[str, Any]:
+        """Wrap a bare dashboard object and fill in fields Grafana requires."""
+        # Ensure basic structure
+        if "dashboard" not in dashboard:
+            # If LLM returned just the dashboard object, wrap it
+            if "title" in dashboard or "panels" in dashboard:
+                dashboard = {"dashboard": dashboard}
+        
+        # Ensure dashboard has required fields
+        if "dashboard" in dashboard:
+            dash = dashboard["dashboard"]
+            if "title" not in dash:
+                dash["title"] = dashboard_title or "Generated Dashboard"
+            if "uid" not in dash:
+                dash["uid"] = dash["title"].lower().replace(" ", "-")
+            if "panels" not in dash:
+                dash["panels"] = []
+            if "time" not in dash:
+                dash["time"] = {"from": "now-6h", "to": "now"}
+            if "timezone" not in dash:
+                dash["timezone"] = "browser"
+            if "schemaVersion" not in dash:
+                dash["schemaVersion"] = 38
+            if "version" not in dash:
+                dash["version"] = 0
+            if "tags" not in dash:
+                dash["tags"] = []
+        
+        return dashboard
+    
+    def _compact_for_summary(self, dashboard_json: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Compact form shared by the split and the single-call prompt (None if disabled)."""
+        return compact_dashboard(dashboard_json) if self.compact_summaries else None
+    
+    def _split_for_map_reduce(self, dashboard_json: Dict[str, Any],
+                              compacted: Optional[Dict[str, Any]] = None):
+        """Return ``(header, chunks)`` if the dashboard should be map-reduced, else None."""
+        if not (self.compact_summaries and self.map_reduce_summaries and self.summary_token_budget):
+            return None
+        if compacted is None:
+            compacted = compact_dashboard(dashboard_json)
+        # Dashboards that fit the budget whole are summarized in one call without splitting
+        encoded = encode_dashboard(dashboard_json, compacted=compacted)
+        if estimate_tokens(encoded) <= self.summary_token_budget:
+            return None
+        header, chunks = split_dashboard(dashboard_json, self.summary_token_budget, compacted)
+        return (header, chunks) if len(chunks) > 1 else None
+    
+    def _build_chunk_messages(self, header: Dict[str, Any], chunk: str,
+                              index: int, total: int) -> List[Dict[str, str]]:
+        """Build the messages summarizing one chunk of a large dashboard."""
+        # The dashboard header comes before the part number so that every chunk
+        # of a dashboard shares one prompt prefix the provider can cache
+        return [
+            {"role": "system", "content": self._get_summarize_prompt()},
+            {"role": "user", "content": f"Dashboard: {json.dumps(header, separators=(',', ':'))}\n"
+             f"Summarize part {index} of {total} of this Grafana dashboard.\nPanels:\n{chunk}"}
+        ]
+    
+    def _build_reduce_messages(self, header: Dict[str, Any],
+                               summaries: List[str]) -> List[Dict[str, str]]:
+        """Build the messages combining part summaries into one summary."""
+        parts = "\n\n".join(f"Part {i}:\n{summary}" for i, summary in enumerate(summaries, 1))
+        return [
+            {"role": "system", "content": self._get_summarize_prompt()},
+            {"role": "user", "content":
+             "Summarize this Grafana dashboard from summaries of its parts.\n"
+             f"Dashboard: {json.dumps(header, separators=(',', ':'))}\n\n{parts}"}
+        ]
+    
+    def _batch_summaries(self, header: Dict[str, Any], summaries: List[str]) -> List[List[str]]:
+        """Group part summaries into batches whose reduce prompt fits the token budget."""
+        batches: List[List[str]] = [[]]
+        for summary in summaries:
+            candidate = batches[-1] + [summary]
+            budget = self.summary_token_budget
+            if (len(batches[-1]) >= 2 and budget is not None and estimate_message_tokens(
+                    self._build_reduce_messages(header, candidate)) > budget):
+                batches.append([summary])
+            else:
+                batches[-1] = candidate
+        return batches
+    
+    def _cached_summary(self, messages: List[Dict[str, str]]) -> str:
+        """Summarize a chunk, reusing the cached summary for unchanged content."""
+        key = make_cache_key(getattr(self.llm_client, "provider", ""),
+                             getattr(self.llm_client, "model", ""), messages, temperature=0.3)
+        summary = self.chunk_cache.get(key)
+        if summary is None:
+            with llm_task(TASK_SUMMARIZE), span("llm.chat", self._span_attributes(TASK_SUMMARIZE)):
+                summary = sync_client(self.llm_client).chat(messages, temperature=0.3).strip()
+            if summary:
+                self.chunk_cache.set(key, summary)
+        return summary
+    
+    async def _acached_summary(self, messages: List[Dict[str, str]]) -> str:
+        """Async counterpart of ``_cached_summary``."""
+        key = make_cache_key(getattr(self.llm_client, "provider", ""),
+                             getattr(self.llm_client, "model", ""), messages, temperature=0.3)
+        summary = self.chunk_cache.get(key)
+        if summary is None:
+            with llm_task(TASK_SUMMARIZE):
+                summary = (await chat_async(self.llm_client, messages, temperature=0.3)).strip()
+            if summary:
+                self.chunk_cache.set(key, summary)
+        return summary
+    
+    def _map_reduce_messages(self, header: Dict[str, Any],
+                             chunks: List[str]) -> List[Dict[str, str]]:
+        """
+        Summarize chunks concurrently and reduce them until one prompt remains.
+        
+        Returns:
+            Messages for the final reduce call
+        """
+        total = len(chunks)
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            summaries = self._map_summaries(
+                pool, [self._build_chunk_messages(header, chunk, i, total)
+                       for i, chunk in enumerate(chunks, 1)]
+            )
+            batches = self._batch_summaries(header, summaries)
+            while len(batches) > 1:
+                summaries = self._map_summaries(
+                    pool, [self._build_reduce_messages(header, batch) for batch in batches]
+                )
+                batches = self._batch_summaries(header, summaries)
+        return self._build_reduce_messages(header, batches[0])
+    
+    def _map_summaries(self, pool: ThreadPoolExecutor,
+                       requests: List[List[Dict[str, str]]]) -> List[str]:
+        """Summarize each request on the pool, keeping results in order."""
+        # Each call runs in a copy of the caller's context, so its span nests under the caller's
+        futures = [pool.submit(contextvars.copy_context().run, self._cached_summary, messages)
+                   for messages in requests]
+        return [future.result() for future in futures]
+    
+    async def _amap_reduce_messages(self, header: Dict[str, Any],
+                                    chunks: List[str]) -> List[Dict[str, str]]:
+        """Async counterpart of ``_map_reduce_messages``."""
+        total = len(chunks)
+        summaries = await gather_bounded(
+            [self._acached_summary(self._build_chunk_messages(header, chunk, i, total))
+             for i, chunk in enumerate(chunks, 1)],
+            self.max_workers
+        )
+        batches = self._batch_summaries(header, summaries)
+        while len(batches) > 1:
+            summaries = await gather_bounded(
+                [self._acached_summary(self._build_reduce_messages(header, batch))
+                 for batch in batches],
+                self.max_workers
+            )
+            batches = self._batch_summaries(header, summaries)
+        return self._build_reduce_messages(header, batches[0])
+    
+    def _summarize_messages(self, dashboard_json: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Messages for the final summarization call, map-reducing large dashboards first."""
+        with span("dashboard.build_prompt"):
+            compacted = self._compact_for_summary(dashboard_json)
+            chunked = self._split_for_map_reduce(dashboard_json, compacted)
+            if chunked is None:
+                return self._build_summarize_messages(dashboard_json, compacted)
+        # A span of its own, so the part summaries' LLM calls are not counted as prompt building
+        with span("dashboard.map_reduce", {"dashboard.chunks": len(chunked[1])}):
+            return self._map_reduce_messages(*chunked)
+    
+    def create_dashboard(
+            self, user_request: str, dashboard_title: Optional[str] = None,
+            on_panel: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Generate a Grafana dashboard based on user request.
         
         Args:
             user_request: User's description of what they want in the dashboard
             dashboard_title: Optional title for the dashboard
+            on_panel: Optional callback; when given, the response is streamed and
+                called with each panel as soon as it has been generated
         
         Returns:
             Dashboard JSON object
         """
-        messages = [
-            {"role": "system", "content": self._get_system_prompt()},
-            {"role": "user", "content": f"Create a Grafana dashboard for: {user_request}" + 
-             (f"\nTitle: {dashboard_title}" if dashboard_title else "")}
-        ]
-        
-        response = self.llm_client.chat(messages, temperature=0.3)
-        
-        # Try to extract JSON from response (handle markdown code blocks)
-        response = response.strip()
-        if response.startswith("```json"):
-            response = response[7:]
-        if response.startswith("```"):
-            response = response[3:]
-        if response.endswith("```"):
-            response = response[:-3]
-        response = response.strip()
-        
-        try:
-            dashboard = json.loads(response)
-            
-            # Ensure basic structure
-            if "dashboard" not in dashboard:
-                # If LLM returned just the dashboard object, wrap it
-                if "title" in dashboard or "panels" in dashboard:
-                    dashboard = {"dashboard": dashboard}
-            
-            # Ensure dashboard has required fields
-            if "dashboard" in dashboard:
-                dash = dashboard["dashboard"]
-                if "title" not in dash:
-                    dash["title"] = dashboard_title or "Generated Dashboard"
-                if "uid" not in dash:
-                    dash["uid"] = dash["title"].lower().replace(" ", "-")
-                if "panels" not in dash:
-                    dash["panels"] = []
-                if "time" not in dash:
-                    dash["time"] = {"from": "now-6h", "to": "now"}
-                if "timezone" not in dash:
-                    dash["timezone"] = "browser"
-                if "schemaVersion" not in dash:
-                    dash["schemaVersion"] = 38
-                if "version" not in dash:
-                    dash["version"] = 0
-                if "tags" not in dash:
-                    dash["tags"] = []
-            
-            return dashboard
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse LLM response as JSON: {e}\nResponse: {response}")
+        with span("dashboard.create", {"dashboard.stream": on_panel is not None}):
+            with span("dashboard.build_prompt"):
+                messages = self._build_create_messages(user_request, dashboard_title)
+            with llm_task(TASK_CREATE_DASHBOARD):
+                if on_panel is None:
+                    with span("llm.chat", self._span_attributes(TASK_CREATE_DASHBOARD)):
+                        response = sync_client(self.llm_client).chat(messages, temperature=0.3)
+                    return self._parse_dashboard_response(response, dashboard_title)
+                
+                # Panels are parsed as they stream in, so parsing is part of this span
+                parser = StreamingJSONParser()
+                chunks = []
+                client = sync_client(self.llm_client)
+                with span("llm.stream_chat", self._span_attributes(TASK_CREATE_DASHBOARD)):
+                    for chunk in client.stream_chat(messages, temperature=0.3):
+                        chunks.append(chunk)
+                        for panel in parser.feed(chunk):
+                            on_panel(panel)
+            return self._finish_dashboard(parser, "".join(chunks), dashboard_title)
     
     def summarize_dashboard(self, dashboard_json: Dict[str, Any]) -> str:
         """
@@ -116,11 +351,106 @@ Be clear and concise in your summary."""
         Returns:
             Summary text
         """
-        messages = [
-            {"role": "system", "content": self._get_summarize_prompt()},
-            {"role": "user", "content": f"Summarize this Grafana dashboard:\n{json.dumps(dashboard_json, indent=2)}"}
-        ]
+        with span("dashboard.summarize"):
+            messages = self._summarize_messages(dashboard_json)
+            with llm_task(TASK_SUMMARIZE), span("llm.chat", self._span_attributes(TASK_SUMMARIZE)):
+                response = sync_client(self.llm_client).chat(messages, temperature=0.3)
+        return response.strip()
+    
+    def stream_summarize_dashboard(self, dashboard_json: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generate a summary of a Grafana dashboard, yielding text as it arrives.
+        
+        Args:
+            dashboard_json: Dashboard JSON object
         
-        response = self.llm_client.chat(messages, temperature=0.3)
+        Yields:
+            Summary text chunks
+        """
+        messages = self._summarize_messages(dashboard_json)
+        started = False
+        attributes = self._span_attributes(TASK_SUMMARIZE)
+        with llm_task(TASK_SUMMARIZE), span("llm.stream_chat", attributes):
+            for chunk in sync_client(self.llm_client).stream_chat(messages, temperature=0.3):
+                if not started:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                    started = True
+                yield chunk
+    
+    async def acreate_dashboard(self, user_request: str,
+                                dashboard_title: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a Grafana dashboard without blocking the event loop.
+        
+        Args:
+            user_request: User's description of what they want in the dashboard
+            dashboard_title: Optional title for the dashboard
+        
+        Returns:
+            Dashboard JSON object
+        """
+        messages = self._build_create_messages(user_request, dashboard_title)
+        with llm_task(TASK_CREATE_DASHBOARD):
+            response = await chat_async(self.llm_client, messages, temperature=0.3)
+        return self._parse_dashboard_response(response, dashboard_title)
+    
+    async def asummarize_dashboard(self, dashboard_json: Dict[str, Any]) -> str:
+        """
+        Generate a summary of a Grafana dashboard without blocking the event loop.
+        
+        Args:
+            dashboard_json: Dashboard JSON object
+        
+        Returns:
+            Summary text
+        """
+        compacted = self._compact_for_summary(dashboard_json)
+        chunked = self._split_for_map_reduce(dashboard_json, compacted)
+        if chunked is None:
+            messages = self._build_summarize_messages(dashboard_json, compacted)
+        else:
+            messages = await self._amap_reduce_messages(*chunked)
+        with llm_task(TASK_SUMMARIZE):
+            response = await chat_async(self.llm_client, messages, temperature=0.3)
         return response.strip()
+    
+    async def acreate_dashboards(self, requests: Iterable[Tuple[str, Optional[str]]],
+                                 max_concurrency: int = 8,
+                                 return_exceptions: bool = False) -> List[Any]:
+        """
+        Generate several dashboards concurrently.
+        
+        Args:
+            requests: ``(user_request, dashboard_title)`` pairs
+            max_concurrency: Maximum number of LLM calls in flight
+            return_exceptions: Return failures in place instead of raising the first one
+        
+        Returns:
+            Dashboard JSON objects (or exceptions) in request order
+        """
+        return await gather_bounded(
+            [self.acreate_dashboard(request, title) for request, title in requests],
+            max_concurrency, return_exceptions
+        )
+    
+    async def asummarize_dashboards(self, dashboards: Iterable[Dict[str, Any]],
+                                    max_concurrency: int = 8,
+                                    return_exceptions: bool = False) -> List[Any]:
+        """
+        Summarize several dashboards concurrently.
+        
+        Args:
+            dashboards: Dashboard JSON objects
+            max_concurrency: Maximum number of LLM calls in flight
+            return_exceptions: Return failures in place instead of raising the first one
+        
+        Returns:
+            Summaries (or exceptions) in input order
+        """
+        return await gather_bounded(
+            [self.asummarize_dashboard(dashboard) for dashboard in dashboards],
+            max_concurrency, return_exceptions
+        )
 
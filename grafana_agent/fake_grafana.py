@@ -0,0 +1,243 @@
+"""In-process stand-in for the Grafana dashboard API, for load tests and benchmarks."""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+
+_UID_ROUTE = re.compile(r'^/api/dashboards/uid/([^/]+)(/versions)?$')
+_UID_SEGMENT = re.compile(r'(/api/dashboards/uid/)[^/]+')
+
+
+class FakeGrafana:
+    """
+    Threaded HTTP server implementing the dashboard endpoints used by ``GrafanaClient``.
+
+    Supports ``POST /api/dashboards/db``, ``GET``/``DELETE /api/dashboards/uid/{uid}``,
+    ``GET /api/dashboards/uid/{uid}/versions`` and ``GET /api/search`` (with
+    ``query``, ``tag``, ``type``, ``folderIds``, ``limit`` and ``page``). Any
+    credentials are accepted. Responses can be slowed down, failed with a 500
+    or throttled with a 429 to exercise client timeouts and retries.
+
+    Example::
+
+        with FakeGrafana(latency=0.01, throttle_rate=0.05) as server:
+            client = GrafanaClient(server.url, api_key="test")
+            client.create_dashboard({"title": "CPU"})
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: Optional[float] = None,
+                 seed: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the fake server (call ``start`` or use it as a context manager).
+
+        Args:
+            latency: Fixed delay added to every response, in seconds
+            jitter: Maximum extra random delay per response, in seconds
+            error_rate: Fraction of requests answered with a 500
+            throttle_rate: Fraction of requests answered with a 429
+            retry_after: Retry-After value sent with 429 responses (None to omit)
+            seed: Seed for latency jitter and fault injection
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.dashboards: Dict[str, Dict[str, Any]] = {}
+        self.request_counts: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> "FakeGrafana":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeGrafana":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def add_dashboard(self, dashboard: Dict[str, Any], folder_uid: Optional[str] = None) -> str:
+        """Store a dashboard directly, bypassing HTTP (for seeding load tests)."""
+        _, body = self._save({"dashboard": dashboard, "folderUid": folder_uid, "overwrite": True})
+        return str(body["uid"])
+
+    # Storage operations, called with parsed requests
+
+    def _save(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        dashboard = dict(payload.get("dashboard") or {})
+        with self._lock:
+            uid = dashboard.get("uid") or uuid.uuid4().hex[:9]
+            existing = self.dashboards.get(uid)
+            if existing and not payload.get("overwrite"):
+                if dashboard.get("version") != existing["dashboard"]["version"]:
+                    return 412, {"status": "version-mismatch",
+                                 "message": "The dashboard has been changed by someone else"}
+            if existing:
+                dashboard_id = existing["dashboard"]["id"]
+                version = existing["dashboard"]["version"] + 1
+            else:
+                dashboard_id, version = self._next_id, 1
+                self._next_id += 1
+            dashboard.update(uid=uid, id=dashboard_id, version=version)
+            folder_uid = payload.get("folderUid") or (existing or {}).get("folder_uid") or ""
+            self.dashboards[uid] = {"dashboard": dashboard, "folder_uid": folder_uid,
+                                    "folder_id": payload.get("folderId") or 0}
+        slug = re.sub(r"[^a-z0-9]+", "-", (dashboard.get("title") or "").lower()).strip("-")
+        return 200, {"id": dashboard_id, "uid": uid, "url": f"/d/{uid}/{slug}", "slug": slug,
+                     "status": "success", "version": version}
+
+    def _get(self, uid: str) -> Tuple[int, Any]:
+        with self._lock:
+            entry = self.dashboards.get(uid)
+        if entry is None:
+            return 404, {"message": "Dashboard not found"}
+        return 200, {"dashboard": entry["dashboard"],
+                     "meta": {"folderUid": entry["folder_uid"], "folderId": entry["folder_id"],
+                              "version": entry["dashboard"]["version"]}}
+
+    def _versions(self, uid: str) -> Tuple[int, Any]:
+        status, body = self._get(uid)
+        if status != 200:
+            return status, body
+        return 200, [{"version": body["dashboard"]["version"], "uid": uid}]
+
+    def _delete(self, uid: str) -> Tuple[int, Any]:
+        with self._lock:
+            entry = self.dashboards.pop(uid, None)
+        if entry is None:
+            return 404, {"message": "Dashboard not found"}
+        return 200, {"title": entry["dashboard"].get("title"), "message": "Dashboard deleted",
+                     "id": entry["dashboard"]["id"]}
+
+    def _search(self, params: Dict[str, List[str]]) -> Tuple[int, Any]:
+        query = (params.get("query") or [""])[0].lower()
+        tag = (params.get("tag") or [""])[0]
+        search_type = (params.get("type") or [""])[0]
+        folder_ids = {int(v) for v in params.get("folderIds", [])}
+        limit = int((params.get("limit") or ["1000"])[0])
+        page = int((params.get("page") or ["1"])[0])
+        if search_type == "dash-folder":
+            return 200, []
+
+        with self._lock:
+            entries = sorted(self.dashboards.values(),
+                             key=lambda e: ((e["dashboard"].get("title") or "").lower(),
+                                            e["dashboard"]["uid"]))
+        hits = [
+            {"id": e["dashboard"]["id"], "uid": e["dashboard"]["uid"],
+             "title": e["dashboard"].get("title"), "type": "dash-db",
+             "tags": e["dashboard"].get("tags") or [], "folderUid": e["folder_uid"],
+             "url": f"/d/{e['dashboard']['uid']}"}
+            for e in entries
+            if query in (e["dashboard"].get("title") or "").lower()
+            and (not tag or tag in (e["dashboard"].get("tags") or []))
+            and (not folder_ids or e["folder_id"] in folder_ids)
+        ]
+        return 200, hits[(page - 1) * limit:page * limit]
+
+    # HTTP plumbing
+
+    def _fault(self) -> Optional[Tuple[int, Dict[str, Any], Dict[str, str]]]:
+        """Simulated latency and injected failures for one request."""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+            return 429, {"message": "Too many requests"}, headers
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {"message": "Internal server error"}, {}
+        return None
+
+    def _dispatch(self, method: str, path: str, params: Dict[str, List[str]],
+                  body: Optional[Dict[str, Any]]) -> Tuple[int, Any]:
+        match = _UID_ROUTE.match(path)
+        if method == "POST" and path == "/api/dashboards/db":
+            return self._save(body or {})
+        if method == "GET" and path == "/api/search":
+            return self._search(params)
+        if match and method == "GET":
+            return self._versions(match.group(1)) if match.group(2) else self._get(match.group(1))
+        if match and method == "DELETE" and not match.group(2):
+            return self._delete(match.group(1))
+        return 404, {"message": "Not found"}
+
+    def _handler_class(self) -> type:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid Nagle/delayed-ACK stalls on keep-alive
+            disable_nagle_algorithm = True
+
+            def _handle(self) -> None:
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                with fake._lock:
+                    path = _UID_SEGMENT.sub(r'\1{uid}', parts.path)
+                    key = f"{self.command} {path}"
+                    fake.request_counts[key] = fake.request_counts.get(key, 0) + 1
+
+                headers: Dict[str, str] = {}
+                fault = fake._fault()
+                if fault is not None:
+                    status, payload, headers = fault
+                else:
+                    try:
+                        body = json.loads(raw) if raw else None
+                        status, payload = fake._dispatch(self.command, parts.path,
+                                                         parse_qs(parts.query), body)
+                    except (ValueError, TypeError) as e:
+                        status, payload = 400, {"message": f"Bad request: {e}"}
+
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _handle
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
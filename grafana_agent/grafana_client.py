@@ -1,16 +1,104 @@
 """Grafana API client for dashboard operations."""
 
+import asyncio
 import json
+import random
+import re
+import time
 import requests
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, List, Tuple, Union, Iterator, AsyncIterator, Sequence, cast
 from urllib.parse import urljoin
+from .stats import RequestStats
+from .concurrency import gather_bounded
+from .tracing import span
+
+
+# Responses worth retrying: throttling and transient server-side failures
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Methods that are safe to repeat after a server error or dropped connection
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+_UID_PATH = re.compile(r'(/api/dashboards/uid/)[^/?]+')
+
+
+def _endpoint_name(method: str, endpoint: str) -> str:
+    """Stats key for a request, with UIDs collapsed (e.g. 'GET /api/dashboards/uid/{uid}')."""
+    path = _UID_PATH.sub(r'\1{uid}', endpoint.split('?')[0])
+    return f"{method} {path}"
+
+
+def retry_delay(attempt: int, backoff_factor: float, backoff_max: float,
+                retry_after: Optional[str] = None) -> float:
+    """
+    Compute how long to wait before retrying a request.
+    
+    A ``Retry-After`` header (seconds or HTTP date) takes precedence; otherwise
+    exponential backoff with full jitter is used.
+    
+    Args:
+        attempt: Number of attempts already made (0 for the first retry)
+        backoff_factor: Base delay in seconds
+        backoff_max: Maximum delay in seconds
+        retry_after: Value of the response's Retry-After header, if any
+    
+    Returns:
+        Delay in seconds
+    """
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), backoff_max)
+        except ValueError:
+            try:
+                wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(max(wait, 0.0), backoff_max)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(backoff_max, backoff_factor * (2 ** attempt)))
+
+
+def _search_params(query: str, tag: str, dashboard_type: Optional[str],
+                   folder_ids: Optional[Sequence[int]], limit: int,
+                   page: int) -> List[Tuple[str, Any]]:
+    """Query parameters for one page of ``/api/search`` (folder IDs repeat)."""
+    params: List[Tuple[str, Any]] = [("query", query), ("limit", limit), ("page", page)]
+    if tag:
+        params.append(("tag", tag))
+    if dashboard_type:
+        params.append(("type", dashboard_type))
+    params.extend(("folderIds", folder_id) for folder_id in folder_ids or [])
+    return params
+
+
+def _is_retryable(method: str, status: int) -> bool:
+    """Whether a response status should be retried for a request method."""
+    return status in RETRY_STATUS_CODES and (status == 429 or method in IDEMPOTENT_METHODS)
+
+
+def _dashboard_payload(dashboard: Dict[str, Any], folder_id: int, overwrite: bool,
+                       folder_uid: Optional[str] = None) -> Dict[str, Any]:
+    """Request body for creating or updating a dashboard."""
+    payload = {
+        "dashboard": dashboard,
+        "folderId": folder_id,
+        "overwrite": overwrite
+    }
+    if folder_uid:
+        # Takes precedence over folderId and is stable across Grafana instances
+        payload["folderUid"] = folder_uid
+    return payload
 
 
 class GrafanaClient:
     """Client for interacting with Grafana API."""
     
     def __init__(self, base_url: str, api_key: Optional[str] = None, username: Optional[str] = None, 
-                 password: Optional[str] = None):
+                 password: Optional[str] = None,
+                 timeout: Union[float, Tuple[float, float]] = (3.05, 30.0),
+                 max_retries: int = 3, backoff_factor: float = 0.5, backoff_max: float = 30.0,
+                 pool_connections: int = 10, pool_maxsize: int = 10):
         """
         Initialize Grafana client.
         
@@ -19,13 +107,28 @@ class GrafanaClient:
             api_key: API key for authentication (preferred)
             username: Username for basic auth (if no API key)
             password: Password for basic auth (if no API key)
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+            max_retries: Retries for throttled (429), transient 5xx and connection failures
+            backoff_factor: Base delay for exponential backoff between retries
+            backoff_max: Maximum delay between retries
+            pool_connections: Number of connection pools to cache
+            pool_maxsize: Maximum keep-alive connections per pool (set to at least
+                the number of threads sharing this client)
         """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.username = username
         self.password = password
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.stats = RequestStats()
         
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         if api_key:
             self.session.headers.update({
                 'Authorization': f'Bearer {api_key}',
@@ -38,14 +141,58 @@ class GrafanaClient:
             raise ValueError("Either api_key or username/password must be provided")
     
     def _request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
-        """Make a request to the Grafana API."""
+        """
+        Make a request to the Grafana API.
+        
+        Throttled (429) responses are retried for every method; 5xx responses and
+        connection failures only for idempotent methods. Waits honor Retry-After.
+        """
         url = urljoin(self.base_url, endpoint)
-        response = self.session.request(method, url, **kwargs)
-        response.raise_for_status()
+        kwargs.setdefault('timeout', self.timeout)
+        method = method.upper()
+        name = _endpoint_name(method, endpoint)
+        with span(f"grafana {name}", {"http.request.method": method, "url.full": url}) as current:
+            response = self._send(method, url, name, kwargs)
+            current.set_attribute("http.response.status_code", response.status_code)
+            return response
+    
+    def _send(self, method: str, url: str, name: str, kwargs: Dict[str, Any]) -> requests.Response:
+        """Send a request, retrying as described in ``_request``."""
+        start = time.perf_counter()
+        attempt = 0
+        
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries or method not in IDEMPOTENT_METHODS:
+                    self.stats.record(name, time.perf_counter() - start, error=True,
+                                      retries=attempt)
+                    raise
+                delay = retry_delay(attempt, self.backoff_factor, self.backoff_max)
+            else:
+                if not _is_retryable(method, response.status_code) or attempt >= self.max_retries:
+                    break
+                delay = retry_delay(attempt, self.backoff_factor, self.backoff_max,
+                                    response.headers.get('Retry-After'))
+            attempt += 1
+            time.sleep(delay)
+        
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            self.stats.record(name, time.perf_counter() - start, error=True, retries=attempt)
+            raise
+        self.stats.record(name, time.perf_counter() - start, retries=attempt)
         return response
     
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+    
     def create_dashboard(self, dashboard: Dict[str, Any], folder_id: int = 0, 
-                        overwrite: bool = False) -> Dict[str, Any]:
+                        overwrite: bool = False,
+                        folder_uid: Optional[str] = None) -> Dict[str, Any]:
         """
         Create or update a dashboard in Grafana.
         
@@ -53,17 +200,14 @@ class GrafanaClient:
             dashboard: Dashboard JSON object
             folder_id: Folder ID to place dashboard in (0 for General)
             overwrite: Whether to overwrite if dashboard exists
+            folder_uid: Folder UID to place dashboard in (overrides folder_id)
         
         Returns:
             Dashboard creation response
         """
-        payload = {
-            "dashboard": dashboard,
-            "folderId": folder_id,
-            "overwrite": overwrite
-        }
+        payload = _dashboard_payload(dashboard, folder_id, overwrite, folder_uid)
         response = self._request('POST', '/api/dashboards/db', json=payload)
-        return response.json()
+        return cast(Dict[str, Any], response.json())
     
     def get_dashboard(self, uid: str) -> Dict[str, Any]:
         """
@@ -76,12 +220,30 @@ class GrafanaClient:
             Dashboard JSON object
         """
         response = self._request('GET', f'/api/dashboards/uid/{uid}')
+        return cast(Dict[str, Any], response.json())
+    
+    def get_dashboard_versions(self, uid: str, limit: int = 1) -> Any:
+        """
+        Get the saved versions of a dashboard, newest first.
+        
+        Args:
+            uid: Dashboard UID
+            limit: Maximum number of versions
+        
+        Returns:
+            List of version metadata (Grafana 11+ wraps it as ``{"versions": [...]}``)
+        """
+        response = self._request('GET', f'/api/dashboards/uid/{uid}/versions',
+                                 params={"limit": limit})
         return response.json()
     
     def search_dashboards(self, query: str = "", tag: str = "", limit: int = 100) -> List[Dict[str, Any]]:
         """
         Search for dashboards.
         
+        Returns a single page of at most ``limit`` results; use ``iter_dashboards``
+        to page through all matches.
+        
         Args:
             query: Search query
             tag: Filter by tag
@@ -96,7 +258,7 @@ class GrafanaClient:
             "limit": limit
         }
         response = self._request('GET', '/api/search', params=params)
-        return response.json()
+        return cast(List[Dict[str, Any]], response.json())
     
     def delete_dashboard(self, uid: str) -> None:
         """
@@ -106,4 +268,297 @@ class GrafanaClient:
             uid: Dashboard UID
         """
         self._request('DELETE', f'/api/dashboards/uid/{uid}')
+    
+    def search_page(self, page: int, query: str = "", tag: str = "",
+                    dashboard_type: Optional[str] = "dash-db",
+                    folder_ids: Optional[Sequence[int]] = None,
+                    page_size: int = 100) -> List[Dict[str, Any]]:
+        """
+        Fetch one page of search results.
+        
+        Args:
+            page: Page number, starting at 1
+            query: Search query
+            tag: Filter by tag
+            dashboard_type: 'dash-db', 'dash-folder', or None for both
+            folder_ids: Only return results in these folders
+            page_size: Results per page
+        
+        Returns:
+            List of dashboard metadata
+        """
+        params = _search_params(query, tag, dashboard_type, folder_ids, page_size, page)
+        response = self._request('GET', '/api/search', params=params)
+        return cast(List[Dict[str, Any]], response.json())
+    
+    def iter_dashboards(self, query: str = "", tag: str = "",
+                        dashboard_type: Optional[str] = "dash-db",
+                        folder_ids: Optional[Sequence[int]] = None,
+                        page_size: int = 100, prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all matching dashboards, one page of search results at a time.
+        
+        Unlike ``search_dashboards``, results are not capped at a single page and
+        only one page is held in memory at a time.
+        
+        Args:
+            query: Search query
+            tag: Filter by tag
+            dashboard_type: 'dash-db', 'dash-folder', or None for both
+            folder_ids: Only return results in these folders
+            page_size: Results per page request
+            prefetch: Fetch the next page in the background while the current one is consumed
+        
+        Yields:
+            Dashboard metadata
+        """
+        def fetch(page: int) -> List[Dict[str, Any]]:
+            return self.search_page(page, query, tag, dashboard_type, folder_ids, page_size)
+        
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        page = 1
+        pending = None
+        try:
+            results = fetch(page)
+            while True:
+                more = len(results) >= page_size
+                if more and executor is not None:
+                    pending = executor.submit(fetch, page + 1)
+                for item in results:
+                    yield item
+                if not more:
+                    return
+                page += 1
+                if pending is not None:
+                    results, pending = pending.result(), None
+                else:
+                    results = fetch(page)
+        finally:
+            if pending is not None:
+                pending.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
 
+class AsyncGrafanaClient:
+    """Asynchronous client for the Grafana API with concurrent bulk operations."""
+    
+    def __init__(self, base_url: str, api_key: Optional[str] = None, username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 timeout: Union[float, Tuple[float, float]] = (3.05, 30.0),
+                 max_retries: int = 3, backoff_factor: float = 0.5, backoff_max: float = 30.0,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 concurrency: int = 10, transport: Any = None):
+        """
+        Initialize async Grafana client.
+        
+        Args:
+            base_url: Base URL of Grafana instance (e.g., 'http://localhost:3000')
+            api_key: API key for authentication (preferred)
+            username: Username for basic auth (if no API key)
+            password: Password for basic auth (if no API key)
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+            max_retries: Retries for throttled (429), transient 5xx and connection failures
+            backoff_factor: Base delay for exponential backoff between retries
+            backoff_max: Maximum delay between retries
+            max_connections: Maximum open connections
+            max_keepalive_connections: Maximum idle keep-alive connections
+            concurrency: Default number of requests in flight for bulk helpers
+            transport: Optional httpx transport (e.g. for testing)
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx package is required. Install with: pip install httpx")
+        
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.username = username
+        self.password = password
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.concurrency = concurrency
+        self.stats = RequestStats()
+        
+        headers = {'Content-Type': 'application/json'}
+        auth = None
+        if api_key:
+            headers['Authorization'] = f'Bearer {api_key}'
+        elif username and password:
+            auth = (username, password)
+        else:
+            raise ValueError("Either api_key or username/password must be provided")
+        
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            httpx_timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        else:
+            httpx_timeout = httpx.Timeout(timeout)
+        
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            auth=auth,
+            timeout=httpx_timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+            transport=transport,
+        )
+    
+    async def __aenter__(self) -> "AsyncGrafanaClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self.client.aclose()
+    
+    async def _request(self, method: str, endpoint: str, **kwargs):
+        """Make a request to the Grafana API, retrying like ``GrafanaClient._request``."""
+        method = method.upper()
+        name = _endpoint_name(method, endpoint)
+        start = time.perf_counter()
+        attempt = 0
+        
+        while True:
+            try:
+                response = await self.client.request(method, endpoint, **kwargs)
+            except self._httpx.TransportError:
+                if attempt >= self.max_retries or method not in IDEMPOTENT_METHODS:
+                    self.stats.record(name, time.perf_counter() - start, error=True,
+                                      retries=attempt)
+                    raise
+                delay = retry_delay(attempt, self.backoff_factor, self.backoff_max)
+            else:
+                if not _is_retryable(method, response.status_code) or attempt >= self.max_retries:
+                    break
+                delay = retry_delay(attempt, self.backoff_factor, self.backoff_max,
+                                    response.headers.get('Retry-After'))
+            attempt += 1
+            await asyncio.sleep(delay)
+        
+        try:
+            response.raise_for_status()
+        except self._httpx.HTTPStatusError:
+            self.stats.record(name, time.perf_counter() - start, error=True, retries=attempt)
+            raise
+        self.stats.record(name, time.perf_counter() - start, retries=attempt)
+        return response
+    
+    async def create_dashboard(self, dashboard: Dict[str, Any], folder_id: int = 0,
+                               overwrite: bool = False,
+                               folder_uid: Optional[str] = None) -> Dict[str, Any]:
+        """Create or update a dashboard in Grafana."""
+        payload = _dashboard_payload(dashboard, folder_id, overwrite, folder_uid)
+        response = await self._request('POST', '/api/dashboards/db', json=payload)
+        return cast(Dict[str, Any], response.json())
+    
+    async def get_dashboard(self, uid: str) -> Dict[str, Any]:
+        """Get a dashboard by UID."""
+        response = await self._request('GET', f'/api/dashboards/uid/{uid}')
+        return cast(Dict[str, Any], response.json())
+    
+    async def search_dashboards(self, query: str = "", tag: str = "",
+                                limit: int = 100) -> List[Dict[str, Any]]:
+        """Search for dashboards."""
+        params = {
+            "query": query,
+            "tag": tag,
+            "limit": limit
+        }
+        response = await self._request('GET', '/api/search', params=params)
+        return cast(List[Dict[str, Any]], response.json())
+    
+    async def delete_dashboard(self, uid: str) -> None:
+        """Delete a dashboard by UID."""
+        await self._request('DELETE', f'/api/dashboards/uid/{uid}')
+    
+    async def get_dashboards(self, uids: List[str], concurrency: Optional[int] = None,
+                             return_exceptions: bool = False) -> List[Any]:
+        """
+        Fetch many dashboards concurrently.
+        
+        Args:
+            uids: Dashboard UIDs
+            concurrency: Maximum requests in flight (defaults to the client's)
+            return_exceptions: Return failures in place instead of raising the first one
+        
+        Returns:
+            Dashboard responses (or exceptions) in the order of ``uids``
+        """
+        return await gather_bounded(
+            [self.get_dashboard(uid) for uid in uids],
+            concurrency or self.concurrency, return_exceptions
+        )
+    
+    async def create_dashboards(self, dashboards: List[Dict[str, Any]], folder_id: int = 0,
+                                overwrite: bool = False, concurrency: Optional[int] = None,
+                                return_exceptions: bool = False) -> List[Any]:
+        """
+        Create or update many dashboards concurrently.
+        
+        Args:
+            dashboards: Dashboard JSON objects
+            folder_id: Folder ID to place dashboards in (0 for General)
+            overwrite: Whether to overwrite existing dashboards
+            concurrency: Maximum requests in flight (defaults to the client's)
+            return_exceptions: Return failures in place instead of raising the first one
+        
+        Returns:
+            Creation responses (or exceptions) in input order
+        """
+        return await gather_bounded(
+            [self.create_dashboard(dashboard, folder_id, overwrite) for dashboard in dashboards],
+            concurrency or self.concurrency, return_exceptions
+        )
+    
+    async def delete_dashboards(self, uids: List[str], concurrency: Optional[int] = None,
+                                return_exceptions: bool = False) -> List[Any]:
+        """Delete many dashboards concurrently."""
+        return await gather_bounded(
+            [self.delete_dashboard(uid) for uid in uids],
+            concurrency or self.concurrency, return_exceptions
+        )
+    
+    async def search_page(self, page: int, query: str = "", tag: str = "",
+                          dashboard_type: Optional[str] = "dash-db",
+                          folder_ids: Optional[Sequence[int]] = None,
+                          page_size: int = 100) -> List[Dict[str, Any]]:
+        """Fetch one page of search results (see ``GrafanaClient.search_page``)."""
+        params = _search_params(query, tag, dashboard_type, folder_ids, page_size, page)
+        response = await self._request('GET', '/api/search', params=params)
+        return cast(List[Dict[str, Any]], response.json())
+    
+    async def iter_dashboards(self, query: str = "", tag: str = "",
+                              dashboard_type: Optional[str] = "dash-db",
+                              folder_ids: Optional[Sequence[int]] = None,
+                              page_size: int = 100,
+                              prefetch: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all matching dashboards (see ``GrafanaClient.iter_dashboards``)."""
+        def fetch(page: int):
+            return self.search_page(page, query, tag, dashboard_type, folder_ids, page_size)
+        
+        page = 1
+        pending = None
+        try:
+            results = await fetch(page)
+            while True:
+                more = len(results) >= page_size
+                if more and prefetch:
+                    pending = asyncio.ensure_future(fetch(page + 1))
+                for item in results:
+                    yield item
+                if not more:
+                    return
+                page += 1
+                if pending is not None:
+                    results, pending = await pending, None
+                else:
+                    results = await fetch(page)
+        finally:
+            if pending is not None:
+                pending.cancel()
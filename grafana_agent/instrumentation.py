@@ -0,0 +1,363 @@
+"""Per-call token, latency and cost instrumentation for LLM clients."""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, List, Callable, Iterable, Iterator, NamedTuple, Tuple
+from .llm_client import LLMClient, TokenUsage, current_llm_task, track_call_usage
+from .stats import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPrice(NamedTuple):
+    """Prices in USD per million tokens."""
+
+    input: float
+    output: float
+    cached_input: float
+    cache_write: float
+
+
+# List prices, matched by longest model-name prefix; pass ``prices`` to override
+MODEL_PRICES: Dict[str, ModelPrice] = {
+    "gpt-4o-mini": ModelPrice(0.15, 0.60, 0.075, 0.15),
+    "gpt-4o": ModelPrice(2.50, 10.00, 1.25, 2.50),
+    "gpt-4-turbo": ModelPrice(10.00, 30.00, 10.00, 10.00),
+    "gpt-4": ModelPrice(30.00, 60.00, 30.00, 30.00),
+    "gpt-3.5-turbo": ModelPrice(0.50, 1.50, 0.50, 0.50),
+    "claude-3-opus": ModelPrice(15.00, 75.00, 1.50, 18.75),
+    "claude-3-5-sonnet": ModelPrice(3.00, 15.00, 0.30, 3.75),
+    "claude-3-sonnet": ModelPrice(3.00, 15.00, 0.30, 3.75),
+    "claude-3-5-haiku": ModelPrice(0.80, 4.00, 0.08, 1.00),
+    "claude-3-haiku": ModelPrice(0.25, 1.25, 0.03, 0.30),
+    "fake": ModelPrice(0.0, 0.0, 0.0, 0.0),
+}
+
+
+def estimate_cost(model: str, usage: TokenUsage,
+                  prices: Optional[Dict[str, ModelPrice]] = None) -> Optional[float]:
+    """
+    Estimate the cost of token usage in USD.
+
+    Args:
+        model: Model name
+        usage: Token usage
+        prices: Price table (defaults to ``MODEL_PRICES``)
+
+    Returns:
+        Cost in USD, or None if the model has no known price
+    """
+    prices = MODEL_PRICES if prices is None else prices
+    matches = [name for name in prices if model.startswith(name)]
+    if not matches:
+        return None
+    price = prices[max(matches, key=len)]
+    fresh = usage.input_tokens - usage.cached_input_tokens - usage.cache_write_tokens
+    return (fresh * price.input + usage.cached_input_tokens * price.cached_input +
+            usage.cache_write_tokens * price.cache_write + usage.output_tokens * price.output) / 1e6
+
+
+@dataclass
+class LLMCallRecord:
+    """Measurements for one LLM call."""
+
+    provider: str
+    model: str
+    task: Optional[str]
+    stream: bool
+    started: float
+    latency: float
+    time_to_first_token: Optional[float] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0
+    retries: int = 0
+    cost: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call succeeded."""
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view of the record."""
+        return asdict(self)
+
+
+# Hooks are called with each finished call's record
+LLMCallHook = Callable[[LLMCallRecord], None]
+
+
+class InstrumentedLLMClient(LLMClient):
+    """
+    LLM client wrapper that measures every call and passes the record to hooks.
+
+    Records carry total latency, time to first token (streams only), the
+    token usage reported by the provider clients underneath (including
+    prompt-cache reads and writes), retries made by policy wrappers
+    underneath, and the estimated cost. Hook failures are logged, never raised.
+    """
+
+    def __init__(self, llm_client: LLMClient, hooks: Iterable[LLMCallHook] = (),
+                 prices: Optional[Dict[str, ModelPrice]] = None, provider: Optional[str] = None,
+                 model: Optional[str] = None):
+        """
+        Initialize instrumented client.
+
+        Args:
+            llm_client: Client to forward calls to
+            hooks: Callables receiving an ``LLMCallRecord`` per call
+            prices: Price table for cost estimates (defaults to ``MODEL_PRICES``)
+            provider: Provider label (defaults to the client's)
+            model: Model label (defaults to the client's)
+        """
+        self.llm_client = llm_client
+        self.hooks: List[LLMCallHook] = list(hooks)
+        self.prices = prices
+        self.provider = provider or str(getattr(llm_client, "provider", type(llm_client).__name__))
+        self.model = model or getattr(llm_client, "model", "") or ""
+
+    def _emit(self, stream: bool, started: float, start: float, first_token: Optional[float],
+              usage: TokenUsage, retries: int, error: Optional[Exception]) -> None:
+        record = LLMCallRecord(
+            provider=self.provider,
+            model=self.model,
+            task=current_llm_task(),
+            stream=stream,
+            started=started,
+            latency=time.monotonic() - start,
+            time_to_first_token=None if first_token is None else first_token - start,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cached_input_tokens=usage.cached_input_tokens,
+            cache_write_tokens=usage.cache_write_tokens,
+            retries=retries,
+            cost=estimate_cost(self.model, usage, self.prices) if usage.calls else None,
+            error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+        for hook in self.hooks:
+            try:
+                hook(record)
+            except Exception:
+                logger.warning("LLM call hook %r failed", hook, exc_info=True)
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Forward the call and record it."""
+        started, start = time.time(), time.monotonic()
+        error: Optional[Exception] = None
+        with track_call_usage() as scope:
+            try:
+                return self.llm_client.chat(messages, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self._emit(False, started, start, None, scope.usage, scope.retries, error)
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Forward the stream and record it once it ends (or the caller stops reading)."""
+        started, start = time.time(), time.monotonic()
+        first_token: Optional[float] = None
+        error: Optional[Exception] = None
+        with track_call_usage() as scope:
+            try:
+                for chunk in self.llm_client.stream_chat(messages, **kwargs):
+                    if first_token is None:
+                        first_token = time.monotonic()
+                    yield chunk
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self._emit(True, started, start, first_token, scope.usage, scope.retries, error)
+
+
+class CallStats:
+    """Hook aggregating calls, tokens, cost and latency per provider, model and task."""
+
+    def __init__(self) -> None:
+        self._totals: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record: LLMCallRecord) -> None:
+        key = (record.provider, record.model, record.task)
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = {
+                    "usage": TokenUsage(), "retries": 0, "cost": 0.0,
+                    "latency": LatencyTracker(), "time_to_first_token": LatencyTracker(),
+                }
+            totals["usage"] = totals["usage"] + TokenUsage(
+                record.input_tokens, record.output_tokens, record.cached_input_tokens,
+                record.cache_write_tokens, 1)
+            totals["retries"] += record.retries
+            totals["cost"] += record.cost or 0.0
+        totals["latency"].record(record.latency, error=not record.ok, retries=record.retries)
+        if record.time_to_first_token is not None:
+            totals["time_to_first_token"].record(record.time_to_first_token)
+
+    def total_cost(self) -> float:
+        """Estimated cost in USD of every recorded call."""
+        with self._lock:
+            return float(sum(totals["cost"] for totals in self._totals.values()))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per provider/model/task totals with latency percentiles."""
+        with self._lock:
+            items = list(self._totals.items())
+        return [
+            {
+                "provider": provider,
+                "model": model,
+                "task": task,
+                "usage": totals["usage"].to_dict(),
+                "retries": totals["retries"],
+                "cost": round(totals["cost"], 6),
+                "latency": totals["latency"].summary(),
+                "time_to_first_token": totals["time_to_first_token"].summary(),
+            }
+            for (provider, model, task), totals in items
+        ]
+
+
+class JSONLinesHook:
+    """Hook appending each call record to a JSON Lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record: LLMCallRecord) -> None:
+        line = json.dumps(record.to_dict())
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + "\n")
+
+
+# Histogram buckets (seconds) spanning cached replies to long generations
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+class PrometheusHook:
+    """Hook exporting call records as Prometheus metrics."""
+
+    def __init__(self, registry: Optional[Any] = None, namespace: str = "grafana_agent"):
+        """
+        Initialize Prometheus hook.
+
+        Args:
+            registry: ``prometheus_client`` registry (defaults to the global one)
+            namespace: Metric name prefix
+        """
+        try:
+            from prometheus_client import Counter, Histogram, REGISTRY
+        except ImportError:
+            raise ImportError("prometheus_client package is required. "
+                              "Install with: pip install prometheus-client")
+
+        self.registry = registry if registry is not None else REGISTRY
+        labels = ['provider', 'model', 'task']
+        self.requests = Counter(
+            f'{namespace}_llm_requests_total',
+            'Total number of LLM calls',
+            labels + ['status'],
+            registry=self.registry,
+        )
+        self.duration = Histogram(
+            f'{namespace}_llm_request_duration_seconds',
+            'LLM call duration in seconds, including retries',
+            labels,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.time_to_first_token = Histogram(
+            f'{namespace}_llm_time_to_first_token_seconds',
+            'Time until the first streamed token in seconds',
+            labels,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.tokens = Counter(
+            f'{namespace}_llm_tokens_total',
+            'LLM tokens by type (input includes cached_input and cache_write)',
+            labels + ['type'],
+            registry=self.registry,
+        )
+        self.retries = Counter(
+            f'{namespace}_llm_retries_total',
+            'LLM call retries',
+            labels,
+            registry=self.registry,
+        )
+        self.cost = Counter(
+            f'{namespace}_llm_cost_dollars_total',
+            'Estimated LLM cost in USD',
+            labels,
+            registry=self.registry,
+        )
+
+    def __call__(self, record: LLMCallRecord) -> None:
+        labels = (record.provider, record.model, record.task or "")
+        self.requests.labels(*labels, "ok" if record.ok else "error").inc()
+        self.duration.labels(*labels).observe(record.latency)
+        if record.time_to_first_token is not None:
+            self.time_to_first_token.labels(*labels).observe(record.time_to_first_token)
+        for kind, count in (("input", record.input_tokens), ("output", record.output_tokens),
+                            ("cached_input", record.cached_input_tokens),
+                            ("cache_write", record.cache_write_tokens)):
+            if count:
+                self.tokens.labels(*labels, kind).inc(count)
+        if record.retries:
+            self.retries.labels(*labels).inc(record.retries)
+        if record.cost:
+            self.cost.labels(*labels).inc(record.cost)
+
+
+class OpenTelemetryHook:
+    """Hook emitting each call record as an OpenTelemetry span under the current span."""
+
+    def __init__(self, tracer: Optional[Any] = None):
+        """
+        Initialize OpenTelemetry hook.
+
+        Args:
+            tracer: Tracer to create spans with (defaults to one from the global provider)
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("opentelemetry-api package is required. "
+                              "Install with: pip install opentelemetry-api")
+
+        self._trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer("grafana_agent")
+
+    def __call__(self, record: LLMCallRecord) -> None:
+        start_ns = int(record.started * 1e9)
+        attributes: Dict[str, Any] = {
+            "gen_ai.system": record.provider,
+            "gen_ai.request.model": record.model,
+            "gen_ai.usage.input_tokens": record.input_tokens,
+            "gen_ai.usage.output_tokens": record.output_tokens,
+            "llm.usage.cached_input_tokens": record.cached_input_tokens,
+            "llm.usage.cache_write_tokens": record.cache_write_tokens,
+            "llm.stream": record.stream,
+            "llm.retries": record.retries,
+        }
+        if record.task:
+            attributes["llm.task"] = record.task
+        if record.cost is not None:
+            attributes["llm.cost_usd"] = record.cost
+        span = self.tracer.start_span(f"llm {record.task or 'call'}", start_time=start_ns,
+                                      attributes=attributes)
+        if record.time_to_first_token is not None:
+            span.add_event("first_token",
+                           timestamp=start_ns + int(record.time_to_first_token * 1e9))
+        if not record.ok:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, record.error))
+        span.end(end_time=start_ns + int(record.latency * 1e9))
@@ -0,0 +1,277 @@
+"""Incremental JSON parsing for streamed LLM dashboard responses."""
+
+import bisect
+import json
+import re
+from typing import Optional, Dict, Any, List, Tuple
+
+
+# Characters that change parser state outside of strings
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+# Characters that end or escape a run of string content
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# How many safe points to try, newest first, when salvaging a truncated response
+_MAX_SALVAGE_ATTEMPTS = 64
+
+
+class _Frame:
+    """An open object or array on the parser stack."""
+
+    __slots__ = ("kind", "key", "expect_key", "is_panels")
+
+    def __init__(self, kind: str, is_panels: bool = False):
+        self.kind = kind
+        self.key: Optional[str] = None
+        self.expect_key = kind == "{"
+        self.is_panels = is_panels
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for a JSON object that arrives in chunks.
+
+    Feed response chunks as they stream in; every object that closes directly
+    inside a ``panels`` array is parsed and returned immediately, so callers can
+    use panels before the full dashboard has been generated. Text before the
+    first ``{`` (markdown fences, preamble) and after the closing ``}`` is ignored.
+
+    If the response ends early, ``result()`` salvages the longest valid prefix by
+    closing any open strings, arrays and objects.
+    """
+
+    def __init__(self, panel_key: str = "panels"):
+        """
+        Initialize parser.
+
+        Args:
+            panel_key: Key of the arrays whose object elements are emitted as they complete
+        """
+        self.panel_key = panel_key
+        self.salvaged = False
+        # Chunks are kept as received (joining them on every feed is quadratic);
+        # positions below are absolute offsets into their concatenation
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        self._pos = 0
+        self._started = False
+        self._complete = False
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._panel_start: Optional[int] = None
+        self._panel_depth = 0
+        self._safe_points: List[Tuple[int, str]] = []
+        self._panels: List[Dict[str, Any]] = []
+
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level object has been fully received."""
+        return self._complete
+
+    @property
+    def panels(self) -> List[Dict[str, Any]]:
+        """All panels emitted so far."""
+        return list(self._panels)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume a chunk of response text.
+
+        Args:
+            chunk: Next piece of the response
+
+        Returns:
+            Panels that were completed by this chunk
+        """
+        if self._complete or not chunk:
+            return []
+
+        if not self._started:
+            start = chunk.find("{")
+            if start == -1:
+                return []
+            chunk = chunk[start:]
+            self._started = True
+
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+        emitted: List[Dict[str, Any]] = []
+        self._scan(chunk, base, emitted)
+        self._panels.extend(emitted)
+        return emitted
+
+    def _slice(self, start: int, end: int) -> str:
+        """Text between two absolute positions, joined from the chunks that hold it."""
+        index = bisect.bisect_right(self._offsets, start) - 1
+        parts = []
+        while index < len(self._chunks) and self._offsets[index] < end:
+            offset = self._offsets[index]
+            parts.append(self._chunks[index][max(start - offset, 0):end - offset])
+            index += 1
+        return "".join(parts)
+
+    def _text(self) -> str:
+        """Everything received so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+            self._offsets = [0]
+        return self._chunks[0] if self._chunks else ""
+
+    def _closers(self) -> str:
+        """Closing characters for every open container, innermost first."""
+        return "".join(_CLOSERS[frame.kind] for frame in reversed(self._stack))
+
+    def _scan(self, buffer: str, base: int, emitted: List[Dict[str, Any]]) -> None:
+        """Advance the parser over ``buffer``, the chunk starting at absolute position ``base``."""
+        end = len(buffer)
+        pos = 0
+
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.start()
+                if buffer[pos] == "\\":
+                    self._escape = True
+                    pos += 1
+                    continue
+                self._in_string = False
+                self._end_string(base + pos)
+                pos += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = end
+                break
+            pos = match.start()
+            char = buffer[pos]
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = base + pos
+            elif char in "{[":
+                self._open(char, base + pos)
+            elif char in "}]":
+                self._close(base + pos, emitted)
+                if not self._stack:
+                    self._complete = True
+                    self._pos = base + pos + 1
+                    return
+            elif char == ",":
+                self._safe_points.append((base + pos, self._closers()))
+                if self._stack and self._stack[-1].kind == "{":
+                    self._stack[-1].expect_key = True
+            pos += 1
+
+        self._pos = base + pos
+
+    def _end_string(self, pos: int) -> None:
+        """Record object keys as their closing quote is reached."""
+        if self._stack:
+            frame = self._stack[-1]
+            if frame.kind == "{" and frame.expect_key:
+                frame.key = json.loads(self._slice(self._string_start, pos + 1))
+                frame.expect_key = False
+
+    def _open(self, char: str, pos: int) -> None:
+        parent = self._stack[-1] if self._stack else None
+        is_panels = (
+            char == "["
+            and parent is not None
+            and parent.kind == "{"
+            and parent.key == self.panel_key
+        )
+        self._stack.append(_Frame(char, is_panels))
+        if (char == "{" and self._panel_start is None
+                and parent is not None and parent.is_panels):
+            self._panel_start = pos
+            self._panel_depth = len(self._stack)
+        self._safe_points.append((pos + 1, self._closers()))
+
+    def _close(self, pos: int, emitted: List[Dict[str, Any]]) -> None:
+        if self._panel_start is not None and len(self._stack) == self._panel_depth:
+            try:
+                emitted.append(json.loads(self._slice(self._panel_start, pos + 1)))
+            except json.JSONDecodeError:
+                pass
+            self._panel_start = None
+        if self._stack:
+            self._stack.pop()
+        self._safe_points.append((pos + 1, self._closers()))
+
+    def _candidates(self):
+        """Yield repaired versions of the buffer, most complete first."""
+        buffer = self._text()
+        text = buffer[:self._pos]
+        closers = self._closers()
+        if self._in_string:
+            yield text + '"' + closers
+        yield text.rstrip().rstrip(",") + closers
+        for index, (pos, point_closers) in enumerate(reversed(self._safe_points)):
+            if index >= _MAX_SALVAGE_ATTEMPTS:
+                break
+            yield buffer[:pos] + point_closers
+
+    def result(self) -> Any:
+        """
+        Return the parsed JSON value.
+
+        Returns the complete object when the response was well formed, otherwise
+        the largest salvageable prefix (and sets ``salvaged``).
+
+        Raises:
+            ValueError: If no JSON object could be recovered
+        """
+        if not self._started:
+            raise ValueError("No JSON object found in response")
+
+        if self._complete:
+            try:
+                return json.loads(self._text()[:self._pos])
+            except json.JSONDecodeError as e:
+                raise ValueError(str(e))
+
+        for candidate in self._candidates():
+            try:
+                value = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            self.salvaged = True
+            return value
+
+        raise ValueError("Response was truncated and could not be repaired")
+
+
+def parse_json_response(text: str) -> Any:
+    """
+    Parse a complete LLM response that should contain a JSON object.
+
+    Tolerates markdown fences and surrounding prose, and salvages truncated
+    responses where possible.
+
+    Args:
+        text: Response text
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        ValueError: If no JSON object could be recovered
+    """
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.result()
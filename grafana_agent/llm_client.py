@@ -1,8 +1,25 @@
 """LLM client for conversational interactions."""
 
+import contextlib
+import contextvars
+import functools
+import queue
+import hashlib
+import heapq
+import itertools
+import json
 import os
-from typing import Optional, Dict, Any, List
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Union, Iterable, Iterator, Tuple, Mapping, Callable
 from abc import ABC, abstractmethod
+from .tokens import estimate_message_tokens
+from .stats import LatencyTracker, percentile
 
 
 class LLMClient(ABC):
@@ -12,10 +29,135 @@ class LLMClient(ABC):
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Send a chat message and get a response."""
         pass
+    
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """
+        Send a chat message and yield the response as it is generated.
+        
+        Clients without native streaming yield the full response as one chunk.
+        """
+        yield self.chat(messages, **kwargs)
+
+
+class AsyncLLMClient(ABC):
+    """Abstract base class for asynchronous LLM clients."""
+    
+    @abstractmethod
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Send a chat message and await the response."""
+        pass
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by a provider, summed over one or more calls."""
+    
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0
+    calls: int = 0
+    
+    @property
+    def uncached_input_tokens(self) -> int:
+        """Input tokens processed without a prompt-cache hit."""
+        return self.input_tokens - self.cached_input_tokens
+    
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of input tokens served from the provider's prompt cache."""
+        return self.cached_input_tokens / self.input_tokens if self.input_tokens else 0.0
+    
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(**{name: value + getattr(other, name)
+                             for name, value in asdict(self).items()})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Counts plus derived uncached tokens and cache hit rate."""
+        return dict(asdict(self), uncached_input_tokens=self.uncached_input_tokens,
+                    cache_hit_rate=round(self.cache_hit_rate, 4))
+
+
+def _count(value: Any) -> int:
+    # SDK usage fields are ints or None; anything else (e.g. a test double) counts as zero
+    return value if isinstance(value, int) else 0
 
 
-class OpenAIClient(LLMClient):
-    """OpenAI client implementation."""
+def _openai_usage(usage: Any) -> Optional[TokenUsage]:
+    """Usage from an OpenAI response (``prompt_tokens`` includes cached tokens)."""
+    if not isinstance(getattr(usage, "prompt_tokens", None), int):
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return TokenUsage(input_tokens=usage.prompt_tokens,
+                      output_tokens=_count(usage.completion_tokens),
+                      cached_input_tokens=_count(getattr(details, "cached_tokens", None)),
+                      calls=1)
+
+
+def _anthropic_usage(usage: Any) -> Optional[TokenUsage]:
+    """Usage from an Anthropic response (``input_tokens`` excludes cache reads and writes)."""
+    if not isinstance(getattr(usage, "input_tokens", None), int):
+        return None
+    cache_read = _count(getattr(usage, "cache_read_input_tokens", None))
+    cache_write = _count(getattr(usage, "cache_creation_input_tokens", None))
+    return TokenUsage(input_tokens=usage.input_tokens + cache_read + cache_write,
+                      output_tokens=_count(usage.output_tokens), cached_input_tokens=cache_read,
+                      cache_write_tokens=cache_write, calls=1)
+
+
+class _UsageMixin:
+    """Token usage accounting for provider clients."""
+    
+    def _init_usage(self) -> None:
+        self.usage = TokenUsage()
+        self.last_usage: Optional[TokenUsage] = None
+        self._usage_lock = threading.Lock()
+    
+    def _record_usage(self, usage: Optional[TokenUsage]) -> None:
+        if usage is None:
+            return
+        with self._usage_lock:
+            self.usage = self.usage + usage
+            self.last_usage = usage
+        scope = _call_usage.get()
+        if scope is not None:
+            scope.add(usage)
+
+
+def _anthropic_request(messages: List[Dict[str, str]], kwargs: Dict[str, Any],
+                       prompt_cache: bool = False) -> Dict[str, Any]:
+    """
+    Build keyword arguments for the Anthropic Messages API.
+    
+    Anthropic takes the system prompt as a top-level parameter rather than as a
+    message, and requires ``max_tokens`` on every request. With ``prompt_cache``,
+    each system message becomes its own block and the first one (the fixed
+    system prompt; later ones such as a conversation summary change between
+    calls) gets a cache breakpoint, so repeated calls read it from the cache.
+    """
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    request = dict(kwargs)
+    request["messages"] = [m for m in messages if m["role"] != "system"]
+    if system and prompt_cache:
+        blocks: List[Dict[str, Any]] = [{"type": "text", "text": text} for text in system]
+        blocks[0]["cache_control"] = {"type": "ephemeral"}
+        request.setdefault("system", blocks)
+    elif system:
+        request.setdefault("system", "\n\n".join(system))
+    request.setdefault("max_tokens", 4096)
+    return request
+
+
+class OpenAIClient(_UsageMixin, LLMClient):
+    """
+    OpenAI client implementation.
+    
+    OpenAI caches prompt prefixes automatically, so callers keep fixed content
+    (the system prompt) first and byte-identical between calls. ``usage`` and
+    ``last_usage`` report how many input tokens were served from that cache.
+    """
+    
+    provider = "openai"
     
     def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4"):
         try:
@@ -24,6 +166,7 @@ class OpenAIClient(LLMClient):
             self.model = model
         except ImportError:
             raise ImportError("openai package is required. Install with: pip install openai")
+        self._init_usage()
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Send a chat message and get a response."""
@@ -32,28 +175,1282 @@ class OpenAIClient(LLMClient):
             messages=messages,
             **kwargs
         )
-        return response.choices[0].message.content
+        self._record_usage(_openai_usage(getattr(response, "usage", None)))
+        return response.choices[0].message.content or ""
+    
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Send a chat message and yield response tokens as they arrive."""
+        kwargs.setdefault("stream_options", {"include_usage": True})
+        stream: Iterable[Any] = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **kwargs
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # The final chunk (with no choices) carries the usage
+            self._record_usage(_openai_usage(getattr(chunk, "usage", None)))
 
 
-class AnthropicClient(LLMClient):
-    """Anthropic Claude client implementation."""
+class AnthropicClient(_UsageMixin, LLMClient):
+    """
+    Anthropic Claude client implementation.
+    
+    With ``prompt_cache`` (the default) the system prompt carries a cache
+    breakpoint; ``usage`` and ``last_usage`` report cache reads and writes.
+    """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "claude-3-sonnet-20240229"):
+    provider = "anthropic"
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "claude-3-sonnet-20240229",
+                 prompt_cache: bool = True):
         try:
             import anthropic
             self.client = anthropic.Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
             self.model = model
         except ImportError:
             raise ImportError("anthropic package is required. Install with: pip install anthropic")
+        self.prompt_cache = prompt_cache
+        self._init_usage()
     
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Send a chat message and get a response."""
         response = self.client.messages.create(
+            model=self.model,
+            **_anthropic_request(messages, kwargs, self.prompt_cache)
+        )
+        self._record_usage(_anthropic_usage(getattr(response, "usage", None)))
+        return str(response.content[0].text)
+    
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Send a chat message and yield response tokens as they arrive."""
+        with self.client.messages.stream(
+            model=self.model,
+            **_anthropic_request(messages, kwargs, self.prompt_cache)
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+            self._record_usage(_anthropic_usage(getattr(stream.get_final_message(), "usage", None)))
+
+
+class AsyncOpenAIClient(_UsageMixin, AsyncLLMClient):
+    """OpenAI client implementation backed by the async SDK client."""
+    
+    provider = "openai"
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4"):
+        try:
+            import openai
+            self.client = openai.AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+            self.model = model
+        except ImportError:
+            raise ImportError("openai package is required. Install with: pip install openai")
+        self._init_usage()
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Send a chat message and await the response."""
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             **kwargs
         )
-        return response.content[0].text
+        self._record_usage(_openai_usage(getattr(response, "usage", None)))
+        return response.choices[0].message.content or ""
+
+
+class AsyncAnthropicClient(_UsageMixin, AsyncLLMClient):
+    """Anthropic Claude client implementation backed by the async SDK client."""
+    
+    provider = "anthropic"
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "claude-3-sonnet-20240229",
+                 prompt_cache: bool = True):
+        try:
+            import anthropic
+            self.client = anthropic.AsyncAnthropic(
+                api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+            self.model = model
+        except ImportError:
+            raise ImportError("anthropic package is required. Install with: pip install anthropic")
+        self.prompt_cache = prompt_cache
+        self._init_usage()
+    
+    async def achat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Send a chat message and await the response."""
+        response = await self.client.messages.create(
+            model=self.model,
+            **_anthropic_request(messages, kwargs, self.prompt_cache)
+        )
+        self._record_usage(_anthropic_usage(getattr(response, "usage", None)))
+        return str(response.content[0].text)
+
+
+class FakeLLMClient(_UsageMixin, LLMClient):
+    """
+    Offline LLM client that replays canned responses, for tests and benchmarks.
+    
+    Responses come from ``responses`` (or a JSON list / JSONL file), cycled in
+    order. Without recorded responses, dashboard requests get a small valid
+    dashboard built from the request and everything else gets a short summary,
+    both derived deterministically from the prompt. Latency, generation speed
+    and failures are simulated; failures are drawn from a seeded RNG so runs
+    are reproducible. Token usage is estimated, with the leading system prompt
+    counted as a prompt-cache hit once it has been sent before.
+    """
+    
+    provider = "fake"
+    
+    FAILURE_MODES = ("error", "timeout", "truncate", "empty")
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "fake",
+                 responses: Optional[List[str]] = None, responses_file: Optional[str] = None,
+                 latency: float = 0.0, tokens_per_second: Optional[float] = None,
+                 failure_rate: float = 0.0, failure_mode: str = "error", seed: Optional[int] = 0):
+        """
+        Initialize fake client.
+        
+        Args:
+            api_key: Ignored (accepted for factory compatibility)
+            model: Model name reported in cache keys and metrics
+            responses: Responses to replay in order (cycled)
+            responses_file: JSON list or JSONL file of responses to replay
+            latency: Delay before the first token, in seconds
+            tokens_per_second: Simulated generation speed (None for instant)
+            failure_rate: Fraction of calls that fail
+            failure_mode: 'error' (RuntimeError), 'timeout' (TimeoutError),
+                'truncate' (half the response) or 'empty' (empty response)
+            seed: Seed for failure injection
+        """
+        if failure_mode not in self.FAILURE_MODES:
+            raise ValueError(f"Unsupported failure mode: {failure_mode}. "
+                             f"Supported: {', '.join(self.FAILURE_MODES)}")
+        if responses_file:
+            with open(responses_file, 'r') as f:
+                content = f.read()
+            if responses_file.endswith('.jsonl'):
+                responses = [json.loads(line) for line in content.splitlines() if line.strip()]
+            else:
+                responses = json.loads(content)
+        self.model = model
+        self.responses = list(responses or [])
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.calls: List[List[Dict[str, str]]] = []
+        self._random = random.Random(seed)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._cached_prefixes: set = set()
+        self._init_usage()
+    
+    def _respond(self, messages: List[Dict[str, str]]) -> Tuple[str, Optional[str]]:
+        """Pick the response for a call and whether (and how) it fails."""
+        prefix = messages[:1] if messages and messages[0]["role"] == "system" else []
+        with self._lock:
+            index = next(self._counter)
+            self.calls.append(messages)
+            failure = self.failure_mode if self._random.random() < self.failure_rate else None
+            cached = bool(prefix) and prefix[0]["content"] in self._cached_prefixes
+            if prefix:
+                self._cached_prefixes.add(prefix[0]["content"])
+        if self.responses:
+            response = self.responses[index % len(self.responses)]
+        else:
+            response = _fake_response(messages)
+        if failure == "truncate":
+            response = response[:len(response) // 2]
+        elif failure == "empty":
+            response = ""
+        prefix_tokens = estimate_message_tokens(prefix)
+        self._record_usage(TokenUsage(
+            input_tokens=estimate_message_tokens(messages),
+            output_tokens=len(self._chunks(response)),
+            cached_input_tokens=prefix_tokens if cached else 0,
+            cache_write_tokens=0 if cached else prefix_tokens,
+            calls=1,
+        ))
+        return response, failure
+    
+    def _chunks(self, text: str) -> List[str]:
+        # About one token per four characters, like tokens.estimate_tokens
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+    
+    def _raise_failure(self, failure: Optional[str]) -> None:
+        if failure == "error":
+            raise RuntimeError("Simulated LLM failure")
+        if failure == "timeout":
+            raise TimeoutError("Simulated LLM timeout")
+    
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Return the next canned response after the simulated delay."""
+        response, failure = self._respond(messages)
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += len(self._chunks(response)) / self.tokens_per_second
+        if delay:
+            time.sleep(delay)
+        self._raise_failure(failure)
+        return response
+    
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Yield the next canned response a few characters at a time."""
+        response, failure = self._respond(messages)
+        if self.latency:
+            time.sleep(self.latency)
+        self._raise_failure(failure)
+        for chunk in self._chunks(response):
+            if self.tokens_per_second:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield chunk
+
+
+def _fake_response(messages: List[Dict[str, str]]) -> str:
+    """Deterministic response for a prompt: a dashboard for create requests, otherwise a summary."""
+    prompt = messages[-1]["content"] if messages else ""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    if prompt.startswith("Create a Grafana dashboard for:"):
+        lines = prompt.split("\n")
+        request = lines[0][len("Create a Grafana dashboard for:"):].strip()
+        title = next((line[len("Title:"):].strip() for line in lines
+                      if line.startswith("Title:")), None)
+        panels = [
+            {
+                "id": i + 1,
+                "type": panel_type,
+                "title": f"{request[:40]} {metric}",
+                "gridPos": {"h": 8, "w": 12, "x": 12 * (i % 2), "y": 8 * (i // 2)},
+                "targets": [{"refId": "A",
+                             "expr": f"rate({metric}_total{{job=\"{digest[:8]}\"}}[5m])"}],
+            }
+            for i, (panel_type, metric) in enumerate(
+                [("timeseries", "requests"), ("timeseries", "errors"), ("stat", "latency"),
+                 ("gauge", "saturation")]
+            )
+        ]
+        return json.dumps({"dashboard": {"title": title or request[:60] or "Fake dashboard",
+                                         "uid": digest[:9], "tags": ["fake"], "panels": panels}})
+    return (f"This dashboard ({digest[:8]}) tracks request rate, error rate, latency and "
+            "saturation. "
+            "Panels are grouped by service and use Prometheus queries over five-minute windows. "
+            "It is suited to on-call triage and capacity reviews.")
+
+
+async def chat_async(client: Union[LLMClient, AsyncLLMClient],
+                     messages: List[Dict[str, str]], **kwargs) -> str:
+    """
+    Send a chat message through any client without blocking the event loop.
+    
+    Async clients are awaited directly; synchronous clients run in the loop's
+    default executor (in a copy of the caller's context, so ``llm_task`` and
+    ``llm_priority`` carry over) so several calls can still be in flight at once.
+    
+    Args:
+        client: Synchronous or asynchronous LLM client
+        messages: Chat messages
+        **kwargs: Extra provider arguments (e.g. temperature)
+    
+    Returns:
+        Response text
+    """
+    if isinstance(client, AsyncLLMClient):
+        return await client.achat(messages, **kwargs)
+    import asyncio  # deferred: only async callers pay for it, and they have it loaded already
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, client.chat, messages, **kwargs)
+    return await loop.run_in_executor(None, call)
+
+
+def sync_client(client: Union[LLMClient, AsyncLLMClient]) -> LLMClient:
+    """
+    Return ``client`` for a blocking call, rejecting asynchronous clients.
+
+    Raises:
+        TypeError: If ``client`` is an ``AsyncLLMClient`` (use ``chat_async`` instead)
+    """
+    if isinstance(client, AsyncLLMClient):
+        raise TypeError(f"{type(client).__name__} is asynchronous; use the async methods instead")
+    return client
+
+
+# Tasks that callers tag their LLM calls with, for per-task routing and metrics
+TASK_CHAT = "chat"
+TASK_CREATE_DASHBOARD = "create_dashboard"
+TASK_SUMMARIZE = "summarize"
+
+_task: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("llm_task", default=None)
+
+
+@contextlib.contextmanager
+def llm_task(task: str) -> Iterator[None]:
+    """Tag LLM calls made inside the block as part of ``task`` (e.g. ``TASK_CHAT``)."""
+    token = _task.set(task)
+    try:
+        yield
+    finally:
+        _task.reset(token)
+
+
+def current_llm_task() -> Optional[str]:
+    """The task set by the innermost ``llm_task`` block, if any."""
+    return _task.get()
+
+
+# Scheduling priorities (lower runs first): people waiting on a reply go ahead of bulk jobs
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+_priority: "contextvars.ContextVar[int]" = contextvars.ContextVar(
+    "llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """
+    Schedule LLM calls made inside the block at ``priority``.
+
+    ``RateLimitedLLMClient`` uses it when the client has no fixed priority.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class CallUsage:
+    """Token usage and retries accumulated while one tracked call runs."""
+
+    def __init__(self) -> None:
+        self.usage = TokenUsage()
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add(self, usage: TokenUsage, retries: int = 0) -> None:
+        """Count provider usage (and retries) toward the call."""
+        with self._lock:
+            self.usage = self.usage + usage
+            self.retries += retries
+
+
+_call_usage: "contextvars.ContextVar[Optional[CallUsage]]" = contextvars.ContextVar(
+    "llm_call_usage", default=None)
+
+
+@contextlib.contextmanager
+def track_call_usage() -> Iterator[CallUsage]:
+    """
+    Collect the usage provider clients report, and the retries wrappers make, inside the block.
+
+    The context variable follows calls onto the worker threads of
+    ``ResilientLLMClient``; a nested block's totals also count toward the
+    enclosing one.
+    """
+    parent = _call_usage.get()
+    scope = CallUsage()
+    token = _call_usage.set(scope)
+    try:
+        yield scope
+    finally:
+        _call_usage.reset(token)
+        if parent is not None:
+            parent.add(scope.usage, scope.retries)
+
+
+def _note_retry() -> None:
+    scope = _call_usage.get()
+    if scope is not None:
+        scope.add(TokenUsage(), retries=1)
+
+
+class TokenBucket:
+    """
+    Token bucket holding up to one minute of quota, refilled continuously.
+
+    Not thread-safe on its own; ``RateLimitScheduler`` guards it with its lock.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize bucket (full).
+
+        Args:
+            per_minute: Quota per minute (requests or tokens)
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` is available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) * 60.0 / self.capacity
+
+    def take(self, amount: float, now: float) -> None:
+        """Consume quota (the level may go negative for oversized requests)."""
+        self._refill(now)
+        self.level -= amount
+
+    def set_limit(self, per_minute: float, now: float) -> None:
+        """Change the quota, e.g. to the limit a provider reports."""
+        self._refill(now)
+        self.capacity = float(per_minute)
+        self.level = min(self.level, self.capacity)
+
+    def set_remaining(self, remaining: float, now: float) -> None:
+        """Lower the level to what the provider reports as remaining."""
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse a reset value: seconds, OpenAI's '1m30s'/'250ms' form or an RFC 3339 time."""
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(reset.timestamp() - time.time(), 0.0)
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> Dict[str, float]:
+    """
+    Extract quota information from OpenAI or Anthropic rate-limit headers.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Any of ``limit_requests``, ``limit_tokens``, ``remaining_requests``,
+        ``remaining_tokens``, ``reset_requests``, ``reset_tokens`` (seconds) and
+        ``retry_after`` (seconds) that were present
+    """
+    lower = {k.lower(): v for k, v in headers.items()}
+    names = {
+        "limit_requests": ("x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit"),
+        "limit_tokens": ("x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit"),
+        "remaining_requests": ("x-ratelimit-remaining-requests",
+                               "anthropic-ratelimit-requests-remaining"),
+        "remaining_tokens": ("x-ratelimit-remaining-tokens",
+                             "anthropic-ratelimit-tokens-remaining"),
+        "reset_requests": ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset"),
+        "reset_tokens": ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset"),
+        "retry_after": ("retry-after",),
+    }
+    parsed: Dict[str, float] = {}
+    for key, candidates in names.items():
+        value = next((lower[name] for name in candidates if name in lower), None)
+        if value is None:
+            continue
+        if key.startswith(("reset", "retry")):
+            seconds = _parse_duration(value)
+            if seconds is not None:
+                parsed[key] = seconds
+        else:
+            try:
+                parsed[key] = float(value)
+            except ValueError:
+                pass
+    return parsed
+
+
+class _Quota:
+    """Buckets, waiters and counters for one provider/model."""
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float]):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+        self.granted = 0
+        self.waited = 0
+        self.wait_time = 0.0
+        self.throttled = 0
+
+    def wait_time_for(self, tokens: float, now: float) -> float:
+        wait = self.blocked_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(wait, 0.0)
+
+
+class RateLimitScheduler:
+    """
+    Shared request and token quotas per provider/model, with a priority queue.
+
+    Each provider/model has a requests-per-minute and a tokens-per-minute
+    token bucket. Callers ``acquire`` before sending a request; they are
+    admitted in priority order (FIFO within a priority) once both buckets can
+    cover the request, so a backlog of batch jobs cannot starve interactive
+    chat. Quotas follow what the provider reports in rate-limit headers, and a
+    429 pauses the provider/model until its reset time.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None):
+        """
+        Initialize scheduler.
+
+        Args:
+            requests_per_minute: Default request quota (None for unlimited)
+            tokens_per_minute: Default token quota (None for unlimited)
+            limits: ``(rpm, tpm)`` overrides keyed by ``'provider'`` or ``'provider/model'``
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.limits = dict(limits or {})
+        self._quotas: Dict[Tuple[str, str], _Quota] = {}
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+
+    def _quota(self, provider: str, model: str) -> _Quota:
+        key = (provider, model)
+        quota = self._quotas.get(key)
+        if quota is None:
+            rpm, tpm = self.limits.get(f"{provider}/{model}") or self.limits.get(provider) or \
+                (self.requests_per_minute, self.tokens_per_minute)
+            quota = self._quotas[key] = _Quota(rpm, tpm)
+        return quota
+
+    def acquire(self, provider: str, model: str, tokens: int = 0,
+                priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> float:
+        """
+        Wait until a request may be sent, then consume its quota.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            tokens: Estimated tokens for the request (input plus maximum output)
+            priority: Scheduling priority (lower runs first)
+            timeout: Maximum seconds to wait (None to wait indefinitely)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            TimeoutError: If the quota did not become available in time
+        """
+        start = time.monotonic()
+        ticket = (priority, next(self._tickets))
+        with self._condition:
+            quota = self._quota(provider, model)
+            heapq.heappush(quota.waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if quota.waiters[0] == ticket:
+                        wait = quota.wait_time_for(tokens, now)
+                        if wait <= 0:
+                            break
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            raise TimeoutError(f"Rate limit for {provider}/{model} not available "
+                                               f"within {timeout:.1f}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            except BaseException:
+                quota.waiters.remove(ticket)
+                heapq.heapify(quota.waiters)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(quota.waiters)
+            if quota.requests is not None:
+                quota.requests.take(1, now)
+            if quota.tokens is not None:
+                quota.tokens.take(tokens, now)
+            waited = now - start
+            quota.granted += 1
+            if waited > 0.001:
+                quota.waited += 1
+                quota.wait_time += waited
+            # The next waiter in line may be admissible now
+            self._condition.notify_all()
+            return waited
+
+    def update(self, provider: str, model: str, headers: Mapping[str, str],
+               throttled: bool = False) -> None:
+        """
+        Adapt quotas to a provider's rate-limit headers.
+
+        Reported limits replace the configured ones, reported remaining
+        quota lowers the buckets, and a throttled (429) response pauses the
+        provider/model until the reported reset (or one second).
+
+        Args:
+            provider: Provider name
+            model: Model name
+            headers: Response headers
+            throttled: Whether the response was a 429
+        """
+        info = parse_rate_limit_headers(headers)
+        now = time.monotonic()
+        with self._condition:
+            quota = self._quota(provider, model)
+            for kind, bucket_name in (("requests", "requests"), ("tokens", "tokens")):
+                limit = info.get(f"limit_{kind}")
+                if limit:
+                    bucket = getattr(quota, bucket_name)
+                    if bucket is None:
+                        setattr(quota, bucket_name, TokenBucket(limit))
+                    else:
+                        bucket.set_limit(limit, now)
+                bucket = getattr(quota, bucket_name)
+                remaining = info.get(f"remaining_{kind}")
+                if bucket is not None and remaining is not None:
+                    bucket.set_remaining(remaining, now)
+                if remaining == 0 and f"reset_{kind}" in info:
+                    quota.blocked_until = max(quota.blocked_until, now + info[f"reset_{kind}"])
+            if throttled:
+                quota.throttled += 1
+                pause = info.get("retry_after")
+                if pause is None:
+                    pause = max([info[k] for k in ("reset_requests", "reset_tokens")
+                                 if k in info] or [1.0])
+                quota.blocked_until = max(quota.blocked_until, now + pause)
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters and current bucket levels keyed by ``'provider/model'``."""
+        with self._condition:
+            return {
+                f"{provider}/{model}": {
+                    "granted": quota.granted,
+                    "waited": quota.waited,
+                    "wait_time": quota.wait_time,
+                    "throttled": quota.throttled,
+                    "queued": len(quota.waiters),
+                    "requests_available": quota.requests.level if quota.requests else None,
+                    "tokens_available": quota.tokens.level if quota.tokens else None,
+                }
+                for (provider, model), quota in sorted(self._quotas.items())
+            }
+
+
+def _throttle_headers(error: Exception) -> Optional[Mapping[str, str]]:
+    """Headers of a 429 error raised by a provider SDK (None for any other error)."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    return getattr(response, "headers", None) or {}
+
+
+class RateLimitedLLMClient(LLMClient):
+    """
+    LLM client wrapper that schedules calls through a ``RateLimitScheduler``.
+
+    Each call reserves one request and its estimated input tokens plus
+    ``max_tokens`` (or ``output_tokens``) of the provider/model quota. 429
+    responses update the scheduler from their headers and are retried.
+    """
+
+    def __init__(self, llm_client: LLMClient, scheduler: Optional[RateLimitScheduler] = None,
+                 priority: Optional[int] = None, output_tokens: int = 1024, max_retries: int = 3,
+                 timeout: Optional[float] = None, provider: Optional[str] = None,
+                 model: Optional[str] = None):
+        """
+        Initialize rate-limited client.
+
+        Args:
+            llm_client: Client to forward calls to
+            scheduler: Scheduler shared by every client of a process (defaults to an unlimited one
+                that still learns quotas from rate-limit headers)
+            priority: Fixed priority (None to use ``llm_priority``, interactive by default)
+            output_tokens: Output tokens reserved when a call sets no ``max_tokens``
+            max_retries: Maximum retries after 429 responses
+            timeout: Maximum seconds to wait for quota
+            provider: Provider name for quotas (defaults to the client's)
+            model: Model name for quotas (defaults to the client's)
+        """
+        self.llm_client = llm_client
+        self.scheduler = scheduler if scheduler is not None else RateLimitScheduler()
+        self.priority = priority
+        self.output_tokens = output_tokens
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.provider = provider or str(getattr(llm_client, "provider", type(llm_client).__name__))
+        self.model = model or str(getattr(llm_client, "model", "") or "")
+
+    def reserve(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any],
+                timeout: Optional[float] = None) -> float:
+        """
+        Wait for and consume the quota of one request.
+
+        Args:
+            messages: Request messages
+            kwargs: Request keyword arguments
+            timeout: Maximum seconds to wait (defaults to the client's ``timeout``)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            TimeoutError: If the quota did not become available in time
+        """
+        tokens = (estimate_message_tokens(messages)
+                  + (kwargs.get("max_tokens") or self.output_tokens))
+        priority = self.priority if self.priority is not None else _priority.get()
+        return self.scheduler.acquire(self.provider, self.model, tokens, priority,
+                                      timeout if timeout is not None else self.timeout)
+
+    def _throttled(self, error: Exception, attempt: int) -> bool:
+        """Record a 429 and return whether to retry."""
+        headers = _throttle_headers(error)
+        if headers is None:
+            return False
+        self.scheduler.update(self.provider, self.model, headers, throttled=True)
+        if attempt >= self.max_retries:
+            return False
+        _note_retry()
+        return True
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Wait for quota, then forward the call (retrying throttled calls)."""
+        attempt = 0
+        while True:
+            self.reserve(messages, kwargs)
+            try:
+                return self.llm_client.chat(messages, **kwargs)
+            except Exception as e:
+                if not self._throttled(e, attempt):
+                    raise
+            attempt += 1
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Wait for quota, then stream the response (retrying calls throttled before any output)."""
+        for attempt in itertools.count():
+            self.reserve(messages, kwargs)
+            started = False
+            try:
+                for chunk in self.llm_client.stream_chat(messages, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self._throttled(e, attempt):
+                    raise
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, throttling, server errors and
+# Anthropic's "overloaded"
+TRANSIENT_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+
+class LLMTimeoutError(TimeoutError):
+    """An LLM call did not finish before its deadline."""
+
+
+def is_transient_error(error: Exception, retry_throttled: bool = True) -> bool:
+    """
+    Whether an LLM call that raised ``error`` is worth retrying.
+
+    Covers timeouts, connection failures and retryable HTTP statuses from the
+    OpenAI and Anthropic SDKs (which carry ``status_code``).
+
+    Args:
+        error: Raised exception
+        retry_throttled: Whether 429 responses count as transient
+
+    Returns:
+        True if the call may succeed when repeated
+    """
+    status = (getattr(error, "status_code", None)
+              or getattr(getattr(error, "response", None), "status_code", None))
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUSES and (retry_throttled or status != 429)
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # SDK connection and timeout errors have no status code
+    return any(name in type(error).__name__ for name in ("Timeout", "Connection"))
+
+
+# Takes rate-limit quota for a request, given (messages, kwargs, timeout);
+# see RateLimitedLLMClient.reserve
+QuotaHook = Callable[[List[Dict[str, str]], Dict[str, Any], Optional[float]], Any]
+
+
+def _retry_delay(error: Exception, attempt: int, backoff_factor: float,
+                 backoff_max: float) -> float:
+    """Retry-After from the error's response if present, else backoff with full jitter."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = (parse_rate_limit_headers(headers).get("retry_after")
+                   if hasattr(headers, "items") else None)
+    if retry_after is not None:
+        return min(retry_after, backoff_max)
+    return random.uniform(0, min(backoff_max, backoff_factor * (2 ** attempt)))
+
+
+class ResilientLLMClient(LLMClient):
+    """
+    LLM client wrapper adding per-call deadlines, retries and hedged requests.
+
+    Each attempt runs on a worker thread and is abandoned if it misses the
+    deadline (SDK calls cannot be interrupted, so the thread finishes in the
+    background and its result is discarded). Transient failures are retried
+    with exponential backoff until ``max_retries`` or the deadline.
+
+    With hedging enabled, a second identical request is sent if the first has
+    not finished after the hedge delay (by default the observed p95 latency),
+    and whichever finishes first wins. This trims tail latency at the cost of
+    a few percent more requests. Streams get deadlines and retries before the
+    first chunk, but no hedging.
+
+    Behind a rate limiter, pass its ``reserve`` as ``acquire`` so retries and
+    hedged requests take quota too (a hedge is skipped when no quota is free).
+    """
+
+    def __init__(self, llm_client: LLMClient, timeout: Optional[float] = 120.0,
+                 max_retries: int = 2, backoff_factor: float = 1.0, backoff_max: float = 30.0,
+                 hedge: bool = False, hedge_after: Optional[float] = None,
+                 hedge_percentile: float = 95.0, hedge_min_samples: int = 20,
+                 retry_throttled: bool = True, max_workers: int = 32,
+                 acquire: Optional[QuotaHook] = None):
+        """
+        Initialize resilient client.
+
+        Args:
+            llm_client: Client to forward calls to
+            timeout: Deadline in seconds for a call, including retries (None for no deadline)
+            max_retries: Maximum retries after transient failures
+            backoff_factor: Base delay for exponential backoff between retries
+            backoff_max: Maximum delay between retries
+            hedge: Whether to send hedged requests
+            hedge_after: Fixed hedge delay in seconds (None to use the latency percentile)
+            hedge_percentile: Latency percentile used as the hedge delay
+            hedge_min_samples: Calls observed before percentile-based hedging starts
+            retry_throttled: Whether to retry 429 responses (disable when a
+                ``RateLimitedLLMClient`` below already does)
+            max_workers: Maximum calls in flight, including abandoned ones
+            acquire: Called with ``(messages, kwargs, timeout)`` to take rate-limit quota before
+                each retry and hedged request; raises ``TimeoutError`` if none is available in time
+        """
+        self.llm_client = llm_client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.retry_throttled = retry_throttled
+        self.acquire = acquire
+        self.provider = getattr(llm_client, "provider", type(llm_client).__name__)
+        self.model = getattr(llm_client, "model", "")
+        self.latency = LatencyTracker()
+        self.counters = {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0,
+                         "hedges": 0, "hedge_wins": 0, "hedges_skipped": 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _submit(self, func: Any, *args: Any, **kwargs: Any) -> "Future[Any]":
+        # Carry context variables (e.g. llm_priority) over to the worker thread
+        return self._executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+    def _reserve(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any],
+                 deadline: Optional[float]) -> None:
+        """Take quota for a retry, waiting no longer than the deadline."""
+        if self.acquire is None:
+            return
+        try:
+            self.acquire(messages, kwargs, self._remaining(deadline))
+        except TimeoutError:
+            self._count("timeouts")
+            if self.timeout is None:
+                raise  # the hook's own limit, not our deadline
+            raise LLMTimeoutError(f"No rate-limit quota for {self.provider}/{self.model} "
+                                  f"within the {self.timeout:.1f}s deadline")
+    
+    def _reserve_hedge(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> bool:
+        """Take quota for a hedged request if it is free right away."""
+        if self.acquire is None:
+            return True
+        try:
+            self.acquire(messages, kwargs, 0)
+            return True
+        except TimeoutError:
+            self._count("hedges_skipped")
+            return False
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging (None while hedging is off or latency is unknown)."""
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        latencies = self.latency.latencies()
+        if len(latencies) < self.hedge_min_samples:
+            return None
+        return percentile(latencies, self.hedge_percentile)
+
+    def _attempt(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any],
+                 deadline: Optional[float]) -> str:
+        """One attempt, possibly hedged, bounded by the deadline."""
+        primary = self._submit(self.llm_client.chat, messages, **kwargs)
+        pending = {primary}
+        delay = self.hedge_delay()
+        remaining = self._remaining(deadline)
+        if delay is not None and (remaining is None or delay < remaining):
+            done, _ = wait_futures(pending, timeout=delay)
+            if not done and self._reserve_hedge(messages, kwargs):
+                self._count("hedges")
+                pending.add(self._submit(self.llm_client.chat, messages, **kwargs))
+        errors: List[BaseException] = []
+        while pending:
+            done, pending = wait_futures(pending, timeout=self._remaining(deadline),
+                                         return_when=FIRST_COMPLETED)
+            if not done:
+                self._count("timeouts")
+                raise LLMTimeoutError(f"LLM call to {self.provider}/{self.model} "
+                                      f"exceeded {self.timeout:.1f}s")
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    response: str = future.result()
+                    return response
+                errors.append(error)
+        raise errors[-1]
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Forward the call within the deadline, retrying transient failures."""
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                if attempt:
+                    self._reserve(messages, kwargs, deadline)
+                response = self._attempt(messages, kwargs, deadline)
+                self.latency.record(time.monotonic() - start, retries=attempt)
+                return response
+            except Exception as e:
+                self._retry_or_raise(e, attempt, deadline, start)
+            attempt += 1
+
+    def _retry_or_raise(self, error: Exception, attempt: int, deadline: Optional[float],
+                        start: float) -> None:
+        """Sleep before the next attempt, or re-raise if the error is final."""
+        delay = _retry_delay(error, attempt, self.backoff_factor, self.backoff_max)
+        remaining = self._remaining(deadline)
+        if isinstance(error, LLMTimeoutError) or attempt >= self.max_retries or \
+                not is_transient_error(error, self.retry_throttled) or \
+                (remaining is not None and delay >= remaining):
+            self._count("failures")
+            self.latency.record(time.monotonic() - start, error=True, retries=attempt)
+            raise error
+        self._count("retries")
+        _note_retry()
+        time.sleep(delay)
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Stream within the deadline, retrying transient failures before the first chunk."""
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+        self._count("calls")
+        for attempt in itertools.count():
+            started = False
+            try:
+                if attempt:
+                    self._reserve(messages, kwargs, deadline)
+                for chunk in self._stream_attempt(messages, kwargs, deadline):
+                    started = True
+                    yield chunk
+                self.latency.record(time.monotonic() - start, retries=attempt)
+                return
+            except Exception as e:
+                if started:
+                    self._count("failures")
+                    self.latency.record(time.monotonic() - start, error=True, retries=attempt)
+                    raise
+                self._retry_or_raise(e, attempt, deadline, start)
+
+    def _stream_attempt(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any],
+                        deadline: Optional[float]) -> Iterator[str]:
+        """Read a stream on a worker thread so every chunk wait is bounded by the deadline."""
+        chunks: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce() -> None:
+            try:
+                for chunk in self.llm_client.stream_chat(messages, **kwargs):
+                    if cancelled.is_set():
+                        return
+                    chunks.put(("chunk", chunk))
+                chunks.put(("end", None))
+            except Exception as e:
+                chunks.put(("error", e))
+
+        self._submit(produce)
+        try:
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=self._remaining(deadline))
+                except queue.Empty:
+                    self._count("timeouts")
+                    raise LLMTimeoutError(f"LLM stream from {self.provider}/{self.model} "
+                                          f"exceeded {self.timeout:.1f}s")
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            cancelled.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters for calls, retries, timeouts, failures and hedges, plus latency percentiles."""
+        with self._lock:
+            metrics: Dict[str, Any] = dict(self.counters)
+        metrics["latency"] = self.latency.summary()
+        metrics["hedge_delay"] = self.hedge_delay()
+        return metrics
+
+
+class _Backend:
+    """Health and latency of one router backend."""
+
+    def __init__(self, client: LLMClient, window: int):
+        self.client = client
+        self.latency = LatencyTracker(window)
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+
+class RouterLLMClient(LLMClient):
+    """
+    LLM client that spreads calls over several backends and fails over between them.
+
+    Each task (see ``llm_task``) has an ordered list of backends; untagged calls
+    use the ``'default'`` route, or every backend in the order given. The
+    first backend of a route is used unless it is slower than another one by
+    more than ``tolerance`` (scored on p50/p95 latency, inflated by the error
+    rate). With ``probe_rate`` set, a share of calls probes the other backends
+    so their latency stays current; by default other backends only get calls
+    when the preferred one fails. A failed call moves on to the next backend, and a backend
+    that fails ``failure_threshold`` times in a row is skipped for ``cooldown``
+    seconds. Wrap backends in ``ResilientLLMClient`` so that slow calls fail
+    (and fail over) at a deadline.
+    """
+
+    provider = "router"
+
+    def __init__(self, backends: Dict[str, LLMClient],
+                 routes: Optional[Dict[str, List[str]]] = None, tolerance: float = 1.5,
+                 error_penalty: float = 4.0, min_samples: int = 5, probe_rate: float = 0.0,
+                 failure_threshold: int = 3, cooldown: float = 30.0,
+                 window: int = 200, seed: Optional[int] = None):
+        """
+        Initialize router.
+
+        Args:
+            backends: Clients keyed by name (e.g. ``'openai/gpt-4o-mini'``), in default order
+            routes: Backend names to try, in order of preference, keyed by task or ``'default'``
+            tolerance: How much slower (as a ratio) the preferred backend may be before
+                another is used
+            error_penalty: Score multiplier per unit of error rate
+            min_samples: Calls observed before a backend's latency counts
+            probe_rate: Fraction of calls sent to a non-preferred healthy backend
+                (0 disables probing)
+            failure_threshold: Consecutive failures before a backend is skipped
+            cooldown: Seconds a failing backend is skipped
+            window: Calls kept per backend for latency and error rate
+            seed: Seed for probe selection
+        """
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.routes = {task: list(names) for task, names in (routes or {}).items()}
+        unknown = {name for names in self.routes.values() for name in names} - set(backends)
+        if unknown:
+            raise ValueError(f"Unknown backends in routes: {', '.join(sorted(unknown))}")
+        self.backends = {name: _Backend(client, window) for name, client in backends.items()}
+        self.model = "+".join(backends)
+        self.tolerance = tolerance
+        self.error_penalty = error_penalty
+        self.min_samples = min_samples
+        self.probe_rate = probe_rate
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.counters = {"calls": 0, "failovers": 0, "probes": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _score(self, backend: _Backend) -> Optional[float]:
+        latencies = backend.latency.latencies()
+        if len(latencies) < self.min_samples:
+            return None
+        latency = (percentile(latencies, 50) + percentile(latencies, 95)) / 2
+        return latency * (1 + self.error_penalty * backend.latency.error_rate())
+
+    def candidates(self, task: Optional[str] = None) -> List[str]:
+        """Backend names in the order a call for ``task`` would try them."""
+        names = (self.routes.get(task or "default") or self.routes.get("default")
+                 or list(self.backends))
+        now = time.monotonic()
+        scores = {name: self._score(self.backends[name]) for name in names}
+        known = [score for score in scores.values() if score is not None]
+        best = min(known) if known else None
+
+        def rank(item: Tuple[int, str]) -> Tuple[bool, bool, int]:
+            position, name = item
+            down = self.backends[name].down_until > now
+            score = scores[name]
+            slow = score is not None and best is not None and score > best * self.tolerance
+            return (down, slow, position)
+
+        ordered = [name for _, name in sorted(enumerate(names), key=rank)]
+        with self._lock:
+            probe = len(ordered) > 1 and self._random.random() < self.probe_rate
+            if probe:
+                self.counters["probes"] += 1
+        healthy = [name for name in ordered if self.backends[name].down_until <= now]
+        if probe and len(healthy) > 1:
+            target = self._random.choice(healthy[1:])
+            ordered.remove(target)
+            ordered.insert(0, target)
+        return ordered
+
+    def _record(self, name: str, latency: float, error: bool) -> None:
+        backend = self.backends[name]
+        backend.latency.record(latency, error=error)
+        with self._lock:
+            if not error:
+                backend.consecutive_failures = 0
+                return
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.failure_threshold:
+                backend.down_until = time.monotonic() + self.cooldown
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Send the call to the best backend for the current task, failing over on errors."""
+        with self._lock:
+            self.counters["calls"] += 1
+        error: Exception = RuntimeError("No LLM backend is configured")
+        for attempt, name in enumerate(self.candidates(current_llm_task())):
+            if attempt:
+                with self._lock:
+                    self.counters["failovers"] += 1
+            start = time.monotonic()
+            try:
+                response = self.backends[name].client.chat(messages, **kwargs)
+            except Exception as e:
+                self._record(name, time.monotonic() - start, error=True)
+                error = e
+                continue
+            self._record(name, time.monotonic() - start, error=False)
+            return response
+        raise error
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Stream from the best backend, failing over on errors before the first chunk."""
+        with self._lock:
+            self.counters["calls"] += 1
+        error: Exception = RuntimeError("No LLM backend is configured")
+        for attempt, name in enumerate(self.candidates(current_llm_task())):
+            if attempt:
+                with self._lock:
+                    self.counters["failovers"] += 1
+            start = time.monotonic()
+            started = False
+            try:
+                for chunk in self.backends[name].client.stream_chat(messages, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._record(name, time.monotonic() - start, error=True)
+                if started:
+                    raise
+                error = e
+                continue
+            self._record(name, time.monotonic() - start, error=False)
+            return
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """Router counters plus latency, error rate and health per backend."""
+        now = time.monotonic()
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.counters)
+        stats["backends"] = {
+            name: dict(backend.latency.summary(), error_rate=backend.latency.error_rate(),
+                       healthy=backend.down_until <= now,
+                       consecutive_failures=backend.consecutive_failures)
+            for name, backend in self.backends.items()
+        }
+        return stats
+
+
+def wrap_llm_client(llm_client: LLMClient, timeout: Optional[float] = None, max_retries: int = 0,
+                    hedge: bool = False, requests_per_minute: Optional[float] = None,
+                    tokens_per_minute: Optional[float] = None,
+                    scheduler: Optional[RateLimitScheduler] = None) -> LLMClient:
+    """
+    Apply call policies to a client: deadlines, retries and hedging, then rate limits.
+
+    The rate limiter wraps the resilient client, so waiting for quota for a
+    call does not count against its deadline and throttled calls are retried
+    by the limiter (which learns from their headers) rather than blindly.
+    Retries and hedged requests inside the resilient client take quota of
+    their own through the limiter's ``reserve``.
+
+    Args:
+        llm_client: Client to wrap
+        timeout: Deadline in seconds per call (None for no deadline)
+        max_retries: Maximum retries after transient failures
+        hedge: Whether to send hedged requests at the p95 latency
+        requests_per_minute: Request quota (None for unlimited)
+        tokens_per_minute: Token quota (None for unlimited)
+        scheduler: Shared scheduler to use instead of a new one built from the quotas
+
+    Returns:
+        Wrapped client (``llm_client`` itself if no policy applies)
+    """
+    rate_limited = bool(scheduler or requests_per_minute or tokens_per_minute)
+    if timeout is not None or max_retries or hedge:
+        llm_client = ResilientLLMClient(llm_client, timeout=timeout, max_retries=max_retries,
+                                        hedge=hedge, retry_throttled=not rate_limited)
+    if rate_limited:
+        limiter = RateLimitedLLMClient(
+            llm_client, scheduler or RateLimitScheduler(requests_per_minute, tokens_per_minute))
+        if isinstance(llm_client, ResilientLLMClient):
+            llm_client.acquire = limiter.reserve
+        llm_client = limiter
+    return llm_client
+
+
+# Providers accepted by get_llm_client ('fake' replays canned responses offline)
+LLM_PROVIDERS = ("openai", "anthropic", "fake")
 
 
 def get_llm_client(provider: str = "openai", **kwargs) -> LLMClient:
@@ -64,6 +1461,117 @@ def get_llm_client(provider: str = "openai", **kwargs) -> LLMClient:
         return OpenAIClient(**kwargs)
     elif provider == "anthropic":
         return AnthropicClient(**kwargs)
+    elif provider == "fake":
+        return FakeLLMClient(**kwargs)
+    else:
+        raise ValueError(f"Unsupported LLM provider: {provider}. "
+                         f"Supported: {', '.join(LLM_PROVIDERS)}")
+
+
+def get_async_llm_client(provider: str = "openai", **kwargs) -> AsyncLLMClient:
+    """Factory function to get an asynchronous LLM client."""
+    provider = provider.lower()
+    
+    if provider == "openai":
+        return AsyncOpenAIClient(**kwargs)
+    elif provider == "anthropic":
+        return AsyncAnthropicClient(**kwargs)
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}. Supported: openai, anthropic")
 
+
+def parse_backend_spec(spec: str) -> Tuple[str, Optional[str]]:
+    """Split a ``'provider[:model]'`` backend spec into provider and model."""
+    provider, _, model = spec.partition(":")
+    provider = provider.strip().lower()
+    if provider not in LLM_PROVIDERS:
+        raise ValueError(f"Unsupported LLM provider: {provider}. "
+                         f"Supported: {', '.join(LLM_PROVIDERS)}")
+    return provider, model.strip() or None
+
+
+def build_llm_client(provider: str = "openai", model: Optional[str] = None,
+                     api_key: Optional[str] = None, fallbacks: Iterable[str] = (),
+                     routes: Optional[Dict[str, str]] = None,
+                     timeout: Optional[float] = None, max_retries: int = 0, hedge: bool = False,
+                     requests_per_minute: Optional[float] = None,
+                     tokens_per_minute: Optional[float] = None,
+                     factory: Optional[Any] = None, hooks: Iterable[Any] = ()) -> LLMClient:
+    """
+    Create a client from CLI-style settings, routing over several backends if asked.
+
+    Every backend gets the call policies of ``wrap_llm_client`` (sharing one
+    rate-limit scheduler). With fallbacks or routes, the backends are put
+    behind a ``RouterLLMClient``: untagged calls try the primary backend and
+    then the fallbacks; a task route tries its backend first, then those.
+
+    Args:
+        provider: Primary provider
+        model: Primary model (None for the provider default)
+        api_key: API key, used for backends of the primary provider
+        fallbacks: ``'provider[:model]'`` specs to fail over to
+        routes: ``'provider[:model]'`` spec to prefer, keyed by task
+            (e.g. ``{'chat': 'openai:gpt-4o-mini'}``)
+        timeout: Deadline in seconds per call
+        max_retries: Maximum retries after transient failures
+        hedge: Whether to send hedged requests
+        requests_per_minute: Request quota per provider/model
+        tokens_per_minute: Token quota per provider/model
+        factory: Creates a backend from provider and keyword arguments
+            (defaults to ``get_llm_client``)
+        hooks: Call hooks (see ``instrumentation``); each backend is instrumented separately
+
+    Returns:
+        LLM client
+    """
+    factory = factory or get_llm_client
+    hooks = list(hooks)
+    scheduler = RateLimitScheduler(requests_per_minute, tokens_per_minute) \
+        if requests_per_minute or tokens_per_minute else None
+    primary = f"{provider.lower()}:{model}" if model else provider.lower()
+    specs = [primary] + [spec for spec in fallbacks if spec != primary]
+    for spec in (routes or {}).values():
+        if spec not in specs:
+            specs.append(spec)
+
+    backends: Dict[str, LLMClient] = {}
+    for spec in specs:
+        backend_provider, backend_model = parse_backend_spec(spec)
+        kwargs: Dict[str, Any] = {}
+        if backend_model:
+            kwargs["model"] = backend_model
+        if api_key and backend_provider == provider.lower():
+            kwargs["api_key"] = api_key
+        raw = factory(backend_provider, **kwargs)
+        backends[spec] = wrap_llm_client(raw, timeout=timeout, max_retries=max_retries, hedge=hedge,
+                                         scheduler=scheduler)
+        if hooks:
+            from .instrumentation import InstrumentedLLMClient
+            backends[spec] = InstrumentedLLMClient(
+                backends[spec], hooks, provider=backend_provider,
+                model=getattr(raw, "model", None) or backend_model)
+    if len(backends) == 1:
+        return backends[primary]
+    default = [primary] + [spec for spec in fallbacks if spec != primary]
+    task_routes = {task: [spec] + [name for name in default if name != spec]
+                   for task, spec in (routes or {}).items()}
+    return RouterLLMClient(backends, dict(task_routes, default=default))
+
+
+def total_usage(llm_client: Union[LLMClient, AsyncLLMClient]) -> TokenUsage:
+    """
+    Token usage of a client, summed over the provider clients it wraps.
+
+    Looks through policy and cache wrappers (``llm_client`` attribute) and router
+    backends; clients that do not track usage count as zero.
+    """
+    usage = getattr(llm_client, "usage", None)
+    if isinstance(usage, TokenUsage):
+        return usage
+    backends = getattr(llm_client, "backends", None)
+    if isinstance(backends, dict):
+        return sum((total_usage(backend.client) for backend in backends.values()), TokenUsage())
+    inner = getattr(llm_client, "llm_client", None)
+    if isinstance(inner, (LLMClient, AsyncLLMClient)):
+        return total_usage(inner)
+    return TokenUsage()
@@ -0,0 +1,158 @@
+"""Token-bounded conversation memory with rolling summaries."""
+
+from collections import deque
+from typing import Optional, Dict, Any, List, Union, Deque
+from .llm_client import LLMClient, AsyncLLMClient, chat_async
+from .tokens import estimate_tokens, estimate_message_tokens
+
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant that "
+    "helps with Grafana dashboards. Update the summary with the new messages. Keep facts the "
+    "assistant will need later: the user's goals, data sources, metrics, panel preferences, "
+    "decisions made and open questions. Reply with the updated summary only, in at most "
+    "{max_words} words."
+)
+
+
+class ConversationMemory:
+    """
+    Conversation history kept within a token budget.
+
+    The most recent turns are kept verbatim. When the history (plus system prompt)
+    would exceed the budget, or holds more than ``max_turns`` turns, the oldest
+    turns are evicted and, if an LLM client is available, folded into a rolling
+    summary that is sent as a second system message.
+    """
+
+    def __init__(self, token_budget: int = 8000, max_turns: Optional[int] = None,
+                 llm_client: Optional[Union[LLMClient, AsyncLLMClient]] = None,
+                 summary_max_words: int = 200, tokens_sent_window: int = 100):
+        """
+        Initialize conversation memory.
+
+        Args:
+            token_budget: Maximum estimated input tokens per request, including the
+                system prompt and summary
+            max_turns: Maximum number of user turns kept verbatim (None for no limit)
+            llm_client: Client used to summarize evicted turns (None to drop them)
+            summary_max_words: Target length of the rolling summary
+            tokens_sent_window: Number of recent turns whose request sizes are kept for ``stats``
+        """
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.llm_client = llm_client
+        self.summary_max_words = summary_max_words
+        self.messages: List[Dict[str, str]] = []
+        self.summary = ""
+        self.tokens_sent: Deque[int] = deque(maxlen=tokens_sent_window)
+        self.turns = 0
+        self.total_tokens_sent = 0
+        self.evicted_messages = 0
+
+    def add(self, role: str, content: str) -> None:
+        """Append a message to the history."""
+        self.messages.append({"role": role, "content": content})
+
+    def reset(self) -> None:
+        """Forget the history and summary."""
+        self.messages = []
+        self.summary = ""
+        self.tokens_sent.clear()
+        self.turns = 0
+        self.total_tokens_sent = 0
+        self.evicted_messages = 0
+
+    def _prefix(self, system_prompt: str) -> List[Dict[str, str]]:
+        prefix = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            prefix.append({"role": "system",
+                           "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return prefix
+
+    def _over_limit(self, system_prompt: str) -> bool:
+        if self.max_turns is not None:
+            if sum(1 for m in self.messages if m["role"] == "user") > self.max_turns:
+                return True
+        tokens = estimate_message_tokens(self._prefix(system_prompt) + self.messages)
+        return tokens > self.token_budget
+
+    def _evict(self, system_prompt: str) -> List[Dict[str, str]]:
+        """Remove the oldest turns until the request fits, keeping the latest message."""
+        evicted: List[Dict[str, str]] = []
+        while len(self.messages) > 1 and self._over_limit(system_prompt):
+            evicted.append(self.messages.pop(0))
+            # Never start the retained history with an assistant reply
+            while len(self.messages) > 1 and self.messages[0]["role"] != "user":
+                evicted.append(self.messages.pop(0))
+        self.evicted_messages += len(evicted)
+        return evicted
+
+    def _restore(self, evicted: List[Dict[str, str]]) -> None:
+        """Put evicted turns back, e.g. after the summary call failed."""
+        self.messages = evicted + self.messages
+        self.evicted_messages -= len(evicted)
+
+    def _summary_messages(self, evicted: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in evicted)
+        return [
+            {"role": "system", "content": SUMMARY_PROMPT.format(max_words=self.summary_max_words)},
+            {"role": "user", "content": f"Current summary:\n{self.summary or '(none)'}\n\n"
+                                        f"New messages:\n{transcript}"},
+        ]
+
+    def _finish(self, system_prompt: str) -> List[Dict[str, str]]:
+        messages = self._prefix(system_prompt) + self.messages
+        tokens = estimate_message_tokens(messages)
+        self.tokens_sent.append(tokens)
+        self.turns += 1
+        self.total_tokens_sent += tokens
+        return messages
+
+    def build_messages(self, system_prompt: str) -> List[Dict[str, str]]:
+        """
+        Build the messages for the next request, evicting and summarizing old turns.
+
+        Args:
+            system_prompt: System prompt placed first in the request
+
+        Returns:
+            Messages to send to the LLM
+
+        Raises:
+            Exception: If summarizing evicted turns failed; the turns are kept for the next attempt
+        """
+        evicted = self._evict(system_prompt)
+        client = self.llm_client
+        if evicted and client is not None and not isinstance(client, AsyncLLMClient):
+            try:
+                self.summary = client.chat(self._summary_messages(evicted), temperature=0.2).strip()
+            except BaseException:
+                self._restore(evicted)
+                raise
+        return self._finish(system_prompt)
+
+    async def abuild_messages(self, system_prompt: str) -> List[Dict[str, str]]:
+        """Build the messages for the next request without blocking the event loop."""
+        evicted = self._evict(system_prompt)
+        if evicted and self.llm_client is not None:
+            try:
+                response = await chat_async(self.llm_client, self._summary_messages(evicted),
+                                            temperature=0.2)
+            except BaseException:
+                self._restore(evicted)
+                raise
+            self.summary = response.strip()
+        return self._finish(system_prompt)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return memory metrics, including estimated tokens sent per turn."""
+        return {
+            "turns": self.turns,
+            "retained_messages": len(self.messages),
+            "evicted_messages": self.evicted_messages,
+            "summary_tokens": estimate_tokens(self.summary),
+            "last_tokens_sent": self.tokens_sent[-1] if self.tokens_sent else 0,
+            "total_tokens_sent": self.total_tokens_sent,
+            "tokens_sent_per_turn": list(self.tokens_sent),
+        }
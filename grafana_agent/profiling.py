@@ -0,0 +1,185 @@
+"""Profiling mode for CLI commands: per-phase timings, CPU profiles and peak memory."""
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+from . import __version__
+from .tracing import add_span_listener, remove_span_listener
+
+# CPU profilers accepted by Profiler ('pyinstrument' needs the pyinstrument package)
+CPU_PROFILERS = ("cprofile", "pyinstrument")
+
+
+def _category(name: str) -> str:
+    """Phase category of a span: 'llm.chat' -> 'llm', 'grafana GET /api/search' -> 'grafana'."""
+    return name.replace(" ", ".").split(".", 1)[0]
+
+
+class Profiler:
+    """
+    Record where a command spends its time.
+
+    Phases are the tracing spans the pipeline already emits (prompt build, LLM
+    calls, JSON parse/repair/validation, Grafana requests); each gets a count,
+    total and self time, and self times are summed per category (``llm``,
+    ``dashboard``, ``grafana``, ...). Spans running in parallel on worker
+    threads can add up to more than the wall time; categories are then scaled
+    to their share of it, and ``span_time`` keeps the unscaled sum. Optionally a
+    CPU profile is written with cProfile or pyinstrument, and peak memory is
+    measured with tracemalloc.
+    """
+
+    def __init__(self, cpu: Optional[str] = None, cpu_output: Optional[str] = None,
+                 memory: bool = True):
+        """
+        Initialize profiler.
+
+        Args:
+            cpu: CPU profiler to run: 'cprofile', 'pyinstrument' or None
+            cpu_output: File for the CPU profile (pstats for cProfile, HTML for pyinstrument)
+            memory: Whether to trace allocations for peak memory (slows allocation-heavy code)
+        """
+        if cpu is not None and cpu not in CPU_PROFILERS:
+            raise ValueError(f"Unsupported CPU profiler: {cpu}. "
+                             f"Supported: {', '.join(CPU_PROFILERS)}")
+        if cpu is not None and not cpu_output:
+            raise ValueError("cpu_output is required with a CPU profiler")
+        self.cpu = cpu
+        self.cpu_output = cpu_output
+        self.memory = memory
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._profiler: Any = None
+        self._started_at: Optional[datetime] = None
+        self._start = 0.0
+        self._cpu_start = 0.0
+        self._wall_time: Optional[float] = None
+        self._cpu_time: Optional[float] = None
+        self._peak_memory: Optional[int] = None
+        self._started_tracemalloc = False
+
+    def _on_span(self, name: str, duration: float, self_time: float) -> None:
+        with self._lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = self.phases[name] = {"count": 0, "total": 0.0, "self": 0.0, "max": 0.0}
+            phase["count"] += 1
+            phase["total"] += duration
+            phase["self"] += self_time
+            phase["max"] = max(phase["max"], duration)
+
+    def start(self) -> None:
+        """Start timing phases and, if configured, CPU and memory profiling."""
+        if self.cpu == "pyinstrument":
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler
+            except ImportError:
+                raise ImportError("pyinstrument package is required. "
+                                  "Install with: pip install pyinstrument")
+            self._profiler = PyinstrumentProfiler()
+        elif self.cpu == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+        add_span_listener(self._on_span)
+        self._started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.cpu == "cprofile":
+            self._profiler.enable()
+        elif self.cpu == "pyinstrument":
+            self._profiler.start()
+
+    def stop(self) -> None:
+        """Stop profiling and write the CPU profile, if any."""
+        if self._profiler is not None and self.cpu_output is not None:
+            if self.cpu == "cprofile":
+                self._profiler.disable()
+                self._profiler.dump_stats(self.cpu_output)
+            else:
+                self._profiler.stop()
+                with open(self.cpu_output, 'w') as f:
+                    f.write(self._profiler.output_html())
+        self._wall_time = time.perf_counter() - self._start
+        self._cpu_time = time.process_time() - self._cpu_start
+        remove_span_listener(self._on_span)
+        if self.memory and tracemalloc.is_tracing():
+            self._peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def report(self, command: Optional[str] = None,
+               argv: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Build the profile report.
+
+        Args:
+            command: Name of the profiled command
+            argv: Command line arguments (defaults to ``sys.argv``)
+
+        Returns:
+            JSON-serializable report
+        """
+        with self._lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+        wall_time = (self._wall_time if self._wall_time is not None
+                     else time.perf_counter() - self._start)
+        categories: Dict[str, float] = {}
+        for name, phase in phases.items():
+            categories[_category(name)] = categories.get(_category(name), 0.0) + phase["self"]
+        span_time = sum(categories.values())
+        if span_time > wall_time:
+            categories = {name: seconds * wall_time / span_time
+                          for name, seconds in categories.items()}
+        categories["other"] = max(wall_time - span_time, 0.0)
+        return {
+            "command": command,
+            "argv": argv if argv is not None else sys.argv[1:],
+            "started": self._started_at.isoformat() if self._started_at else None,
+            "wall_time": round(wall_time, 6),
+            "cpu_time": round(self._cpu_time, 6) if self._cpu_time is not None else None,
+            "peak_memory_bytes": self._peak_memory,
+            "span_time": round(span_time, 6),
+            "categories": {name: round(seconds, 6) for name, seconds in
+                           sorted(categories.items(), key=lambda item: -item[1])},
+            "phases": {name: {key: round(value, 6) if isinstance(value, float) else value
+                              for key, value in phase.items()}
+                       for name, phase in sorted(phases.items(),
+                                                 key=lambda item: -item[1]["self"])},
+            "cpu_profile": self.cpu_output if self.cpu else None,
+            "environment": {
+                "agent_version": __version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+        }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """
+    Write a profile report.
+
+    ``.jsonl`` files get the report appended as one line, so repeated runs
+    build a history to track regressions; other paths are overwritten with
+    indented JSON.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith('.jsonl'):
+        with open(path, 'a') as f:
+            f.write(json.dumps(report) + "\n")
+    else:
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,403 @@
+"""HTTP API server exposing dashboard creation, summarization and chat sessions."""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, AsyncGenerator, Callable, Iterator, Tuple
+from .llm_client import LLMClient, total_usage
+from .chat_interface import ChatInterface
+from .dashboard_generator import DashboardGenerator
+from .memory import ConversationMemory
+
+
+class Session:
+    """A chat session: its conversation state and a lock serializing its turns."""
+
+    def __init__(self, session_id: str, chat: ChatInterface):
+        self.id = session_id
+        self.chat = chat
+        self.created = time.time()
+        self.last_used = self.created
+        self.lock = asyncio.Lock()
+
+    def to_record(self) -> Dict[str, Any]:
+        """Serializable view of the session."""
+        return {
+            "session_id": self.id,
+            "created": self.created,
+            "last_used": self.last_used,
+            "messages": self.chat.conversation_history,
+            "memory": self.chat.memory.stats(),
+        }
+
+
+class SessionStore:
+    """
+    Chat sessions keyed by ID, bounded in number and idle time.
+
+    The least recently used session is evicted when the store is full, and
+    sessions idle for longer than ``ttl`` are dropped on access.
+    """
+
+    def __init__(self, factory: Callable[[], ChatInterface], max_sessions: int = 1000,
+                 ttl: Optional[float] = 3600.0):
+        """
+        Initialize session store.
+
+        Args:
+            factory: Creates the ChatInterface for a new session
+            max_sessions: Maximum number of live sessions
+            ttl: Idle time in seconds after which a session expires (None for no expiry)
+        """
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        for session_id in [s.id for s in self._sessions.values() if now - s.last_used > self.ttl]:
+            del self._sessions[session_id]
+
+    def create(self) -> Session:
+        """Start a new session."""
+        session = Session(uuid.uuid4().hex, self.factory())
+        with self._lock:
+            self._expire(time.time())
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Look up a live session, marking it as used."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """End a session; returns whether it existed."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+
+class QueueFullError(Exception):
+    """Raised when a request arrives while the wait queue is full."""
+
+
+class AgentServer:
+    """
+    Async HTTP API around one shared, warm LLM client.
+
+    Endpoints (JSON bodies; add ``?stream=1`` or ``Accept: text/event-stream``
+    for server-sent events):
+
+    - ``POST /v1/dashboards`` ``{"description", "title"?}`` — SSE ``panel`` events
+    - ``POST /v1/summaries`` ``{"dashboard"}`` — SSE ``chunk`` events
+    - ``POST /v1/sessions`` — start a chat session
+    - ``GET``/``DELETE /v1/sessions/{id}`` — inspect or end a session
+    - ``POST /v1/sessions/{id}/messages`` ``{"message"}`` — SSE ``chunk`` events
+    - ``GET /healthz`` — load, session counts and token usage
+    - ``GET /metrics`` — Prometheus metrics (with ``metrics_registry``)
+
+    At most ``max_concurrency`` LLM requests run at once; up to ``max_queue``
+    more wait, and further requests are rejected with 503 and Retry-After.
+    """
+
+    def __init__(self, llm_client: LLMClient, max_concurrency: int = 8, max_queue: int = 64,
+                 max_sessions: int = 1000, session_ttl: Optional[float] = 3600.0,
+                 history_tokens: int = 8000, summary_token_budget: int = 8000,
+                 metrics_registry: Optional[Any] = None):
+        """
+        Initialize server.
+
+        Args:
+            llm_client: LLM client shared by all requests
+            max_concurrency: Maximum LLM requests in progress
+            max_queue: Maximum requests waiting for a slot before new ones are rejected
+            max_sessions: Maximum number of live chat sessions
+            session_ttl: Idle seconds after which a chat session expires
+            history_tokens: Token budget for each session's conversation history
+            summary_token_budget: Token budget for dashboard JSON sent for summarization
+            metrics_registry: ``prometheus_client`` registry to serve at /metrics
+        """
+        self.llm_client = llm_client
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.metrics_registry = metrics_registry
+        self.generator = DashboardGenerator(llm_client, summary_token_budget=summary_token_budget)
+        self.sessions = SessionStore(
+            lambda: ChatInterface(llm_client, memory=ConversationMemory(token_budget=history_tokens,
+                                                                        llm_client=llm_client)),
+            max_sessions=max_sessions, ttl=session_ttl,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                           thread_name_prefix="agent-server")
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    # Concurrency control
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created on first use, inside the running loop (before Python 3.10 a
+        # semaphore binds to the loop that is current when it is created)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def _acquire(self) -> None:
+        slots = self._semaphore()
+        if slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError()
+        self.queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore().release()
+
+    async def _stream(self, produce: Callable[[Callable[[Any], None]], Any],
+                      lock: Optional[asyncio.Lock] = None
+                      ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Run blocking work in a concurrency slot, yielding its events as they happen.
+
+        ``produce`` receives an ``emit`` callback; its return value is yielded
+        last as a ``("done", result)`` event. The slot (and ``lock``, if given)
+        is held until the work itself finishes, even if the consumer stops early.
+        """
+        loop = asyncio.get_running_loop()
+        events: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+
+        def work() -> None:
+            def emit(event: Tuple[str, Any]) -> None:
+                loop.call_soon_threadsafe(events.put_nowait, event)
+            try:
+                emit(("done", produce(emit)))
+            except Exception as e:
+                emit(("error", str(e)))
+
+        def finished(_: Any) -> None:
+            self._release()
+            if lock is not None:
+                lock.release()
+
+        if lock is not None:
+            await lock.acquire()
+        try:
+            await self._acquire()
+        except BaseException:
+            if lock is not None:
+                lock.release()
+            raise
+        try:
+            future = loop.run_in_executor(self.executor, work)
+        except BaseException:
+            finished(None)
+            raise
+        # Released when the worker is done, not when this generator is closed:
+        # a cancelled request's work keeps running and must keep its slot
+        future.add_done_callback(finished)
+        while True:
+            event = await events.get()
+            yield event
+            if event[0] in ("done", "error"):
+                break
+        await future
+
+    # HTTP plumbing
+
+    def app(self) -> Any:
+        """Build the aiohttp application."""
+        try:
+            from aiohttp import web
+        except ImportError:
+            raise ImportError("aiohttp package is required. Install with: pip install aiohttp")
+
+        app = web.Application(middlewares=[self._errors_middleware(web)])
+        app.router.add_get("/healthz", self.health)
+        if self.metrics_registry is not None:
+            app.router.add_get("/metrics", self.metrics)
+        app.router.add_post("/v1/dashboards", self.create_dashboard)
+        app.router.add_post("/v1/summaries", self.summarize_dashboard)
+        app.router.add_post("/v1/sessions", self.create_session)
+        app.router.add_get("/v1/sessions/{session_id}", self.get_session)
+        app.router.add_delete("/v1/sessions/{session_id}", self.delete_session)
+        app.router.add_post("/v1/sessions/{session_id}/messages", self.send_message)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    def _errors_middleware(self, web: Any) -> Any:
+        @web.middleware
+        async def errors(request: Any, handler: Callable[[Any], Any]) -> Any:
+            try:
+                return await handler(request)
+            except QueueFullError:
+                return web.json_response({"error": "Server busy, try again later"}, status=503,
+                                         headers={"Retry-After": "1"})
+            except (ValueError, KeyError) as e:
+                return web.json_response({"error": f"Bad request: {e}"}, status=400)
+        return errors
+
+    async def _cleanup(self, app: Any) -> None:
+        self.executor.shutdown(wait=False)
+
+    async def _body(self, request: Any, *required: str) -> Dict[str, Any]:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            raise ValueError("body must be JSON")
+        if not isinstance(body, dict):
+            raise ValueError("body must be a JSON object")
+        missing = [key for key in required if not body.get(key)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        return body
+
+    @staticmethod
+    def _wants_stream(request: Any) -> bool:
+        return request.query.get("stream") in ("1", "true") or \
+            "text/event-stream" in request.headers.get("Accept", "")
+
+    async def _sse(self, request: Any, events: AsyncGenerator[Tuple[str, Any], None]) -> Any:
+        """Send events as a server-sent events response."""
+        from aiohttp import web
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream",
+                                               "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        async for name, data in events:
+            await response.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def _respond(self, request: Any, events: AsyncGenerator[Tuple[str, Any], None],
+                       key: Optional[str]) -> Any:
+        """Stream events, or collect them into a single JSON response."""
+        from aiohttp import web
+
+        try:
+            if self._wants_stream(request):
+                return await self._sse(request, events)
+            async for name, data in events:
+                if name == "done":
+                    return web.json_response(data if key is None else {key: data})
+                if name == "error":
+                    return web.json_response({"error": data}, status=502)
+            return web.json_response({"error": "No result"}, status=500)
+        finally:
+            # Close now rather than whenever the generator is collected
+            await events.aclose()
+
+    # Handlers
+
+    async def health(self, request: Any) -> Any:
+        from aiohttp import web
+
+        return web.json_response({
+            "status": "ok",
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "sessions": len(self.sessions),
+            "usage": total_usage(self.llm_client).to_dict(),
+        })
+
+    async def metrics(self, request: Any) -> Any:
+        from aiohttp import web
+        from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+        if self.metrics_registry is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=generate_latest(self.metrics_registry),
+                            headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+    async def create_dashboard(self, request: Any) -> Any:
+        body = await self._body(request, "description")
+        events = self._stream(lambda emit: self.generator.create_dashboard(
+            body["description"], body.get("title"), on_panel=lambda panel: emit(("panel", panel))))
+        return await self._respond(request, events, None)
+
+    async def summarize_dashboard(self, request: Any) -> Any:
+        body = await self._body(request, "dashboard")
+
+        def produce(emit: Callable[[Any], None]) -> str:
+            return _collect(self.generator.stream_summarize_dashboard(body["dashboard"]), emit)
+        return await self._respond(request, self._stream(produce), "summary")
+
+    async def create_session(self, request: Any) -> Any:
+        from aiohttp import web
+
+        session = self.sessions.create()
+        return web.json_response({"session_id": session.id}, status=201)
+
+    def _session(self, request: Any) -> Session:
+        from aiohttp import web
+
+        session = self.sessions.get(request.match_info["session_id"])
+        if session is None:
+            raise web.HTTPNotFound(text=json.dumps({"error": "Unknown or expired session"}),
+                                   content_type="application/json")
+        return session
+
+    async def get_session(self, request: Any) -> Any:
+        from aiohttp import web
+
+        return web.json_response(self._session(request).to_record())
+
+    async def delete_session(self, request: Any) -> Any:
+        from aiohttp import web
+
+        self._session(request)
+        self.sessions.delete(request.match_info["session_id"])
+        return web.json_response({"deleted": True})
+
+    async def send_message(self, request: Any) -> Any:
+        session = self._session(request)
+        body = await self._body(request, "message")
+
+        # One turn at a time per session (held until the turn's work finishes);
+        # other sessions proceed in parallel
+        events = self._stream(
+            lambda emit: _collect(session.chat.stream_chat(body["message"]), emit),
+            lock=session.lock)
+        return await self._respond(request, events, "reply")
+
+
+def _collect(chunks: Iterator[str], emit: Callable[[Any], None]) -> str:
+    """Emit each chunk as an event and return the joined text."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        emit(("chunk", chunk))
+    return "".join(parts)
+
+
+def run_server(server: AgentServer, host: str = "127.0.0.1", port: int = 8080) -> None:
+    """Serve the API until interrupted."""
+    from aiohttp import web
+
+    web.run_app(server.app(), host=host, port=port, print=None)
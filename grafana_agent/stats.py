@@ -0,0 +1,114 @@
+"""Latency and outcome statistics for outgoing requests."""
+
+import math
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List, Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """
+    Return the q-th percentile (0-100) of values using linear interpolation.
+
+    Args:
+        values: Sample values
+        q: Percentile to compute
+
+    Returns:
+        Percentile value (0.0 for an empty sample)
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * q / 100.0
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[int(rank)]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of request latencies with counters."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Number of most recent latencies kept for percentiles
+        """
+        self._latencies: "deque[float]" = deque(maxlen=window)
+        self._outcomes: "deque[bool]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+
+    def record(self, latency: float, error: bool = False, retries: int = 0) -> None:
+        """Record one request."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(error)
+            self.count += 1
+            self.errors += int(error)
+            self.retries += retries
+            self.total_time += latency
+
+    def latencies(self) -> List[float]:
+        """Latencies in the current window."""
+        with self._lock:
+            return list(self._latencies)
+
+    def error_rate(self) -> float:
+        """Fraction of failed requests in the current window."""
+        with self._lock:
+            return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters and latency percentiles (in seconds)."""
+        latencies = self.latencies()
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean": self.total_time / self.count if self.count else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+        }
+
+
+class RequestStats:
+    """Latency trackers keyed by operation name."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+
+    def tracker(self, name: str) -> LatencyTracker:
+        """Get (or create) the tracker for an operation."""
+        with self._lock:
+            tracker = self._trackers.get(name)
+            if tracker is None:
+                tracker = self._trackers[name] = LatencyTracker(self.window)
+            return tracker
+
+    def record(self, name: str, latency: float, error: bool = False, retries: int = 0) -> None:
+        """Record one request for an operation."""
+        self.tracker(name).record(latency, error, retries)
+
+    def summary(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Summaries for every operation, or for one operation by name."""
+        if name is not None:
+            return self.tracker(name).summary()
+        with self._lock:
+            trackers = dict(self._trackers)
+        return {key: tracker.summary() for key, tracker in sorted(trackers.items())}
+
+    def reset(self) -> None:
+        """Discard all recorded statistics."""
+        with self._lock:
+            self._trackers = {}
@@ -0,0 +1,46 @@
+"""Local token count estimates for LLM prompts."""
+
+import re
+from typing import Dict, List
+
+
+# Runs of letters or digits, or single punctuation characters
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+# Fixed per-message overhead for role and separators in chat formats
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a piece of text.
+
+    This is a local approximation of BPE tokenizers used by OpenAI and Anthropic
+    models: letter and digit runs cost roughly one token per four characters, and
+    punctuation (very common in JSON) costs a token each. It errs slightly on the
+    high side, which is what budget checks want.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    tokens = 0
+    for match in _PIECES.finditer(text):
+        piece = match.group()
+        tokens += (len(piece) + 3) // 4 if len(piece) > 1 else 1
+    return tokens
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Estimate the number of input tokens for a list of chat messages.
+
+    Args:
+        messages: Chat messages
+
+    Returns:
+        Estimated token count
+    """
+    return sum(estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
@@ -0,0 +1,226 @@
+"""Optional OpenTelemetry tracing for the agent pipeline."""
+
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, List, Sequence
+from . import __version__
+
+
+class _NoopSpan:
+    """Stands in for a span when OpenTelemetry is not installed."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# Tracer from the OpenTelemetry API (False once it turned out not to be installed)
+_tracer: Any = None
+_provider: Any = None
+
+# Called with (name, duration, self time) as each span ends; see add_span_listener
+SpanListener = Callable[[str, float, float], None]
+_listeners: List[SpanListener] = []
+
+
+class _Timing:
+    """Wall-clock timing of an open span, for span listeners."""
+
+    def __init__(self, name: str, parent: Optional["_Timing"]):
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.children = 0.0
+        self._lock = threading.Lock()
+
+    def add_child(self, duration: float) -> None:
+        with self._lock:
+            self.children += duration
+
+
+_timing: "contextvars.ContextVar[Optional[_Timing]]" = contextvars.ContextVar("span_timing",
+                                                                              default=None)
+
+
+def add_span_listener(listener: SpanListener) -> None:
+    """
+    Call ``listener(name, duration, self_time)`` whenever a span ends.
+
+    Self time excludes child spans (those on worker threads included, so it
+    can be zero for a span that only waits on parallel work). Listeners work
+    with or without OpenTelemetry.
+    """
+    _listeners.append(listener)
+
+
+def remove_span_listener(listener: SpanListener) -> None:
+    """Stop calling a listener added with ``add_span_listener``."""
+    _listeners.remove(listener)
+
+
+@contextlib.contextmanager
+def _timed(name: str) -> Iterator[None]:
+    timing = _Timing(name, _timing.get())
+    token = _timing.set(timing)
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - timing.start
+        try:
+            _timing.reset(token)
+        except ValueError:
+            # A generator span finished in a different context than it started in
+            pass
+        if timing.parent is not None:
+            timing.parent.add_child(duration)
+        for listener in list(_listeners):
+            listener(name, duration, max(duration - timing.children, 0.0))
+
+
+def _get_tracer() -> Any:
+    global _tracer
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+            # A proxy tracer: spans go to whichever provider is configured later
+            _tracer = trace.get_tracer("grafana_agent", __version__)
+        except ImportError:
+            _tracer = False
+    return _tracer or None
+
+
+@contextlib.contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Trace the block as a span, child of the current span.
+
+    Without OpenTelemetry installed (or with no tracer provider configured)
+    and without span listeners this costs next to nothing. Exceptions are
+    recorded on the span.
+
+    Args:
+        name: Span name (e.g. 'dashboard.parse')
+        attributes: Span attributes
+
+    Yields:
+        The span, for adding attributes
+    """
+    with _timed(name) if _listeners else contextlib.nullcontext():
+        tracer = _get_tracer()
+        if tracer is None:
+            yield _NOOP_SPAN
+            return
+        with tracer.start_as_current_span(name, attributes=attributes) as current:
+            yield current
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator tracing each call of a function as a span."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def tracing_enabled() -> bool:
+    """Whether ``configure_tracing`` has set up span export."""
+    return _provider is not None
+
+
+def spans_observed() -> bool:
+    """Whether spans are exported or timed by a listener."""
+    return tracing_enabled() or bool(_listeners)
+
+
+class FileSpanExporter:
+    """
+    OpenTelemetry span exporter writing finished spans to a file, one JSON object per line.
+
+    The file can be inspected directly or replayed into Tempo with an OTLP
+    collector's file receiver.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Any]) -> Any:
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        with self._lock:
+            for finished in spans:
+                self._file.write(finished.to_json(indent=None) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            self._file.flush()
+        return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def configure_tracing(trace_file: Optional[str] = None, otlp_endpoint: Optional[str] = None,
+                      service_name: str = "grafana-ai-agent") -> Any:
+    """
+    Export spans to a local file and/or an OTLP endpoint (e.g. Tempo).
+
+    Args:
+        trace_file: JSON Lines file to append finished spans to
+        otlp_endpoint: OTLP gRPC endpoint (e.g. 'http://tempo:4317')
+        service_name: ``service.name`` resource attribute
+
+    Returns:
+        The SDK tracer provider (call ``shutdown()`` to flush before exiting)
+    """
+    global _provider
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        raise ImportError("opentelemetry-sdk package is required. "
+                          "Install with: pip install opentelemetry-sdk")
+
+    provider = TracerProvider(resource=Resource.create({
+        "service.name": service_name,
+        "service.version": __version__,
+    }))
+    if trace_file:
+        # Duck-typed: FileSpanExporter does not subclass the optional SDK's SpanExporter
+        exporter: Any = FileSpanExporter(trace_file)
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    if otlp_endpoint:
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            raise ImportError("opentelemetry-exporter-otlp package is required. "
+                              "Install with: pip install opentelemetry-exporter-otlp")
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    return provider
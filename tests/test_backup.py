@@ -0,0 +1,234 @@
+"""Tests for dashboard export archives."""
+
+import pytest
+from unittest.mock import Mock
+from grafana_agent.backup import (
+    DashboardArchive, ImportItem, dashboard_hash, diff_summary, export_dashboards,
+    import_dashboards, load_import_items, normalize_dashboard
+)
+
+
+def make_grafana(dashboards, versions=None):
+    """Build a mock Grafana client serving the given dashboards by UID."""
+    client = Mock()
+    client.iter_dashboards.side_effect = lambda **kwargs: iter(
+        [{"uid": uid, "title": d["title"]} for uid, d in dashboards.items()]
+    )
+    client.get_dashboard.side_effect = lambda uid: {
+        "dashboard": dashboards[uid], "meta": {"folderUid": "f1", "folderTitle": "Team"}
+    }
+    client.get_dashboard_versions.side_effect = lambda uid, limit=1: [
+        {"version": (versions or {}).get(uid, dashboards[uid]["version"])}
+    ]
+    return client
+
+
+class TestDashboardHash:
+    """Tests for content hashing."""
+    
+    def test_ignores_id_and_version(self):
+        """Test that bookkeeping fields do not change the hash."""
+        a = {"id": 1, "version": 3, "uid": "x", "title": "A"}
+        b = {"id": 7, "version": 9, "uid": "x", "title": "A"}
+        assert dashboard_hash(a) == dashboard_hash(b)
+        assert normalize_dashboard(a) == {"uid": "x", "title": "A"}
+    
+    def test_content_changes_hash(self):
+        """Test that content changes produce a new hash."""
+        assert dashboard_hash({"title": "A"}) != dashboard_hash({"title": "B"})
+
+
+class TestDashboardArchive:
+    """Tests for the archive layout."""
+    
+    def test_put_and_get_roundtrip(self, tmp_path):
+        """Test that blobs are stored compressed under their hash."""
+        archive = DashboardArchive(str(tmp_path))
+        dashboard = {"uid": "x", "title": "A", "panels": []}
+        
+        digest = archive.put(dashboard)
+        
+        assert archive.blob_path(digest).endswith(f"{digest[:2]}/{digest}.json.gz")
+        assert archive.get(digest) == dashboard
+    
+    def test_manifest_persists(self, tmp_path):
+        """Test that the manifest is reloaded from disk."""
+        archive = DashboardArchive(str(tmp_path))
+        archive.entries["x"] = {"hash": "abc", "version": 1}
+        archive.save()
+        
+        assert DashboardArchive(str(tmp_path)).entries == {"x": {"hash": "abc", "version": 1}}
+    
+    def test_rejects_unknown_format(self, tmp_path):
+        """Test that archives from an unknown format version are refused."""
+        (tmp_path / "manifest.json").write_text('{"format": 99, "dashboards": {}}')
+        with pytest.raises(ValueError):
+            DashboardArchive(str(tmp_path))
+
+
+class TestExportDashboards:
+    """Tests for exporting dashboards."""
+    
+    def test_exports_all_dashboards(self, tmp_path):
+        """Test that every dashboard is downloaded and recorded in the manifest."""
+        dashboards = {
+            "a": {"uid": "a", "title": "A", "version": 1},
+            "b": {"uid": "b", "title": "B", "version": 4},
+        }
+        client = make_grafana(dashboards)
+        archive = DashboardArchive(str(tmp_path))
+        
+        result = export_dashboards(client, archive, max_workers=2)
+        
+        assert result.downloaded == 2 and result.ok
+        entry = DashboardArchive(str(tmp_path)).entries["b"]
+        assert entry["version"] == 4
+        assert entry["folder_title"] == "Team"
+        assert archive.get(entry["hash"])["title"] == "B"
+        client.get_dashboard_versions.assert_not_called()
+    
+    def test_rerun_skips_unchanged_versions(self, tmp_path):
+        """Test that only dashboards with a new version are downloaded again."""
+        dashboards = {
+            "a": {"uid": "a", "title": "A", "version": 1},
+            "b": {"uid": "b", "title": "B", "version": 1},
+        }
+        export_dashboards(make_grafana(dashboards), DashboardArchive(str(tmp_path)))
+        
+        dashboards["b"] = {"uid": "b", "title": "B2", "version": 2}
+        client = make_grafana(dashboards)
+        result = export_dashboards(client, DashboardArchive(str(tmp_path)))
+        
+        assert result.downloaded == 1
+        assert result.unchanged == 1
+        client.get_dashboard.assert_called_once_with("b")
+    
+    def test_version_lookup_failure_downloads_dashboard(self, tmp_path):
+        """Test dashboards are downloaded in full when their versions cannot be listed."""
+        dashboards = {"a": {"uid": "a", "title": "A", "version": 1}}
+        export_dashboards(make_grafana(dashboards), DashboardArchive(str(tmp_path)))
+        
+        client = make_grafana(dashboards)
+        client.get_dashboard_versions.side_effect = RuntimeError("403 Forbidden")
+        result = export_dashboards(client, DashboardArchive(str(tmp_path)))
+        
+        assert result.ok
+        assert result.downloaded == 1
+        client.get_dashboard.assert_called_once_with("a")
+    
+    def test_removed_dashboards_dropped_from_manifest(self, tmp_path):
+        """Test that dashboards deleted from Grafana leave the manifest."""
+        dashboards = {"a": {"uid": "a", "title": "A", "version": 1}}
+        export_dashboards(make_grafana(dashboards), DashboardArchive(str(tmp_path)))
+        
+        result = export_dashboards(make_grafana({}), DashboardArchive(str(tmp_path)))
+        
+        assert result.removed == 1
+        assert DashboardArchive(str(tmp_path)).entries == {}
+    
+    def test_failures_reported_per_dashboard(self, tmp_path):
+        """Test that a failed download is recorded without aborting the export."""
+        dashboards = {
+            "a": {"uid": "a", "title": "A", "version": 1},
+            "b": {"uid": "b", "title": "B", "version": 1},
+        }
+        client = make_grafana(dashboards)
+        fetch = client.get_dashboard.side_effect
+        
+        def flaky(uid):
+            if uid == "b":
+                raise RuntimeError("boom")
+            return fetch(uid)
+        client.get_dashboard.side_effect = flaky
+        
+        result = export_dashboards(client, DashboardArchive(str(tmp_path)))
+        
+        assert result.downloaded == 1
+        assert result.errors == {"b": "boom"}
+        assert list(DashboardArchive(str(tmp_path)).entries) == ["a"]
+
+
+def not_found():
+    """Build an HTTP 404 error like requests raises."""
+    import requests
+    response = Mock()
+    response.status_code = 404
+    return requests.HTTPError("404 Not Found", response=response)
+
+
+class TestImportDashboards:
+    """Tests for importing dashboards."""
+    
+    def make_client(self, existing):
+        client = Mock()
+        
+        def get_dashboard(uid):
+            if uid not in existing:
+                raise not_found()
+            return {"dashboard": existing[uid]}
+        client.get_dashboard.side_effect = get_dashboard
+        return client
+    
+    def test_uploads_only_changed_dashboards(self):
+        """Test that unchanged dashboards are skipped and the rest uploaded."""
+        client = self.make_client({
+            "same": {"id": 3, "uid": "same", "title": "Same", "version": 5},
+            "old": {"id": 4, "uid": "old", "title": "Old", "version": 2},
+        })
+        items = [
+            ImportItem("same.json", {"uid": "same", "title": "Same", "version": 1}),
+            ImportItem("old.json", {"uid": "old", "title": "New title"}, folder_uid="team"),
+            ImportItem("new.json", {"uid": "new", "title": "New", "panels": [{"title": "p"}]}),
+        ]
+        
+        result = import_dashboards(client, items, max_workers=2)
+        
+        assert (result.created, result.updated, result.unchanged) == (1, 1, 1)
+        assert result.changes["old.json"] == "update: title"
+        assert client.create_dashboard.call_count == 2
+        uploaded = {c[0][0]["uid"]: c for c in client.create_dashboard.call_args_list}
+        assert uploaded["old"][0][0]["id"] is None
+        assert uploaded["old"][1]["folder_uid"] == "team"
+        assert uploaded["old"][1]["overwrite"] is True
+    
+    def test_dry_run_does_not_upload(self):
+        """Test that a dry run reports changes without writing."""
+        client = self.make_client({})
+        items = [ImportItem("a.json", {"uid": "a", "title": "A"})]
+        
+        result = import_dashboards(client, items, dry_run=True)
+        
+        assert result.created == 1
+        assert result.changes == {"a.json": "create: 0 panels"}
+        client.create_dashboard.assert_not_called()
+    
+    def test_lookup_errors_reported(self):
+        """Test that errors other than 404 fail the dashboard instead of creating it."""
+        client = Mock()
+        client.get_dashboard.side_effect = RuntimeError("unavailable")
+        
+        result = import_dashboards(client, [ImportItem("a.json", {"uid": "a"})])
+        
+        assert result.errors == {"a.json": "unavailable"}
+        client.create_dashboard.assert_not_called()
+    
+    def test_diff_summary(self):
+        """Test the one-line change description."""
+        old = {"title": "A", "panels": [{"title": "cpu"}, {"title": "mem"}]}
+        new = {"title": "B", "panels": [{"title": "cpu", "type": "stat"}, {"title": "disk"}]}
+        assert diff_summary(old, new) == "title; panels +1 -1 ~1"
+    
+    def test_load_from_archive_and_directory(self, tmp_path):
+        """Test loading import items from an archive and from JSON files."""
+        archive = DashboardArchive(str(tmp_path / "archive"))
+        archive.entries["a"] = {"hash": archive.put({"uid": "a"}), "folder_uid": "f"}
+        archive.save()
+        files = tmp_path / "files"
+        files.mkdir()
+        (files / "b.json").write_text('{"dashboard": {"uid": "b"}, "meta": {"folderUid": "g"}}')
+        
+        from_archive = load_import_items(str(tmp_path / "archive"))
+        from_files = load_import_items(str(files))
+        
+        assert [(i.source, i.dashboard, i.folder_uid) for i in from_archive] == [("a", {"uid": "a"}, "f")]
+        assert [(i.source, i.dashboard, i.folder_uid) for i in from_files] == [("b.json", {"uid": "b"}, "g")]
@@ -0,0 +1,128 @@
+"""Tests for batch dashboard generation."""
+
+import json
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from grafana_agent.batch import BatchItem, load_batch_items, run_batch
+from grafana_agent.dashboard_generator import DashboardGenerator
+
+
+class TestLoadBatchItems:
+    """Tests for loading batch files."""
+    
+    def test_load_jsonl(self, tmp_path):
+        """Test loading a JSONL batch file."""
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text(
+            json.dumps({"description": "CPU usage", "title": "CPU"}) + "\n"
+            + "\n"
+            + json.dumps("Memory usage") + "\n"
+        )
+        
+        items = load_batch_items(str(batch_file))
+        
+        assert len(items) == 2
+        assert items[0].description == "CPU usage"
+        assert items[0].title == "CPU"
+        assert items[1].description == "Memory usage"
+        assert items[1].index == 1
+    
+    def test_load_json_with_dashboards_key(self, tmp_path):
+        """Test loading a JSON object with a dashboards list."""
+        batch_file = tmp_path / "batch.json"
+        batch_file.write_text(json.dumps({"dashboards": [{"description": "Disk", "name": "disk"}]}))
+        
+        items = load_batch_items(str(batch_file))
+        
+        assert items[0].output_name == "disk"
+    
+    def test_load_yaml(self, tmp_path):
+        """Test loading a YAML batch file."""
+        pytest.importorskip("yaml")
+        batch_file = tmp_path / "batch.yaml"
+        batch_file.write_text("- description: Network traffic\n  title: Network\n")
+        
+        items = load_batch_items(str(batch_file))
+        
+        assert items[0].title == "Network"
+    
+    def test_load_invalid_entry(self, tmp_path):
+        """Test error for entries without a description."""
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text(json.dumps({"title": "No description"}) + "\n")
+        
+        with pytest.raises(ValueError, match="must be a string or an object"):
+            load_batch_items(str(batch_file))
+    
+    def test_load_duplicate_names(self, tmp_path):
+        """Test error for entries that would overwrite each other's output file."""
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text(json.dumps({"description": "CPU", "name": "Team A"}) + "\n"
+                              + json.dumps({"description": "Memory", "name": "team-a"}) + "\n")
+        
+        with pytest.raises(ValueError, match="entries 0 and 1 have the same name: team-a"):
+            load_batch_items(str(batch_file))
+    
+    def test_output_name_is_slugified(self):
+        """Test output file names are derived from title or description."""
+        item = BatchItem(index=3, description="desc", title="My Team / Latency!")
+        assert item.output_name == "0003-my-team-latency"
+
+
+class TestRunBatch:
+    """Tests for running batches."""
+    
+    def test_run_batch_reports_per_item_failures(self, mock_llm_client):
+        """Test that one failing item does not stop the batch."""
+        def chat(messages, **kwargs):
+            if "broken" in messages[1]["content"]:
+                raise RuntimeError("LLM failure")
+            return json.dumps({"title": "Generated", "panels": []})
+        
+        mock_llm_client.chat.side_effect = chat
+        generator = DashboardGenerator(mock_llm_client)
+        items = [BatchItem(0, "good"), BatchItem(1, "broken"), BatchItem(2, "also good")]
+        
+        results = sorted(run_batch(generator, items, max_workers=2), key=lambda r: r.item.index)
+        
+        assert [r.ok for r in results] == [True, False, True]
+        assert results[1].error == "LLM failure"
+        assert results[0].dashboard["dashboard"]["title"] == "Generated"
+        assert results[1].to_record()["status"] == "error"
+    
+    def test_run_batch_bounds_parallelism(self):
+        """Test that no more than max_workers generations run at once."""
+        lock = threading.Lock()
+        state = {"in_flight": 0, "peak": 0}
+        
+        def create_dashboard(description, title):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+            time.sleep(0.02)
+            with lock:
+                state["in_flight"] -= 1
+            return {"dashboard": {"title": description}}
+        
+        generator = Mock()
+        generator.create_dashboard.side_effect = create_dashboard
+        items = [BatchItem(i, f"item {i}") for i in range(8)]
+        
+        results = list(run_batch(generator, items, max_workers=3))
+        
+        assert len(results) == 8
+        assert state["peak"] <= 3
+    
+    def test_stopping_early_skips_queued_items(self):
+        """Test closing the result iterator does not generate the rest of the batch."""
+        generator = Mock()
+        generator.create_dashboard.side_effect = lambda description, title: {"dashboard": {"title": description}}
+        items = [BatchItem(i, f"item {i}") for i in range(100)]
+        
+        results = run_batch(generator, items, max_workers=2)
+        next(results)
+        results.close()
+        
+        assert generator.create_dashboard.call_count <= 5
@@ -0,0 +1,162 @@
+"""Tests for LLM response caching."""
+
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from grafana_agent.cache import make_cache_key, MemoryCache, SQLiteCache, CachedLLMClient
+from grafana_agent.dashboard_generator import DashboardGenerator
+
+
+MESSAGES = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+
+
+class TestMakeCacheKey:
+    """Tests for cache key generation."""
+    
+    def test_key_is_stable(self):
+        """Test that identical requests produce identical keys."""
+        key1 = make_cache_key("openai", "gpt-4", MESSAGES, temperature=0.3)
+        key2 = make_cache_key("openai", "gpt-4", [dict(m) for m in MESSAGES], temperature=0.3)
+        assert key1 == key2
+    
+    def test_key_depends_on_all_inputs(self):
+        """Test that provider, model, temperature and messages all change the key."""
+        base = make_cache_key("openai", "gpt-4", MESSAGES, temperature=0.3)
+        assert make_cache_key("anthropic", "gpt-4", MESSAGES, temperature=0.3) != base
+        assert make_cache_key("openai", "gpt-4o", MESSAGES, temperature=0.3) != base
+        assert make_cache_key("openai", "gpt-4", MESSAGES, temperature=0.7) != base
+        assert make_cache_key("openai", "gpt-4", MESSAGES[:1], temperature=0.3) != base
+
+
+class TestMemoryCache:
+    """Tests for the in-memory LRU cache."""
+    
+    def test_get_and_set(self):
+        """Test basic storage and hit/miss counters."""
+        cache = MemoryCache()
+        assert cache.get("k") is None
+        cache.set("k", "v")
+        assert cache.get("k") == "v"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_counters_are_thread_safe(self):
+        """Test concurrent lookups are all counted."""
+        cache = MemoryCache()
+        cache.set("k", "v")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: cache.get("k" if i % 2 else "missing"), range(4000)))
+        assert (cache.hits, cache.misses) == (2000, 2000)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.evictions == 1
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are not returned."""
+        cache = MemoryCache(ttl=10)
+        with patch("grafana_agent.cache.time.time", return_value=1000.0):
+            cache.set("k", "v")
+        with patch("grafana_agent.cache.time.time", return_value=1011.0):
+            assert cache.get("k") is None
+        assert len(cache) == 0
+
+
+class TestSQLiteCache:
+    """Tests for the on-disk SQLite cache."""
+    
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        path = str(tmp_path / "cache.sqlite")
+        cache = SQLiteCache(path)
+        cache.set("k", "v")
+        cache.close()
+        
+        assert SQLiteCache(path).get("k") == "v"
+    
+    def test_size_eviction(self, tmp_path):
+        """Test that the oldest accessed entries are evicted beyond max_entries."""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+        with patch("grafana_agent.cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.set("a", "1")
+            cache.set("b", "2")
+            cache.get("a")
+            cache.set("c", "3")
+        
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+    
+    def test_ttl_expiry(self, tmp_path):
+        """Test that expired entries are removed on lookup."""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=5)
+        with patch("grafana_agent.cache.time.time", return_value=100.0):
+            cache.set("k", "v")
+        with patch("grafana_agent.cache.time.time", return_value=106.0):
+            assert cache.get("k") is None
+
+
+class TestCachedLLMClient:
+    """Tests for the caching client wrapper."""
+    
+    def test_repeated_request_served_from_cache(self, mock_llm_client):
+        """Test that identical requests only hit the LLM once."""
+        mock_llm_client.chat.return_value = "response"
+        client = CachedLLMClient(mock_llm_client, provider="openai", model="gpt-4")
+        
+        assert client.chat(MESSAGES, temperature=0.3) == "response"
+        assert client.chat(MESSAGES, temperature=0.3) == "response"
+        
+        mock_llm_client.chat.assert_called_once()
+        assert client.cache.stats()["hits"] == 1
+    
+    def test_different_temperature_misses(self, mock_llm_client):
+        """Test that changing request parameters bypasses the cached entry."""
+        mock_llm_client.chat.return_value = "response"
+        client = CachedLLMClient(mock_llm_client, provider="openai", model="gpt-4")
+        
+        client.chat(MESSAGES, temperature=0.3)
+        client.chat(MESSAGES, temperature=0.7)
+        
+        assert mock_llm_client.chat.call_count == 2
+    
+    def test_dashboard_generator_with_cache(self, mock_llm_client):
+        """Test re-running the same generation does not call the LLM again."""
+        mock_llm_client.chat.return_value = json.dumps({"title": "Cached", "panels": []})
+        generator = DashboardGenerator(CachedLLMClient(mock_llm_client, provider="openai", model="gpt-4"))
+        
+        first = generator.create_dashboard("CPU dashboard")
+        second = generator.create_dashboard("CPU dashboard")
+        
+        assert first == second
+        mock_llm_client.chat.assert_called_once()
+
+    def test_stream_chat_caches_full_response(self, mock_llm_client):
+        """Test that a streamed response is cached and replayed."""
+        mock_llm_client.stream_chat.return_value = iter(["a", "b"])
+        client = CachedLLMClient(mock_llm_client, provider="openai", model="gpt-4")
+        
+        assert list(client.stream_chat(MESSAGES)) == ["a", "b"]
+        assert list(client.stream_chat(MESSAGES)) == ["ab"]
+        mock_llm_client.stream_chat.assert_called_once()
+
+    def test_empty_response_not_cached(self, mock_llm_client):
+        """Test that empty responses are retried instead of replayed from the cache."""
+        mock_llm_client.chat.side_effect = ["", "response"]
+        mock_llm_client.stream_chat.side_effect = [iter([]), iter(["a"])]
+        client = CachedLLMClient(mock_llm_client, provider="openai", model="gpt-4")
+        
+        assert client.chat(MESSAGES) == ""
+        assert client.chat(MESSAGES) == "response"
+        assert list(client.stream_chat(MESSAGES, stream=True)) == []
+        assert list(client.stream_chat(MESSAGES, stream=True)) == ["a"]
+        assert len(client.cache) == 2
@@ -115,3 +115,84 @@ class TestChatInterface:
         
         assert len(interface.conversation_history) == 0
 
+
+    @pytest.mark.asyncio
+    async def test_achat(self, mock_llm_client):
+        """Test async chat keeps conversation history."""
+        mock_llm_client.chat.return_value = "Async hello"
+        
+        interface = ChatInterface(mock_llm_client)
+        response = await interface.achat("Hello")
+        
+        assert response == "Async hello"
+        assert interface.conversation_history == [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Async hello"}
+        ]
+
+    def test_stream_chat(self, mock_llm_client):
+        """Test streaming chat yields chunks and records the full response."""
+        mock_llm_client.stream_chat.return_value = iter(["Hel", "lo"])
+        
+        interface = ChatInterface(mock_llm_client)
+        chunks = list(interface.stream_chat("Hi"))
+        
+        assert chunks == ["Hel", "lo"]
+        assert interface.conversation_history[-1] == {"role": "assistant", "content": "Hello"}
+
+    def test_stream_chat_failure_keeps_history_clean(self, mock_llm_client):
+        """Test that a stream failing before any text leaves no half-recorded turn."""
+        mock_llm_client.stream_chat.side_effect = RuntimeError("stream failed")
+        
+        interface = ChatInterface(mock_llm_client)
+        with pytest.raises(RuntimeError):
+            list(interface.stream_chat("Hi"))
+        
+        assert interface.conversation_history == []
+        
+        # The next turn is sent without an empty assistant reply in between
+        mock_llm_client.stream_chat.side_effect = None
+        mock_llm_client.stream_chat.return_value = iter(["Hello"])
+        assert list(interface.stream_chat("Hi again")) == ["Hello"]
+        assert interface.conversation_history == [
+            {"role": "user", "content": "Hi again"},
+            {"role": "assistant", "content": "Hello"}
+        ]
+
+    def test_stream_chat_partial_failure_keeps_text(self, mock_llm_client):
+        """Test that text received before a stream failure is still recorded."""
+        def broken_stream(*args, **kwargs):
+            yield "Hel"
+            raise RuntimeError("stream failed")
+        mock_llm_client.stream_chat.side_effect = broken_stream
+        
+        interface = ChatInterface(mock_llm_client)
+        with pytest.raises(RuntimeError):
+            list(interface.stream_chat("Hi"))
+        
+        assert interface.conversation_history[-1] == {"role": "assistant", "content": "Hel"}
+
+    def test_chat_failure_drops_user_turn(self, mock_llm_client):
+        """Test that a failed chat call does not leave the user message behind."""
+        mock_llm_client.chat.side_effect = RuntimeError("backend down")
+        
+        interface = ChatInterface(mock_llm_client)
+        with pytest.raises(RuntimeError):
+            interface.chat("Hi")
+        
+        assert interface.conversation_history == []
+
+    def test_chat_history_bounded_by_memory(self, mock_llm_client):
+        """Test that long sessions keep the request within the memory budget."""
+        from grafana_agent.memory import ConversationMemory
+        from grafana_agent.tokens import estimate_message_tokens
+        mock_llm_client.chat.return_value = "word " * 100
+        
+        interface = ChatInterface(mock_llm_client, memory=ConversationMemory(token_budget=1000))
+        for i in range(20):
+            interface.chat(f"message {i}")
+        
+        messages = mock_llm_client.chat.call_args[0][0]
+        assert estimate_message_tokens(messages) <= 1000
+        assert messages[-1]["content"] == "message 19"
+        assert len(interface.conversation_history) < 40
@@ -1,9 +1,21 @@
 """Tests for CLI interface."""
 
+import json
+import os
+import re
+import subprocess
+import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from click.testing import CliRunner
 from grafana_agent.cli import cli
+from grafana_agent.dashboard_generator import DashboardGenerator
+
+
+@pytest.fixture(autouse=True)
+def no_running_daemon(monkeypatch, tmp_path):
+    """Point the CLI at a socket no daemon listens on, so commands run locally and hit their mocks."""
+    monkeypatch.setenv("GRAFANA_AGENT_SOCKET", str(tmp_path / "agent.sock"))
 
 
 class TestCLI:
@@ -95,7 +107,7 @@ class TestCLI:
         mock_get_llm.return_value = mock_llm
         
         mock_generator = Mock()
-        mock_generator.summarize_dashboard.return_value = "Test summary"
+        mock_generator.stream_summarize_dashboard.return_value = iter(["Test ", "summary"])
         mock_generator_class.return_value = mock_generator
         
         # Create a test dashboard file
@@ -108,9 +120,57 @@ class TestCLI:
             str(test_file)
         ])
         
+        assert result.exit_code == 0
+        assert "Test summary" in result.output
+        mock_generator.stream_summarize_dashboard.assert_called_once()
+    
+    @patch('grafana_agent.cli._forward', return_value="Summary from the daemon")
+    def test_daemon_gets_absolute_paths(self, mock_forward, tmp_path, monkeypatch):
+        """Test relative paths are resolved before they are sent to the daemon."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "dashboard.json").write_text('{"title": "Test Dashboard", "panels": []}')
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['summarize', 'dashboard.json', '--cache-dir', '.cache'])
+        
+        assert result.exit_code == 0, result.output
+        params = mock_forward.call_args[0][1]
+        assert params['path'] == os.path.join(os.getcwd(), 'dashboard.json')
+        assert params['cache_dir'] == os.path.join(os.getcwd(), '.cache')
+    
+    @patch('grafana_agent.cli.get_llm_client')
+    @patch('grafana_agent.cli.DashboardGenerator')
+    def test_summarize_command_no_stream(self, mock_generator_class, mock_get_llm, tmp_path):
+        """Test summarize command without streaming."""
+        mock_generator = Mock()
+        mock_generator.summarize_dashboard.return_value = "Test summary"
+        mock_generator_class.return_value = mock_generator
+        
+        test_file = tmp_path / "test_dashboard.json"
+        test_file.write_text('{"title": "Test Dashboard", "panels": []}')
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['summarize', str(test_file), '--no-stream'])
+        
         assert result.exit_code == 0
         assert "Test summary" in result.output
         mock_generator.summarize_dashboard.assert_called_once()
+        mock_generator.stream_summarize_dashboard.assert_not_called()
+    
+    @patch('grafana_agent.cli.get_llm_client')
+    @patch('grafana_agent.cli.ChatInterface')
+    def test_chat_streams_response(self, mock_chat_interface_class, mock_get_llm):
+        """Test that regular chat messages are streamed to the terminal."""
+        mock_interface = Mock()
+        mock_interface.stream_chat.return_value = iter(["Hel", "lo!"])
+        mock_chat_interface_class.return_value = mock_interface
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['chat'], input="hi\nexit\n")
+        
+        assert result.exit_code == 0
+        assert "Hello!" in result.output
+        mock_interface.stream_chat.assert_called_once_with("hi")
     
     @patch('grafana_agent.cli.get_llm_client')
     def test_create_command_missing_llm(self, mock_get_llm):
@@ -136,3 +196,179 @@ class TestCLI:
         # Click returns exit code 2 for invalid file path (exists=True validation)
         assert result.exit_code == 2
 
+
+    @patch('grafana_agent.cli.get_llm_client')
+    @patch('grafana_agent.cli.DashboardGenerator')
+    def test_create_batch_command(self, mock_generator_class, mock_get_llm, tmp_path):
+        """Test create-batch writes dashboards and per-item results."""
+        import json
+        mock_generator = Mock()
+        mock_generator.create_dashboard.side_effect = [
+            {"dashboard": {"title": "A", "panels": []}},
+            RuntimeError("generation failed"),
+        ]
+        mock_generator_class.return_value = mock_generator
+        
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text('{"description": "first", "name": "first"}\n'
+                              '{"description": "second", "name": "second"}\n')
+        output_dir = tmp_path / "out"
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            'create-batch', str(batch_file), '--output-dir', str(output_dir), '--workers', '1'
+        ])
+        
+        assert result.exit_code == 1
+        assert (output_dir / "first.json").exists()
+        assert not (output_dir / "second.json").exists()
+        records = [json.loads(line) for line in (output_dir / "results.jsonl").read_text().splitlines()]
+        assert [r["status"] for r in records] == ["ok", "error"]
+        assert "1/2 dashboards generated" in result.output
+    
+    def test_create_batch_rate_limits(self, tmp_path):
+        """Test --rpm/--tpm wrap the LLM client in a rate-limited client."""
+        from grafana_agent.llm_client import RateLimitedLLMClient
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text('{"description": "first"}\n')
+        
+        runner = CliRunner()
+        with patch('grafana_agent.cli.DashboardGenerator', wraps=DashboardGenerator) as generator_class:
+            result = runner.invoke(cli, [
+                'create-batch', str(batch_file), '--output-dir', str(tmp_path / "out"),
+                '--provider', 'fake', '--rpm', '600', '--tpm', '100000'
+            ])
+        
+        assert result.exit_code == 0, result.output
+        llm_client = generator_class.call_args[0][0]
+        assert isinstance(llm_client, RateLimitedLLMClient)
+        assert llm_client.scheduler.stats()["fake/fake"]["granted"] == 1
+        # Deadlines and retries apply by default, beneath the rate limiter
+        assert (llm_client.llm_client.timeout, llm_client.llm_client.max_retries) == (120.0, 2)
+    
+    @patch('grafana_agent.cli.configure_tracing')
+    def test_trace_file_option(self, mock_configure, tmp_path):
+        """Test --trace-file configures span export and flushes it when the command ends."""
+        trace_file = str(tmp_path / "spans.jsonl")
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            '--trace-file', trace_file, 'create', 'CPU usage', '--provider', 'fake', '--no-daemon',
+            '--output', str(tmp_path / "dashboard.json")
+        ])
+        
+        assert result.exit_code == 0, result.output
+        mock_configure.assert_called_once_with(trace_file, None)
+        mock_configure.return_value.shutdown.assert_called_once()
+
+    def test_profile_option(self, tmp_path):
+        """Test --profile writes a report with the command's phases and a CPU profile."""
+        profile = tmp_path / "profile.json"
+
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            '--profile', str(profile), '--profile-cpu', 'cprofile', 'create', 'CPU usage',
+            '--provider', 'fake', '--no-daemon', '--output', str(tmp_path / "dashboard.json")
+        ])
+
+        assert result.exit_code == 0, result.output
+        report = json.loads(profile.read_text())
+        assert report["command"] == "create"
+        assert {"cli.create", "dashboard.create", "llm.chat", "dashboard.save"} <= set(report["phases"])
+        assert (tmp_path / "profile.prof").exists()
+
+    def test_create_batch_llm_log(self, tmp_path):
+        """Test --llm-log writes one record per LLM call and reports the cost."""
+        batch_file = tmp_path / "batch.jsonl"
+        batch_file.write_text('{"description": "first"}\n{"description": "second"}\n')
+        llm_log = tmp_path / "calls.jsonl"
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            'create-batch', str(batch_file), '--output-dir', str(tmp_path / "out"),
+            '--provider', 'fake', '--llm-log', str(llm_log)
+        ])
+        
+        assert result.exit_code == 0, result.output
+        records = [json.loads(line) for line in llm_log.read_text().splitlines()]
+        assert [record["task"] for record in records] == ["create_dashboard"] * 2
+        assert "Estimated LLM cost: $0.0000" in result.output
+    
+    @patch('grafana_agent.backup.export_dashboards')
+    @patch('grafana_agent.grafana_client.GrafanaClient')
+    def test_export_command(self, mock_grafana_class, mock_export, tmp_path):
+        """Test export reports counts and sizes the connection pool to the workers."""
+        from grafana_agent.backup import ExportResult
+        mock_export.return_value = ExportResult(downloaded=3, unchanged=2)
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            'export', str(tmp_path / "backup"), '--grafana-url', 'http://grafana:3000',
+            '--grafana-api-key', 'key', '--workers', '4'
+        ])
+        
+        assert result.exit_code == 0
+        assert "3 downloaded, 2 unchanged" in result.output
+        assert mock_grafana_class.call_args[1]["pool_maxsize"] == 4
+        assert mock_export.call_args[1]["max_workers"] == 4
+    
+    def test_export_requires_grafana_url(self, tmp_path):
+        """Test export fails without a Grafana URL."""
+        runner = CliRunner()
+        result = runner.invoke(cli, ['export', str(tmp_path)], env={"GRAFANA_URL": ""})
+        
+        assert result.exit_code == 1
+    
+    @patch('grafana_agent.grafana_client.GrafanaClient')
+    def test_import_dry_run(self, mock_grafana_class, tmp_path):
+        """Test import --dry-run reports planned changes without uploading."""
+        (tmp_path / "a.json").write_text('{"uid": "a", "title": "A"}')
+        mock_grafana = Mock()
+        mock_grafana.get_dashboard.return_value = {"dashboard": {"uid": "a", "title": "Old"}}
+        mock_grafana_class.return_value = mock_grafana
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, [
+            'import', str(tmp_path), '--grafana-url', 'http://grafana:3000',
+            '--grafana-api-key', 'key', '--dry-run'
+        ])
+        
+        assert result.exit_code == 0
+        assert "a.json: would update (title)" in result.output
+        assert "1 to update" in result.output
+        mock_grafana.create_dashboard.assert_not_called()
+
+
+# Modules the CLI must not load until a command actually needs them
+HEAVY_MODULES = ["requests", "urllib3", "asyncio", "sqlite3", "openai", "anthropic", "httpx", "yaml"]
+
+# Budget for `import grafana_agent.cli` itself, excluding interpreter startup
+IMPORT_BUDGET_US = 150_000
+
+
+def run_python(code, *flags):
+    """Run code in a fresh interpreter from the repository root."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=root,
+                          capture_output=True, text=True, check=True)
+
+
+class TestCLIStartup:
+    """Import-time regression tests for CLI startup."""
+    
+    def test_heavy_modules_not_imported(self):
+        """Test that importing the CLI loads no HTTP, async, database or SDK modules."""
+        result = run_python(
+            "import sys, grafana_agent.cli; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        assert result.stdout.strip() == ""
+    
+    @pytest.mark.slow
+    def test_import_time_budget(self):
+        """Test that importing the CLI stays within the startup budget."""
+        result = run_python("import grafana_agent.cli", "-X", "importtime")
+        timings = [re.match(r"import time:\s+\d+ \|\s+(\d+) \| grafana_agent\.cli$", line)
+                   for line in result.stderr.splitlines()]
+        cumulative = next(int(m.group(1)) for m in timings if m)
+        assert cumulative < IMPORT_BUDGET_US, f"import grafana_agent.cli took {cumulative / 1000:.0f} ms"
@@ -0,0 +1,203 @@
+"""Tests for compact dashboard encoding."""
+
+import json
+import pytest
+from grafana_agent.compaction import compact_dashboard, encode_dashboard, split_dashboard
+from grafana_agent.tokens import estimate_tokens, estimate_message_tokens
+
+
+def make_panel(index, expr="rate(http_requests_total[5m])"):
+    return {
+        "id": index,
+        "title": f"Panel {index}",
+        "type": "timeseries",
+        "gridPos": {"h": 8, "w": 12, "x": 0, "y": index * 8},
+        "pluginVersion": "10.2.0",
+        "datasource": {"type": "prometheus", "uid": "prom"},
+        "fieldConfig": {
+            "defaults": {
+                "unit": "reqps",
+                "custom": {"drawStyle": "line", "lineWidth": 1, "fillOpacity": 10,
+                           "hideFrom": {"legend": False, "tooltip": False, "viz": False}},
+                "thresholds": {"mode": "absolute", "steps": [{"color": "green", "value": None},
+                                                             {"color": "red", "value": 80}]},
+            },
+            "overrides": [],
+        },
+        "options": {"legend": {"displayMode": "list", "placement": "bottom"},
+                    "tooltip": {"mode": "single"}},
+        "targets": [{"refId": "A", "expr": expr, "legendFormat": "__auto",
+                     "datasource": {"type": "prometheus", "uid": "prom"}, "editorMode": "code"}],
+    }
+
+
+def make_dashboard(panel_count):
+    return {
+        "dashboard": {
+            "id": 42,
+            "uid": "svc",
+            "title": "Service Overview",
+            "tags": ["prod"],
+            "version": 17,
+            "templating": {"list": [{"name": "job", "type": "query", "query": "label_values(job)"}]},
+            "panels": [make_panel(i, expr=f"rate(http_requests_total{{code=\"{i}\"}}[5m])")
+                       for i in range(panel_count)],
+        },
+        "meta": {"folderTitle": "Platform"},
+    }
+
+
+class TestTokens:
+    """Tests for local token estimates."""
+    
+    def test_estimate_tokens(self):
+        """Test that estimates grow with text length and count punctuation."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("hello") == 2
+        assert estimate_tokens('{"a":1}') == 7
+        assert estimate_tokens("word " * 100) == 100
+    
+    def test_estimate_message_tokens(self):
+        """Test message overhead is included."""
+        messages = [{"role": "system", "content": "hi"}, {"role": "user", "content": "there"}]
+        assert estimate_message_tokens(messages) == 1 + 2 + 8
+
+
+class TestCompactDashboard:
+    """Tests for dashboard compaction."""
+    
+    def test_strips_noise_and_keeps_meaning(self):
+        """Test layout and defaults are removed while queries and units are kept."""
+        compact = compact_dashboard(make_dashboard(1))
+        panel = compact["panels"][0]
+        
+        assert compact["title"] == "Service Overview"
+        assert compact["folder"] == "Platform"
+        assert compact["variables"] == [{"name": "job", "type": "query", "query": "label_values(job)"}]
+        assert "id" not in compact and "version" not in compact
+        assert panel["unit"] == "reqps"
+        assert panel["thresholds"] == [80]
+        assert panel["datasource"] == "prometheus:prom"
+        assert panel["targets"] == [{"query": 'rate(http_requests_total{code="0"}[5m])'}]
+        for noise in ("gridPos", "pluginVersion", "options", "fieldConfig", "id"):
+            assert noise not in panel
+    
+    def test_dedupes_repeated_panel_config(self):
+        """Test identical configuration is replaced with a reference."""
+        compact = compact_dashboard(make_dashboard(3))
+        
+        assert "same_config_as" not in compact["panels"][0]
+        assert compact["panels"][1]["same_config_as"] == "Panel 0"
+        assert "unit" not in compact["panels"][1]
+        assert compact["panels"][2]["targets"][0]["query"].endswith('{code="2"}[5m])')
+    
+    def test_rows_keep_nested_panels(self):
+        """Test collapsed rows keep their panels."""
+        dashboard = {"title": "Rows", "panels": [
+            {"type": "row", "title": "Row A", "collapsed": True, "panels": [make_panel(1)]}
+        ]}
+        
+        compact = compact_dashboard(dashboard)
+        
+        assert compact["panels"][0]["collapsed"] is True
+        assert compact["panels"][0]["panels"][0]["title"] == "Panel 1"
+    
+    def test_much_smaller_than_indented_json(self):
+        """Test the compact encoding is a fraction of the original size."""
+        dashboard = make_dashboard(50)
+        original = estimate_tokens(json.dumps(dashboard, indent=2))
+        compact = estimate_tokens(encode_dashboard(dashboard))
+        assert compact < original / 3
+
+
+class TestEncodeDashboard:
+    """Tests for token-budgeted encoding."""
+    
+    @pytest.mark.parametrize("budget", [2000, 800, 300, 120])
+    def test_respects_budget(self, budget):
+        """Test the encoded dashboard fits the budget at every level of detail."""
+        encoded = encode_dashboard(make_dashboard(200), token_budget=budget)
+        
+        assert estimate_tokens(encoded) <= budget
+        assert json.loads(encoded)["title"] == "Service Overview"
+    
+    def test_truncation_reports_omitted_panels(self):
+        """Test the panel list is truncated with a count of omitted panels."""
+        decoded = json.loads(encode_dashboard(make_dashboard(200), token_budget=120))
+        
+        assert decoded["omitted_panels"] + len(decoded["panels"]) == 200
+    
+    def test_no_budget_returns_full_compact(self):
+        """Test no truncation happens without a budget."""
+        decoded = json.loads(encode_dashboard(make_dashboard(5)))
+        assert len(decoded["panels"]) == 5
+        assert "omitted_panels" not in decoded
+
+
+class TestSplitDashboard:
+    """Tests for splitting dashboards into chunks."""
+    
+    def test_chunks_fit_budget_and_cover_all_panels(self):
+        """Test every panel lands in exactly one chunk within the budget."""
+        header, chunks = split_dashboard(make_dashboard(60), token_budget=400)
+        
+        assert header["title"] == "Service Overview"
+        assert "panels" not in header
+        assert len(chunks) > 1
+        titles = []
+        for chunk in chunks:
+            assert estimate_tokens(chunk) <= 400
+            for section in json.loads(chunk)["sections"]:
+                titles.extend(p["title"] for p in section["panels"])
+        assert titles == [f"Panel {i}" for i in range(60)]
+    
+    @pytest.mark.parametrize("budget", [150, 400, 1500])
+    def test_chunks_are_packed_to_budget(self, budget):
+        """Test running token totals match the encoded chunks, so no chunk could take the next panel."""
+        _, chunks = split_dashboard(make_dashboard(120), token_budget=budget)
+        
+        for chunk, following in zip(chunks, chunks[1:]):
+            sections = json.loads(chunk)["sections"]
+            first = json.loads(following)["sections"][0]
+            sections[-1]["panels"].append(first["panels"][0])
+            assert estimate_tokens(chunk) <= budget
+            assert estimate_tokens(json.dumps({"sections": sections}, separators=(",", ":"))) > budget
+    
+    def test_identical_collapsed_rows_split_within_budget(self):
+        """Test large rows sharing the same config are each split into fitting chunks."""
+        dashboard = {"title": "Rows", "panels": [
+            {"type": "row", "title": f"Row {r}", "collapsed": True, "panels": [
+                make_panel(r * 200 + i, expr=f"rate(http_requests_total{{code=\"{r * 200 + i}\"}}[5m])")
+                for i in range(200)
+            ]}
+            for r in range(3)
+        ]}
+        
+        _, chunks = split_dashboard(dashboard, token_budget=800)
+        
+        queries = []
+        sections = []
+        for chunk in chunks:
+            assert estimate_tokens(chunk) <= 800
+            for section in json.loads(chunk)["sections"]:
+                sections.append(section["section"])
+                for panel in section["panels"]:
+                    queries.extend(t["query"] for t in panel["targets"])
+        assert set(sections) == {"Row 0", "Row 1", "Row 2"}
+        assert queries == [f'rate(http_requests_total{{code="{i}"}}[5m])' for i in range(600)]
+    
+    def test_groups_by_row(self):
+        """Test rows become sections and small rows are packed together."""
+        dashboard = {"title": "Rows", "panels": [
+            {"type": "stat", "title": "Top"},
+            {"type": "row", "title": "Row A"},
+            {"type": "stat", "title": "A1"},
+            {"type": "row", "title": "Row B", "collapsed": True, "panels": [{"type": "stat", "title": "B1"}]},
+        ]}
+        
+        _, chunks = split_dashboard(dashboard, token_budget=1000)
+        
+        assert len(chunks) == 1
+        sections = json.loads(chunks[0])["sections"]
+        assert [s.get("section") for s in sections] == [None, "Row A", "Row B"]
+        assert sections[2]["panels"][0]["title"] == "B1"
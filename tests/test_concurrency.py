@@ -0,0 +1,47 @@
+"""Tests for concurrency helpers."""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from grafana_agent.concurrency import RateLimiter, gather_bounded
+
+
+class TestGatherBounded:
+    """Tests for bounded gather."""
+    
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_and_keeps_order(self):
+        """Test that results keep input order with at most limit running."""
+        state = {"active": 0, "peak": 0}
+        
+        async def work(i):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.001 * (5 - i))
+            state["active"] -= 1
+            return i
+        
+        results = await gather_bounded([work(i) for i in range(5)], limit=2)
+        
+        assert results == [0, 1, 2, 3, 4]
+        assert state["peak"] == 2
+
+
+class TestRateLimiter:
+    """Tests for the rate limiter."""
+    
+    def test_spaces_calls(self):
+        """Test that calls beyond the rate wait for their slot."""
+        limiter = RateLimiter(rate=10)
+        with patch("grafana_agent.concurrency.time.sleep") as mock_sleep, \
+                patch("grafana_agent.concurrency.time.monotonic", return_value=100.0):
+            limiter.acquire()
+            limiter.acquire()
+            limiter.acquire()
+        
+        assert [round(c[0][0], 3) for c in mock_sleep.call_args_list] == [0.1, 0.2]
+    
+    def test_rejects_non_positive_rate(self):
+        """Test that a zero rate is refused."""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
@@ -0,0 +1,143 @@
+"""Tests for the agent daemon."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import pytest
+from unittest.mock import patch
+from click.testing import CliRunner
+from grafana_agent.cli import cli
+from grafana_agent.daemon import AgentDaemon, DaemonClient, DaemonError
+
+
+@pytest.fixture
+def socket_file():
+    """Short socket path (Unix socket paths are limited to ~100 bytes)."""
+    directory = tempfile.mkdtemp(prefix="ga-")
+    yield os.path.join(directory, "agent.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def agent(socket_file):
+    """Daemon serving on a background thread."""
+    daemon = AgentDaemon(socket_file)
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    thread.join()
+
+
+class TestAgentDaemon:
+    """Tests for the daemon protocol and warm resources."""
+    
+    def test_ping_and_socket_permissions(self, agent, socket_file):
+        """Test the daemon answers and its socket is private to the user."""
+        client = DaemonClient(socket_file)
+        
+        assert client.available()
+        assert client.request("ping")["pid"] == os.getpid()
+        assert oct(os.stat(socket_file).st_mode & 0o777) == "0o600"
+    
+    def test_create_reuses_llm_client(self, agent, socket_file):
+        """Test dashboards are created with a client kept across requests."""
+        client = DaemonClient(socket_file)
+        panels = []
+        
+        for _ in range(2):
+            dashboard = client.request("create", {"description": "API health", "provider": "fake",
+                                                  "stream": True}, on_event=panels.append)
+        
+        assert dashboard["dashboard"]["panels"]
+        assert len(panels) == 8
+        assert client.request("stats")["llm_clients"] == 1
+    
+    def test_summarize_streams_and_caches_dashboard(self, agent, socket_file, tmp_path):
+        """Test summaries stream chunks and parsed files are reused until they change."""
+        path = tmp_path / "dashboard.json"
+        path.write_text(json.dumps({"dashboard": {"title": "CPU", "panels": []}}))
+        client = DaemonClient(socket_file)
+        chunks = []
+        
+        summary = client.request("summarize", {"path": str(path), "provider": "fake", "stream": True},
+                                 on_event=lambda event: chunks.append(event["chunk"]))
+        with patch("grafana_agent.daemon.json.load") as mock_load:
+            client.request("summarize", {"path": str(path), "provider": "fake"})
+        
+        assert "".join(chunks) == summary
+        mock_load.assert_not_called()
+        assert client.request("stats")["dashboards_cached"] == 1
+    
+    def test_errors_reported(self, agent, socket_file):
+        """Test failures inside the daemon are raised to the caller."""
+        client = DaemonClient(socket_file)
+        
+        with pytest.raises(DaemonError, match="FileNotFoundError"):
+            client.request("summarize", {"path": "/nonexistent.json", "provider": "fake"})
+        with pytest.raises(DaemonError, match="Unknown operation"):
+            client.request("bogus")
+    
+    def test_refuses_second_daemon(self, agent, socket_file):
+        """Test a second daemon does not take over a live socket."""
+        with pytest.raises(RuntimeError, match="already running"):
+            AgentDaemon(socket_file).bind()
+    
+    def test_unavailable_without_socket(self, socket_file):
+        """Test the client reports no daemon when nothing listens."""
+        assert not DaemonClient(socket_file).available()
+
+
+class TestDaemonForwarding:
+    """Tests for CLI commands forwarding to the daemon."""
+    
+    @patch('grafana_agent.cli.get_llm_client')
+    def test_create_forwards_to_daemon(self, mock_get_llm, agent, socket_file):
+        """Test create runs in the daemon when it is running."""
+        runner = CliRunner()
+        result = runner.invoke(cli, ['create', 'API health', '--provider', 'fake', '--title', 'API'],
+                               env={'GRAFANA_AGENT_SOCKET': socket_file})
+        
+        assert result.exit_code == 0
+        assert '"title": "API"' in result.output
+        mock_get_llm.assert_not_called()
+    
+    @patch('grafana_agent.cli.get_llm_client')
+    def test_no_daemon_runs_locally(self, mock_get_llm, agent, socket_file):
+        """Test --no-daemon bypasses a running daemon."""
+        from grafana_agent.llm_client import FakeLLMClient
+        mock_get_llm.return_value = FakeLLMClient()
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['create', 'API health', '--provider', 'fake', '--no-daemon'],
+                               env={'GRAFANA_AGENT_SOCKET': socket_file})
+        
+        assert result.exit_code == 0
+        mock_get_llm.assert_called_once()
+    
+    def test_summarize_forwards_to_daemon(self, agent, socket_file, tmp_path):
+        """Test summarize streams the daemon's summary."""
+        path = tmp_path / "dashboard.json"
+        path.write_text(json.dumps({"dashboard": {"title": "CPU", "panels": []}}))
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['summarize', str(path), '--provider', 'fake'],
+                               env={'GRAFANA_AGENT_SOCKET': socket_file})
+        
+        assert result.exit_code == 0
+        assert "Dashboard Summary" in result.output
+        assert "This dashboard" in result.output
+    
+    def test_daemon_status_and_stop(self, agent, socket_file):
+        """Test the daemon management commands."""
+        runner = CliRunner()
+        env = {'GRAFANA_AGENT_SOCKET': socket_file}
+        
+        status = runner.invoke(cli, ['daemon', 'status'], env=env)
+        stop = runner.invoke(cli, ['daemon', 'stop'], env=env)
+        
+        assert status.exit_code == 0 and "running" in status.output
+        assert stop.exit_code == 0 and "stopped" in stop.output
@@ -4,6 +4,7 @@ import pytest
 import json
 from unittest.mock import Mock, patch
 from grafana_agent.dashboard_generator import DashboardGenerator
+from grafana_agent.compaction import compact_dashboard
 
 
 class TestDashboardGenerator:
@@ -92,6 +93,32 @@ class TestDashboardGenerator:
         with pytest.raises(ValueError, match="Failed to parse LLM response"):
             generator.create_dashboard("Create dashboard")
     
+    def test_create_dashboard_salvages_truncated_response(self, mock_llm_client):
+        """Test that a truncated response still yields the completed panels."""
+        full = json.dumps({"dashboard": {"title": "Big", "panels": [
+            {"id": 1, "title": "A"}, {"id": 2, "title": "B"}, {"id": 3, "title": "C"}
+        ]}})
+        mock_llm_client.chat.return_value = full[:full.index('"C"')]
+        
+        generator = DashboardGenerator(mock_llm_client)
+        dashboard = generator.create_dashboard("Create dashboard")
+        
+        assert [p["id"] for p in dashboard["dashboard"]["panels"][:2]] == [1, 2]
+        assert dashboard["dashboard"]["uid"] == "big"
+    
+    def test_create_dashboard_streams_panels(self, mock_llm_client):
+        """Test that on_panel receives panels while the response streams."""
+        text = json.dumps({"title": "Streamed", "panels": [{"id": 1}, {"id": 2}]})
+        mock_llm_client.stream_chat.return_value = iter([text[i:i + 5] for i in range(0, len(text), 5)])
+        received = []
+        
+        generator = DashboardGenerator(mock_llm_client)
+        dashboard = generator.create_dashboard("Create dashboard", on_panel=received.append)
+        
+        assert received == [{"id": 1}, {"id": 2}]
+        assert dashboard["dashboard"]["title"] == "Streamed"
+        mock_llm_client.chat.assert_not_called()
+    
     def test_summarize_dashboard(self, mock_llm_client):
         """Test summarizing a dashboard."""
         mock_llm_client.chat.return_value = "This dashboard shows CPU and memory metrics."
@@ -109,6 +136,15 @@ class TestDashboardGenerator:
         call_args = mock_llm_client.chat.call_args
         assert "Summarize this Grafana dashboard" in call_args[0][0][1]["content"]
     
+    def test_stream_summarize_dashboard(self, mock_llm_client):
+        """Test streaming summarization strips leading whitespace only."""
+        mock_llm_client.stream_chat.return_value = iter(["\n", "  This dash", "board. "])
+        
+        generator = DashboardGenerator(mock_llm_client)
+        chunks = list(generator.stream_summarize_dashboard({"title": "Test"}))
+        
+        assert "".join(chunks) == "This dashboard. "
+    
     def test_summarize_dashboard_with_complex_structure(self, mock_llm_client):
         """Test summarizing a complex dashboard."""
         mock_llm_client.chat.return_value = "Complex dashboard summary"
@@ -132,3 +168,191 @@ class TestDashboardGenerator:
         call_args = mock_llm_client.chat.call_args
         assert "Complex Dashboard" in call_args[0][0][1]["content"]
 
+
+    @pytest.mark.asyncio
+    async def test_acreate_dashboard(self, mock_llm_client):
+        """Test async dashboard creation with a synchronous client."""
+        mock_llm_client.chat.return_value = json.dumps({"title": "Async", "panels": []})
+        
+        generator = DashboardGenerator(mock_llm_client)
+        dashboard = await generator.acreate_dashboard("Create dashboard")
+        
+        assert dashboard["dashboard"]["title"] == "Async"
+        assert dashboard["dashboard"]["uid"] == "async"
+    
+    @pytest.mark.asyncio
+    async def test_acreate_dashboards_fan_out(self):
+        """Test that concurrent generation respects the concurrency limit."""
+        import asyncio
+        from grafana_agent.llm_client import AsyncLLMClient
+        
+        class SlowClient(AsyncLLMClient):
+            def __init__(self):
+                self.in_flight = 0
+                self.peak = 0
+            
+            async def achat(self, messages, **kwargs):
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                await asyncio.sleep(0.01)
+                self.in_flight -= 1
+                title = messages[1]["content"].split("Title: ")[1]
+                return json.dumps({"title": title, "panels": []})
+        
+        client = SlowClient()
+        generator = DashboardGenerator(client)
+        requests = [(f"dashboard {i}", f"Title {i}") for i in range(10)]
+        
+        dashboards = await generator.acreate_dashboards(requests, max_concurrency=3)
+        
+        assert [d["dashboard"]["title"] for d in dashboards] == [f"Title {i}" for i in range(10)]
+        assert client.peak == 3
+    
+    @pytest.mark.asyncio
+    async def test_asummarize_dashboards_return_exceptions(self, mock_llm_client):
+        """Test that fan-out can report failures per item."""
+        mock_llm_client.chat.side_effect = ["Summary", RuntimeError("boom")]
+        
+        generator = DashboardGenerator(mock_llm_client)
+        results = await generator.asummarize_dashboards(
+            [{"title": "A"}, {"title": "B"}], max_concurrency=1, return_exceptions=True
+        )
+        
+        assert results[0] == "Summary"
+        assert isinstance(results[1], RuntimeError)
+    
+    def test_summarize_dashboard_enforces_token_budget(self, mock_llm_client):
+        """Test that large dashboards are compacted to fit the token budget."""
+        from grafana_agent.tokens import estimate_tokens
+        mock_llm_client.chat.return_value = "Summary"
+        dashboard_json = {"title": "Huge", "panels": [
+            {"id": i, "title": f"Panel {i}", "type": "stat", "gridPos": {"x": 0, "y": i},
+             "targets": [{"refId": "A", "expr": f"up{{instance=\"host-{i}\"}}"}]}
+            for i in range(500)
+        ]}
+        
+        generator = DashboardGenerator(mock_llm_client, summary_token_budget=500,
+                                       map_reduce_summaries=False)
+        generator.summarize_dashboard(dashboard_json)
+        
+        mock_llm_client.chat.assert_called_once()
+        
+        content = mock_llm_client.chat.call_args[0][0][1]["content"]
+        assert "Huge" in content
+        assert estimate_tokens(content) <= 520
+    
+    def test_summarize_dashboard_without_compaction(self, mock_llm_client):
+        """Test the full JSON can still be sent verbatim."""
+        mock_llm_client.chat.return_value = "Summary"
+        dashboard_json = {"title": "Test", "gridPos": {"x": 1}}
+        
+        generator = DashboardGenerator(mock_llm_client, compact_summaries=False)
+        generator.summarize_dashboard(dashboard_json)
+        
+        content = mock_llm_client.chat.call_args[0][0][1]["content"]
+        assert json.dumps(dashboard_json, indent=2) in content
+
+
+
+def make_rows_dashboard(rows, panels_per_row, expr_suffix=""):
+    panels = []
+    for r in range(rows):
+        panels.append({"type": "row", "title": f"Row {r}", "panels": []})
+        for p in range(panels_per_row):
+            panels.append({"type": "timeseries", "title": f"Row {r} panel {p}",
+                           "targets": [{"refId": "A", "expr": f"metric_{r}_{p}{expr_suffix if r == 0 else ''}"}]})
+    return {"title": "Large", "panels": panels}
+
+
+class TestMapReduceSummarization:
+    """Tests for map-reduce summarization of large dashboards."""
+    
+    def test_small_dashboard_single_call(self, mock_llm_client):
+        """Test dashboards within budget are summarized in one call."""
+        mock_llm_client.chat.return_value = "Summary"
+        
+        generator = DashboardGenerator(mock_llm_client)
+        generator.summarize_dashboard(make_rows_dashboard(2, 2))
+        
+        mock_llm_client.chat.assert_called_once()
+    
+    def test_fitting_dashboard_is_not_split(self, mock_llm_client):
+        """Test dashboards that fit the budget whole skip the split."""
+        mock_llm_client.chat.return_value = "Summary"
+        generator = DashboardGenerator(mock_llm_client)
+        
+        with patch('grafana_agent.dashboard_generator.split_dashboard') as split, \
+                patch('grafana_agent.dashboard_generator.compact_dashboard', wraps=compact_dashboard) as compact:
+            generator.summarize_dashboard(make_rows_dashboard(2, 2))
+        
+        split.assert_not_called()
+        compact.assert_called_once()
+    
+    def test_large_dashboard_map_reduce(self, mock_llm_client):
+        """Test large dashboards are summarized per chunk and then reduced."""
+        def chat(messages, **kwargs):
+            request = messages[1]["content"].split("\n")[1]
+            if request.startswith("Summarize part"):
+                return f"summary of {request.split(' of this')[0][10:]}"
+            return "Final summary"
+        
+        mock_llm_client.chat.side_effect = chat
+        generator = DashboardGenerator(mock_llm_client, summary_token_budget=300)
+        
+        summary = generator.summarize_dashboard(make_rows_dashboard(6, 5))
+        
+        assert summary == "Final summary"
+        final = mock_llm_client.chat.call_args_list[-1][0][0][1]["content"]
+        assert final.startswith("Summarize this Grafana dashboard from summaries of its parts")
+        assert "summary of part 1" in final
+        assert mock_llm_client.chat.call_count > 2
+    
+    def test_chunk_summaries_are_cached(self, mock_llm_client):
+        """Test that only changed chunks are re-summarized."""
+        mock_llm_client.chat.return_value = "Summary"
+        generator = DashboardGenerator(mock_llm_client, summary_token_budget=300,
+                                       max_workers=1)
+        
+        generator.summarize_dashboard(make_rows_dashboard(6, 5))
+        first_calls = mock_llm_client.chat.call_count
+        mock_llm_client.chat.reset_mock()
+        generator.summarize_dashboard(make_rows_dashboard(6, 5, expr_suffix="_changed"))
+        
+        # The changed chunk plus the final reduce
+        assert mock_llm_client.chat.call_count == 2
+        assert first_calls > 2
+    
+    def test_hierarchical_reduce(self, mock_llm_client):
+        """Test that many part summaries are reduced in several rounds."""
+        mock_llm_client.chat.return_value = "A fairly long summary of this part. " * 10
+        generator = DashboardGenerator(mock_llm_client, summary_token_budget=200)
+        
+        generator.summarize_dashboard(make_rows_dashboard(20, 4))
+        
+        final = mock_llm_client.chat.call_args_list[-1][0][0]
+        reduce_calls = [c for c in mock_llm_client.chat.call_args_list
+                        if "from summaries of its parts" in c[0][0][1]["content"]]
+        assert len(reduce_calls) > 1
+        assert "from summaries of its parts" in final[1]["content"]
+    
+    def test_stream_map_reduce(self, mock_llm_client):
+        """Test that the final reduce step is streamed."""
+        mock_llm_client.chat.return_value = "Part summary"
+        mock_llm_client.stream_chat.return_value = iter(["Final ", "summary"])
+        generator = DashboardGenerator(mock_llm_client, summary_token_budget=300)
+        
+        chunks = list(generator.stream_summarize_dashboard(make_rows_dashboard(6, 5)))
+        
+        assert "".join(chunks) == "Final summary"
+        assert mock_llm_client.chat.call_count >= 2
+    
+    @pytest.mark.asyncio
+    async def test_async_map_reduce(self, mock_llm_client):
+        """Test async summarization map-reduces large dashboards."""
+        mock_llm_client.chat.return_value = "Summary"
+        generator = DashboardGenerator(mock_llm_client, summary_token_budget=300)
+        
+        summary = await generator.asummarize_dashboard(make_rows_dashboard(6, 5))
+        
+        assert summary == "Summary"
+        assert mock_llm_client.chat.call_count > 2
@@ -0,0 +1,92 @@
+"""Tests for the fake Grafana server, driven through the real clients."""
+
+import pytest
+import requests
+from unittest.mock import patch
+from grafana_agent.fake_grafana import FakeGrafana
+from grafana_agent.grafana_client import GrafanaClient
+
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def fake_grafana():
+    """Running fake Grafana server."""
+    with FakeGrafana(seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def client(fake_grafana):
+    """GrafanaClient pointed at the fake server."""
+    client = GrafanaClient(fake_grafana.url, api_key="test-key")
+    yield client
+    client.close()
+
+
+class TestFakeGrafana:
+    """Tests for the fake Grafana API."""
+    
+    def test_create_get_delete(self, client):
+        """Test the dashboard lifecycle."""
+        created = client.create_dashboard({"title": "CPU Usage", "panels": []})
+        assert created["status"] == "success"
+        assert created["version"] == 1
+        
+        fetched = client.get_dashboard(created["uid"])
+        assert fetched["dashboard"]["title"] == "CPU Usage"
+        
+        updated = client.create_dashboard(dict(fetched["dashboard"], title="CPU"), overwrite=True)
+        assert updated["version"] == 2
+        assert client.get_dashboard_versions(created["uid"])[0]["version"] == 2
+        
+        client.delete_dashboard(created["uid"])
+        with pytest.raises(requests.HTTPError) as exc_info:
+            client.get_dashboard(created["uid"])
+        assert exc_info.value.response.status_code == 404
+    
+    def test_version_conflict_without_overwrite(self, client):
+        """Test saving a stale version is rejected like Grafana does."""
+        client.create_dashboard({"uid": "x", "title": "A"})
+        client.create_dashboard({"uid": "x", "title": "B", "version": 1})
+        
+        with pytest.raises(requests.HTTPError) as exc_info:
+            client.create_dashboard({"uid": "x", "title": "C", "version": 1})
+        assert exc_info.value.response.status_code == 412
+    
+    def test_search_pagination_and_filters(self, fake_grafana, client):
+        """Test that iter_dashboards pages through every dashboard."""
+        for i in range(25):
+            fake_grafana.add_dashboard({"uid": f"d{i:02d}", "title": f"Dash {i:02d}",
+                                        "tags": ["even"] if i % 2 == 0 else []})
+        
+        all_uids = [d["uid"] for d in client.iter_dashboards(page_size=10, prefetch=True)]
+        even = list(client.iter_dashboards(tag="even", page_size=10))
+        
+        assert all_uids == [f"d{i:02d}" for i in range(25)]
+        assert len(even) == 13
+        assert fake_grafana.request_counts["GET /api/search"] == 3 + 2
+    
+    @patch("grafana_agent.grafana_client.time.sleep")
+    def test_throttling_retried(self, mock_sleep):
+        """Test 429 responses with Retry-After are retried by the client."""
+        with FakeGrafana(throttle_rate=0.5, retry_after=1, seed=3) as server:
+            server.add_dashboard({"uid": "a", "title": "A"})
+            client = GrafanaClient(server.url, api_key="test-key", max_retries=10)
+            for _ in range(10):
+                assert client.get_dashboard("a")["dashboard"]["uid"] == "a"
+            client.close()
+        
+        summary = client.stats.summary("GET /api/dashboards/uid/{uid}")
+        assert summary["retries"] > 0
+        assert summary["errors"] == 0
+        assert all(call[0][0] == 1.0 for call in mock_sleep.call_args_list)
+    
+    def test_error_injection(self):
+        """Test injected 500s surface once retries are exhausted."""
+        with FakeGrafana(error_rate=1.0) as server:
+            client = GrafanaClient(server.url, api_key="test-key", max_retries=0)
+            with pytest.raises(requests.HTTPError):
+                client.search_dashboards()
+            client.close()
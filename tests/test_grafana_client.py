@@ -1,8 +1,9 @@
 """Tests for Grafana client."""
 
+import json
 import pytest
 from unittest.mock import Mock, patch
-from grafana_agent.grafana_client import GrafanaClient
+from grafana_agent.grafana_client import GrafanaClient, AsyncGrafanaClient, retry_delay
 
 
 class TestGrafanaClient:
@@ -105,4 +106,248 @@ class TestGrafanaClient:
         
         with pytest.raises(requests.HTTPError):
             client.get_dashboard("nonexistent")
+    
+    def test_iter_dashboards_pages(self, mock_requests):
+        """Test that iteration pages through search results until a short page."""
+        pages = [[{"uid": "a"}, {"uid": "b"}], [{"uid": "c"}, {"uid": "d"}], [{"uid": "e"}]]
+        mock_requests.request.side_effect = [make_response(200, page) for page in pages]
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        uids = [d["uid"] for d in client.iter_dashboards(folder_ids=[1, 2], page_size=2)]
+        
+        assert uids == ["a", "b", "c", "d", "e"]
+        assert mock_requests.request.call_count == 3
+        params = mock_requests.request.call_args_list[1][1]["params"]
+        assert ("page", 2) in params
+        assert ("limit", 2) in params
+        assert ("type", "dash-db") in params
+        assert [v for k, v in params if k == "folderIds"] == [1, 2]
+    
+    def test_iter_dashboards_lazy(self, mock_requests):
+        """Test that later pages are only fetched as results are consumed."""
+        mock_requests.request.side_effect = [make_response(200, [{"uid": "a"}, {"uid": "b"}])] * 5
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        iterator = client.iter_dashboards(page_size=2)
+        assert next(iterator)["uid"] == "a"
+        iterator.close()
+        
+        assert mock_requests.request.call_count == 1
+    
+    def test_iter_dashboards_prefetch(self, mock_requests):
+        """Test background prefetching yields the same results."""
+        pages = [[{"uid": "a"}, {"uid": "b"}], [{"uid": "c"}]]
+        mock_requests.request.side_effect = [make_response(200, page) for page in pages]
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        uids = [d["uid"] for d in client.iter_dashboards(page_size=2, prefetch=True)]
+        
+        assert uids == ["a", "b", "c"]
+        assert mock_requests.request.call_count == 2
+
+
 
+
+def make_response(status_code, json_data=None, headers=None):
+    """Build a mock response with a given status code."""
+    import requests
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = json_data if json_data is not None else {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f"{status_code} error")
+    else:
+        response.raise_for_status = Mock()
+    return response
+
+
+class TestGrafanaClientResilience:
+    """Tests for timeouts, retries and request statistics."""
+    
+    def test_default_timeout_applied(self, mock_requests):
+        """Test that requests carry the configured timeout."""
+        client = GrafanaClient("http://localhost:3000", api_key="test-key", timeout=5)
+        
+        client.get_dashboard("uid")
+        
+        assert mock_requests.request.call_args[1]["timeout"] == 5
+    
+    def test_connection_pool_adapter_mounted(self, mock_requests):
+        """Test that a pooled adapter is mounted for http and https."""
+        GrafanaClient("http://localhost:3000", api_key="test-key", pool_maxsize=32)
+        
+        mounted = {call[0][0]: call[0][1] for call in mock_requests.mount.call_args_list}
+        assert set(mounted) == {"http://", "https://"}
+        assert mounted["http://"]._pool_maxsize == 32
+    
+    @patch("grafana_agent.grafana_client.time.sleep")
+    def test_retries_throttled_request_honoring_retry_after(self, mock_sleep, mock_requests):
+        """Test that 429 responses are retried after the Retry-After delay."""
+        mock_requests.request.side_effect = [
+            make_response(429, headers={"Retry-After": "2"}),
+            make_response(200, {"dashboard": {"uid": "abc"}}),
+        ]
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        result = client.get_dashboard("abc")
+        
+        assert result == {"dashboard": {"uid": "abc"}}
+        mock_sleep.assert_called_once_with(2.0)
+        assert client.stats.summary("GET /api/dashboards/uid/{uid}")["retries"] == 1
+    
+    @patch("grafana_agent.grafana_client.time.sleep")
+    def test_retries_server_errors_for_idempotent_methods(self, mock_sleep, mock_requests):
+        """Test that GET requests are retried on 5xx until max_retries."""
+        mock_requests.request.side_effect = [make_response(503)] * 3
+        client = GrafanaClient("http://localhost:3000", api_key="test-key", max_retries=2)
+        
+        import requests
+        with pytest.raises(requests.HTTPError):
+            client.search_dashboards()
+        
+        assert mock_requests.request.call_count == 3
+        assert mock_sleep.call_count == 2
+        assert client.stats.summary("GET /api/search")["errors"] == 1
+    
+    @patch("grafana_agent.grafana_client.time.sleep")
+    def test_does_not_retry_post_on_server_error(self, mock_sleep, mock_requests):
+        """Test that non-idempotent requests are not repeated after a 5xx."""
+        mock_requests.request.side_effect = [make_response(500), make_response(200)]
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        import requests
+        with pytest.raises(requests.HTTPError):
+            client.create_dashboard({"title": "Test"})
+        
+        assert mock_requests.request.call_count == 1
+        mock_sleep.assert_not_called()
+    
+    @patch("grafana_agent.grafana_client.time.sleep")
+    def test_retries_connection_errors(self, mock_sleep, mock_requests):
+        """Test that dropped connections are retried for idempotent methods."""
+        import requests
+        mock_requests.request.side_effect = [requests.ConnectionError("reset"), make_response(200)]
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        client.delete_dashboard("uid")
+        
+        assert mock_requests.request.call_count == 2
+    
+    def test_retry_delay(self):
+        """Test backoff bounds and Retry-After parsing."""
+        with patch("grafana_agent.grafana_client.random.uniform", side_effect=lambda a, b: b):
+            assert retry_delay(0, 0.5, 30) == 0.5
+            assert retry_delay(3, 0.5, 30) == 4.0
+            assert retry_delay(10, 0.5, 30) == 30
+        assert retry_delay(0, 0.5, 30, retry_after="120") == 30
+        assert retry_delay(0, 0.5, 30, retry_after="Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    
+    def test_stats_recorded_per_endpoint(self, mock_requests):
+        """Test latency statistics are kept per endpoint with UIDs collapsed."""
+        client = GrafanaClient("http://localhost:3000", api_key="test-key")
+        
+        client.get_dashboard("a")
+        client.get_dashboard("b")
+        
+        summary = client.stats.summary()
+        assert summary["GET /api/dashboards/uid/{uid}"]["count"] == 2
+        assert summary["GET /api/dashboards/uid/{uid}"]["p50"] >= 0
+
+
+def make_async_client(handler, **kwargs):
+    """Build an AsyncGrafanaClient backed by an in-process httpx transport."""
+    httpx = pytest.importorskip("httpx")
+    return AsyncGrafanaClient("http://localhost:3000", api_key="test-key",
+                              transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestAsyncGrafanaClient:
+    """Tests for the async Grafana client."""
+    
+    @pytest.mark.asyncio
+    async def test_get_dashboard(self):
+        """Test fetching a dashboard with auth headers."""
+        httpx = pytest.importorskip("httpx")
+        
+        def handler(request):
+            assert request.headers["Authorization"] == "Bearer test-key"
+            assert request.url.path == "/api/dashboards/uid/abc"
+            return httpx.Response(200, json={"dashboard": {"uid": "abc"}})
+        
+        async with make_async_client(handler) as client:
+            result = await client.get_dashboard("abc")
+        
+        assert result["dashboard"]["uid"] == "abc"
+    
+    @pytest.mark.asyncio
+    async def test_bulk_get_bounded_and_ordered(self):
+        """Test bulk fetches keep input order and respect the concurrency limit."""
+        import asyncio
+        httpx = pytest.importorskip("httpx")
+        state = {"active": 0, "peak": 0}
+        
+        async def handler(request):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            return httpx.Response(200, json={"uid": request.url.path.rsplit("/", 1)[-1]})
+        
+        uids = [f"d{i}" for i in range(10)]
+        async with make_async_client(handler) as client:
+            results = await client.get_dashboards(uids, concurrency=3)
+        
+        assert [r["uid"] for r in results] == uids
+        assert state["peak"] <= 3
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_return_exceptions(self):
+        """Test failures can be returned in place of results."""
+        httpx = pytest.importorskip("httpx")
+        
+        def handler(request):
+            title = json.loads(request.content)["dashboard"]["title"]
+            if title == "bad":
+                return httpx.Response(400, json={"message": "invalid"})
+            return httpx.Response(200, json={"status": "success", "title": title})
+        
+        async with make_async_client(handler) as client:
+            results = await client.create_dashboards(
+                [{"title": "ok"}, {"title": "bad"}], return_exceptions=True
+            )
+        
+        assert results[0]["title"] == "ok"
+        assert isinstance(results[1], httpx.HTTPStatusError)
+        assert client.stats.summary("POST /api/dashboards/db")["errors"] == 1
+    
+    @pytest.mark.asyncio
+    @patch("grafana_agent.grafana_client.asyncio.sleep")
+    async def test_retries_throttled_requests(self, mock_sleep):
+        """Test 429 responses are retried with Retry-After."""
+        httpx = pytest.importorskip("httpx")
+        responses = [httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200, json=[])]
+        
+        async def no_sleep(delay):
+            return None
+        mock_sleep.side_effect = no_sleep
+        
+        async with make_async_client(lambda request: responses.pop(0)) as client:
+            await client.search_dashboards()
+        
+        mock_sleep.assert_called_once_with(2.0)
+        assert client.stats.summary("GET /api/search")["retries"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_iter_dashboards(self):
+        """Test async iteration pages through search results with prefetch."""
+        httpx = pytest.importorskip("httpx")
+        pages = {"1": [{"uid": "a"}, {"uid": "b"}], "2": [{"uid": "c"}]}
+        
+        def handler(request):
+            return httpx.Response(200, json=pages[request.url.params["page"]])
+        
+        async with make_async_client(handler) as client:
+            uids = [d["uid"] async for d in client.iter_dashboards(page_size=2, prefetch=True)]
+        
+        assert uids == ["a", "b", "c"]
@@ -0,0 +1,154 @@
+"""Tests for LLM call instrumentation."""
+
+import json
+import pytest
+from unittest.mock import patch
+from grafana_agent.llm_client import (
+    FakeLLMClient, ResilientLLMClient, TokenUsage, build_llm_client, llm_task, TASK_SUMMARIZE
+)
+from grafana_agent.instrumentation import (
+    InstrumentedLLMClient, CallStats, JSONLinesHook, PrometheusHook, OpenTelemetryHook,
+    ModelPrice, estimate_cost
+)
+
+MESSAGES = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "hi"}]
+
+
+class FlakyLLMClient(FakeLLMClient):
+    """Fake client whose first call fails with a transient error."""
+
+    def chat(self, messages, **kwargs):
+        if not self.calls:
+            self.calls.append(messages)
+            raise ConnectionError("reset")
+        return super().chat(messages, **kwargs)
+
+
+class TestEstimateCost:
+    """Tests for cost estimates."""
+
+    def test_prices_cached_and_fresh_tokens(self):
+        """Test cached input is billed at the cached rate and the longest prefix wins."""
+        prices = {"m": ModelPrice(1.0, 1.0, 1.0, 1.0), "model": ModelPrice(10.0, 20.0, 1.0, 12.5)}
+        usage = TokenUsage(input_tokens=1_000_000, output_tokens=100_000, cached_input_tokens=600_000,
+                           cache_write_tokens=200_000, calls=1)
+        assert estimate_cost("model-v2", usage, prices) == pytest.approx(2.0 + 2.0 + 0.6 + 2.5)
+
+    def test_unknown_model(self):
+        """Test models without a price have no cost estimate."""
+        assert estimate_cost("mystery", TokenUsage(input_tokens=10, calls=1)) is None
+        assert estimate_cost("gpt-4o-mini-2024", TokenUsage(output_tokens=1_000_000, calls=1)) == \
+            pytest.approx(0.60)
+
+
+class TestInstrumentedLLMClient:
+    """Tests for the instrumented client wrapper."""
+
+    def test_records_tokens_and_task(self):
+        """Test each call is recorded with its usage, cached tokens and task."""
+        records = []
+        client = InstrumentedLLMClient(FakeLLMClient(responses=["ok"]), [records.append])
+        client.chat(MESSAGES)
+        with llm_task(TASK_SUMMARIZE):
+            client.chat(MESSAGES)
+
+        first, second = records
+        assert (first.provider, first.model, first.task) == ("fake", "fake", None)
+        assert first.input_tokens > 0 and first.output_tokens == 1
+        assert first.cached_input_tokens == 0 and first.cache_write_tokens > 0
+        assert second.task == TASK_SUMMARIZE
+        assert second.cached_input_tokens == first.cache_write_tokens
+        assert second.cost == 0.0 and second.ok
+        assert second.time_to_first_token is None
+
+    def test_stream_time_to_first_token(self):
+        """Test streamed calls record time to first token."""
+        records = []
+        client = InstrumentedLLMClient(FakeLLMClient(responses=["streamed text"]), [records.append])
+        assert "".join(client.stream_chat(MESSAGES)) == "streamed text"
+
+        assert records[0].stream
+        assert 0 <= records[0].time_to_first_token <= records[0].latency
+
+    def test_records_retries_and_errors(self):
+        """Test retries below the wrapper are counted and failures are recorded and re-raised."""
+        records = []
+        resilient = ResilientLLMClient(FlakyLLMClient(responses=["ok"]), max_retries=1, backoff_factor=0)
+        client = InstrumentedLLMClient(resilient, [records.append])
+        assert client.chat(MESSAGES) == "ok"
+        assert records[0].retries == 1
+
+        failing = InstrumentedLLMClient(FakeLLMClient(failure_rate=1.0), [records.append])
+        with pytest.raises(RuntimeError):
+            failing.chat(MESSAGES)
+        assert records[1].error == "RuntimeError: Simulated LLM failure"
+        assert not records[1].ok
+
+    def test_hook_failures_are_logged(self, caplog):
+        """Test a failing hook does not break the call."""
+        def broken(record):
+            raise ValueError("bad hook")
+        client = InstrumentedLLMClient(FakeLLMClient(responses=["ok"]), [broken])
+
+        assert client.chat(MESSAGES) == "ok"
+        assert "hook" in caplog.text
+
+    def test_build_llm_client_instruments_backends(self):
+        """Test hooks label records with each backend's provider and model."""
+        records = []
+        client = build_llm_client("fake", model="big", fallbacks=["fake:small"], hooks=[records.append])
+        client.probe_rate = 0  # Always call the primary backend
+        client.chat(MESSAGES)
+        assert isinstance(client.backends["fake:big"].client, InstrumentedLLMClient)
+        assert records[0].model == "big"
+
+
+class TestHooks:
+    """Tests for the bundled hooks."""
+
+    def test_call_stats(self):
+        """Test totals are kept per provider, model and task."""
+        stats = CallStats()
+        client = InstrumentedLLMClient(FakeLLMClient(model="gpt-4o", responses=["ok"]), [stats])
+        client.chat(MESSAGES)
+        client.chat(MESSAGES)
+
+        (summary,) = stats.summary()
+        assert summary["usage"]["calls"] == 2
+        assert summary["usage"]["cached_input_tokens"] > 0
+        assert summary["latency"]["count"] == 2
+        assert stats.total_cost() > 0
+
+    def test_json_lines_hook(self, tmp_path):
+        """Test records are appended as JSON lines."""
+        path = tmp_path / "calls.jsonl"
+        client = InstrumentedLLMClient(FakeLLMClient(responses=["ok"]), [JSONLinesHook(str(path))])
+        client.chat(MESSAGES)
+        client.chat(MESSAGES)
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(lines) == 2
+        assert lines[1]["cached_input_tokens"] > 0
+
+    def test_prometheus_hook(self):
+        """Test records update the Prometheus metrics."""
+        prometheus_client = pytest.importorskip("prometheus_client")
+        registry = prometheus_client.CollectorRegistry()
+        client = InstrumentedLLMClient(FakeLLMClient(responses=["ok"]), [PrometheusHook(registry)])
+        client.chat(MESSAGES)
+
+        labels = {"provider": "fake", "model": "fake", "task": ""}
+        assert registry.get_sample_value("grafana_agent_llm_requests_total", dict(labels, status="ok")) == 1
+        assert registry.get_sample_value("grafana_agent_llm_tokens_total", dict(labels, type="output")) == 1
+
+    def test_prometheus_hook_missing_package(self):
+        """Test error when prometheus_client is missing."""
+        with patch.dict('sys.modules', {'prometheus_client': None}):
+            with pytest.raises(ImportError, match="prometheus_client package is required"):
+                PrometheusHook()
+
+    def test_opentelemetry_hook_missing_package(self):
+        """Test error when opentelemetry is missing."""
+        with patch.dict('sys.modules', {'opentelemetry': None}):
+            with pytest.raises(ImportError, match="opentelemetry-api package is required"):
+                OpenTelemetryHook()
@@ -0,0 +1,107 @@
+"""Tests for incremental JSON parsing."""
+
+import json
+import time
+import pytest
+from grafana_agent.json_stream import StreamingJSONParser, parse_json_response
+
+
+DASHBOARD = {
+    "dashboard": {
+        "title": "Service {overview}",
+        "panels": [
+            {"id": 1, "title": "CPU \"busy\"", "targets": [{"expr": "rate(cpu[5m])"}]},
+            {"id": 2, "title": "Row", "type": "row", "panels": [{"id": 3, "title": "Nested"}]},
+            {"id": 4, "title": "Memory", "options": {"legend": {"show": True}}},
+        ],
+        "tags": ["a", "b"],
+    }
+}
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStreamingJSONParser:
+    """Tests for the streaming parser."""
+    
+    @pytest.mark.parametrize("size", [1, 3, 7, 1000])
+    def test_emits_panels_as_they_close(self, size):
+        """Test panels are emitted incrementally regardless of chunk boundaries."""
+        parser = StreamingJSONParser()
+        emitted = []
+        for chunk in chunked(json.dumps(DASHBOARD), size):
+            emitted.extend(parser.feed(chunk))
+        
+        assert [p["id"] for p in emitted] == [1, 2, 4]
+        assert emitted[1]["panels"] == [{"id": 3, "title": "Nested"}]
+        assert parser.complete
+        assert parser.result() == DASHBOARD
+        assert not parser.salvaged
+    
+    def test_first_panel_available_before_end(self):
+        """Test a panel is usable before the rest of the response arrives."""
+        text = json.dumps(DASHBOARD)
+        cut = text.index('{"id": 2')
+        parser = StreamingJSONParser()
+        
+        emitted = parser.feed(text[:cut])
+        
+        assert [p["id"] for p in emitted] == [1]
+        assert not parser.complete
+    
+    def test_ignores_fences_and_preamble(self):
+        """Test markdown fences and surrounding prose are skipped."""
+        text = "Here is your dashboard:\n```json\n" + json.dumps(DASHBOARD) + "\n```\nEnjoy!"
+        assert parse_json_response(text) == DASHBOARD
+    
+    def test_salvages_truncated_response(self):
+        """Test a truncated response keeps every completed panel."""
+        text = json.dumps(DASHBOARD)
+        truncated = text[:text.index('"Memory"') + 4]
+        parser = StreamingJSONParser()
+        parser.feed(truncated)
+        
+        result = parser.result()
+        
+        assert parser.salvaged
+        panels = result["dashboard"]["panels"]
+        assert [p["id"] for p in panels[:2]] == [1, 2]
+        assert result["dashboard"]["title"] == "Service {overview}"
+    
+    @pytest.mark.parametrize("cut", range(1, 60))
+    def test_salvage_any_prefix(self, cut):
+        """Test that every non-trivial prefix yields some valid object."""
+        text = json.dumps(DASHBOARD)
+        parser = StreamingJSONParser()
+        parser.feed(text[:cut])
+        assert isinstance(parser.result(), dict)
+    
+    def test_escaped_quote_across_chunks(self):
+        """Test escape sequences split across chunks are handled."""
+        parser = StreamingJSONParser()
+        for chunk in ['{"panels": [{"title": "a\\', '"b"}]}']:
+            parser.feed(chunk)
+        assert parser.result() == {"panels": [{"title": 'a"b'}]}
+    
+    def test_feed_time_is_linear(self):
+        """Test feeding many small chunks does not re-copy the whole buffer each time."""
+        def feed_time(count):
+            text = json.dumps({"panels": [{"id": i, "title": "x" * 200} for i in range(count)]})
+            start = time.perf_counter()
+            parser = StreamingJSONParser()
+            for chunk in chunked(text, 4):
+                parser.feed(chunk)
+            assert len(parser.panels) == count
+            return time.perf_counter() - start
+        
+        small = min(feed_time(100) for _ in range(3))
+        large = min(feed_time(1600) for _ in range(3))
+        # 16x the input: about 16x the time when linear, about 256x when quadratic
+        assert large < small * 64
+    
+    def test_no_json_raises(self):
+        """Test error when the response contains no object."""
+        with pytest.raises(ValueError, match="No JSON object"):
+            parse_json_response("This is not JSON")
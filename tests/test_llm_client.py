@@ -2,7 +2,15 @@
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from grafana_agent.llm_client import OpenAIClient, AnthropicClient, get_llm_client
+from unittest.mock import AsyncMock
+from grafana_agent.llm_client import (
+    OpenAIClient, AnthropicClient, get_llm_client,
+    AsyncOpenAIClient, AsyncAnthropicClient, get_async_llm_client, chat_async, sync_client,
+    FakeLLMClient, TokenBucket, RateLimitScheduler, RateLimitedLLMClient, parse_rate_limit_headers,
+    llm_priority, PRIORITY_BATCH, PRIORITY_INTERACTIVE, ResilientLLMClient, LLMTimeoutError,
+    is_transient_error, wrap_llm_client, RouterLLMClient, build_llm_client, llm_task, TASK_CHAT,
+    TASK_CREATE_DASHBOARD, TokenUsage, total_usage
+)
 
 
 class TestOpenAIClient:
@@ -35,6 +43,23 @@ class TestOpenAIClient:
         assert call_args[1]["model"] == "gpt-4"
         assert call_args[1]["messages"] == messages
     
+    def test_openai_client_stream_chat(self, mock_openai_client):
+        """Test OpenAI streaming yields content deltas."""
+        def chunk(content):
+            c = MagicMock()
+            c.choices[0].delta.content = content
+            return c
+        
+        mock_openai_client.chat.completions.create.return_value = iter(
+            [chunk("Hel"), chunk(None), chunk("lo")]
+        )
+        client = OpenAIClient(api_key="test-key")
+        
+        chunks = list(client.stream_chat([{"role": "user", "content": "test"}]))
+        
+        assert chunks == ["Hel", "lo"]
+        assert mock_openai_client.chat.completions.create.call_args[1]["stream"] is True
+    
     def test_openai_client_missing_package(self, monkeypatch):
         """Test error when openai package is missing."""
         import sys
@@ -76,6 +101,34 @@ class TestAnthropicClient:
         assert call_args[1]["model"] == "claude-3-sonnet-20240229"
         assert call_args[1]["messages"] == messages
     
+    def test_anthropic_client_chat_moves_system_prompt(self, mock_anthropic_client):
+        """Test that system messages are sent as the top-level system parameter."""
+        client = AnthropicClient(api_key="test-key")
+        messages = [
+            {"role": "system", "content": "You are helpful"},
+            {"role": "user", "content": "test"}
+        ]
+        
+        client.chat(messages)
+        
+        call_args = mock_anthropic_client.messages.create.call_args
+        assert call_args[1]["system"] == [
+            {"type": "text", "text": "You are helpful", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert call_args[1]["messages"] == [{"role": "user", "content": "test"}]
+        assert "max_tokens" in call_args[1]
+    
+    def test_anthropic_client_stream_chat(self, mock_anthropic_client):
+        """Test Anthropic streaming yields text deltas."""
+        stream = MagicMock()
+        stream.text_stream = iter(["Hel", "lo"])
+        mock_anthropic_client.messages.stream.return_value.__enter__.return_value = stream
+        client = AnthropicClient(api_key="test-key")
+        
+        chunks = list(client.stream_chat([{"role": "user", "content": "test"}]))
+        
+        assert chunks == ["Hel", "lo"]
+    
     def test_anthropic_client_missing_package(self, monkeypatch):
         """Test error when anthropic package is missing."""
         import sys
@@ -111,3 +164,608 @@ class TestGetLLMClient:
         client2 = get_llm_client("openai", api_key="test-key")
         assert type(client1) == type(client2)
 
+
+
+class TestAsyncClients:
+    """Tests for asynchronous LLM clients."""
+    
+    @pytest.mark.asyncio
+    async def test_async_openai_client_achat(self):
+        """Test async OpenAI client awaits the SDK call."""
+        with patch("openai.AsyncOpenAI") as mock_class:
+            sdk = MagicMock()
+            response = MagicMock()
+            response.choices[0].message.content = "async response"
+            sdk.chat.completions.create = AsyncMock(return_value=response)
+            mock_class.return_value = sdk
+            
+            client = AsyncOpenAIClient(api_key="test-key")
+            result = await client.achat([{"role": "user", "content": "test"}])
+        
+        assert result == "async response"
+        assert sdk.chat.completions.create.call_args[1]["model"] == "gpt-4"
+    
+    @pytest.mark.asyncio
+    async def test_async_anthropic_client_achat(self):
+        """Test async Anthropic client awaits the SDK call."""
+        with patch("anthropic.AsyncAnthropic") as mock_class:
+            sdk = MagicMock()
+            response = MagicMock()
+            response.content[0].text = "async response"
+            sdk.messages.create = AsyncMock(return_value=response)
+            mock_class.return_value = sdk
+            
+            client = AsyncAnthropicClient(api_key="test-key")
+            result = await client.achat([
+                {"role": "system", "content": "sys"},
+                {"role": "user", "content": "test"}
+            ])
+        
+        assert result == "async response"
+        assert sdk.messages.create.call_args[1]["system"][0]["text"] == "sys"
+    
+    @pytest.mark.asyncio
+    async def test_chat_async_runs_sync_client_in_executor(self, mock_llm_client):
+        """Test that synchronous clients are usable from async code."""
+        mock_llm_client.chat.return_value = "sync response"
+        
+        result = await chat_async(mock_llm_client, [{"role": "user", "content": "hi"}],
+                                  temperature=0.1)
+        
+        assert result == "sync response"
+        mock_llm_client.chat.assert_called_once_with(
+            [{"role": "user", "content": "hi"}], temperature=0.1
+        )
+    
+    def test_sync_client_rejects_async_clients(self):
+        """Test blocking calls fail clearly for asynchronous clients."""
+        client = FakeLLMClient()
+        assert sync_client(client) is client
+        with patch("openai.AsyncOpenAI"):
+            with pytest.raises(TypeError, match="AsyncOpenAIClient is asynchronous"):
+                sync_client(AsyncOpenAIClient(api_key="test-key"))
+    
+    def test_get_async_client(self):
+        """Test async client factory."""
+        with patch("openai.AsyncOpenAI"):
+            assert isinstance(get_async_llm_client("openai"), AsyncOpenAIClient)
+        with patch("anthropic.AsyncAnthropic"):
+            assert isinstance(get_async_llm_client("Anthropic"), AsyncAnthropicClient)
+        with pytest.raises(ValueError, match="Unsupported LLM provider"):
+            get_async_llm_client("unsupported")
+
+
+class TestFakeLLMClient:
+    """Tests for the offline fake client."""
+    
+    def test_registered_in_factory(self):
+        """Test that the factory returns the fake client."""
+        client = get_llm_client("fake", model="replay")
+        assert isinstance(client, FakeLLMClient)
+        assert client.model == "replay"
+    
+    def test_replays_responses_in_order(self):
+        """Test that recorded responses are cycled."""
+        client = FakeLLMClient(responses=["one", "two"])
+        messages = [{"role": "user", "content": "hi"}]
+        
+        assert [client.chat(messages) for _ in range(3)] == ["one", "two", "one"]
+        assert "".join(client.stream_chat(messages)) == "two"
+        assert len(client.calls) == 4
+    
+    def test_responses_file(self, tmp_path):
+        """Test loading recorded responses from JSONL."""
+        path = tmp_path / "responses.jsonl"
+        path.write_text('"first"\n"second"\n')
+        client = FakeLLMClient(responses_file=str(path))
+        assert client.responses == ["first", "second"]
+    
+    def test_default_dashboard_response(self):
+        """Test that create requests get a parseable dashboard without recordings."""
+        import json
+        client = FakeLLMClient()
+        messages = [{"role": "user", "content": "Create a Grafana dashboard for: API health\nTitle: API"}]
+        
+        first = client.chat(messages)
+        dashboard = json.loads(first)["dashboard"]
+        
+        assert dashboard["title"] == "API"
+        assert len(dashboard["panels"]) == 4
+        assert client.chat(messages) == first
+    
+    def test_seeded_failures(self):
+        """Test that failure injection is reproducible."""
+        def outcomes():
+            client = FakeLLMClient(responses=["ok"], failure_rate=0.5, seed=7)
+            result = []
+            for _ in range(20):
+                try:
+                    result.append(client.chat([]))
+                except RuntimeError:
+                    result.append("error")
+            return result
+        
+        first = outcomes()
+        assert first == outcomes()
+        assert "error" in first and "ok" in first
+    
+    def test_failure_modes(self):
+        """Test timeout and truncation failures."""
+        with pytest.raises(TimeoutError):
+            FakeLLMClient(failure_rate=1.0, failure_mode="timeout").chat([])
+        truncated = FakeLLMClient(responses=["abcdefgh"], failure_rate=1.0, failure_mode="truncate")
+        assert truncated.chat([]) == "abcd"
+        with pytest.raises(ValueError):
+            FakeLLMClient(failure_mode="unknown")
+    
+    @patch("grafana_agent.llm_client.time.sleep")
+    def test_simulated_latency(self, mock_sleep):
+        """Test latency and token rate translate into delays."""
+        client = FakeLLMClient(responses=["x" * 40], latency=0.5, tokens_per_second=10)
+        client.chat([])
+        mock_sleep.assert_called_once_with(0.5 + 10 / 10)
+
+
+class ThrottleError(Exception):
+    """Stand-in for an SDK RateLimitError."""
+    
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = Mock(status_code=429, headers=headers)
+
+
+class TestRateLimiting:
+    """Tests for the rate-limit scheduler and client wrapper."""
+    
+    def test_token_bucket_refills(self):
+        """Test a bucket reports the wait for missing quota and refills over time."""
+        bucket = TokenBucket(60)
+        start = bucket._updated
+        bucket.take(60, start)
+        assert bucket.wait_time(1, start) == pytest.approx(1.0)
+        assert bucket.wait_time(1, start + 1.0) == pytest.approx(0.0)
+        # Oversized requests wait for a full bucket rather than forever
+        assert bucket.wait_time(1000, start + 1.0) == pytest.approx(59.0)
+    
+    def test_parse_openai_and_anthropic_headers(self):
+        """Test quota headers from both providers are parsed."""
+        openai = parse_rate_limit_headers({
+            "x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-tokens": "1200",
+            "x-ratelimit-reset-requests": "1m30s", "x-ratelimit-reset-tokens": "250ms",
+        })
+        assert openai == {"limit_requests": 500.0, "remaining_tokens": 1200.0,
+                          "reset_requests": 90.0, "reset_tokens": 0.25}
+        anthropic = parse_rate_limit_headers({"anthropic-ratelimit-requests-remaining": "0",
+                                              "Retry-After": "7"})
+        assert anthropic == {"remaining_requests": 0.0, "retry_after": 7.0}
+    
+    def test_token_quota_delays_requests(self):
+        """Test requests wait once the token quota is used up."""
+        scheduler = RateLimitScheduler(tokens_per_minute=6000)
+        assert scheduler.acquire("openai", "gpt-4", tokens=6000) < 0.01
+        with pytest.raises(TimeoutError):
+            scheduler.acquire("openai", "gpt-4", tokens=1000, timeout=0.05)
+        # Other models have their own quota
+        assert scheduler.acquire("openai", "gpt-4o-mini", tokens=1000) < 0.01
+        assert scheduler.stats()["openai/gpt-4"]["queued"] == 0
+    
+    def test_interactive_requests_go_first(self):
+        """Test queued interactive requests are admitted before earlier batch requests."""
+        import threading
+        import time
+        scheduler = RateLimitScheduler()
+        scheduler._quota("fake", "m").blocked_until = time.monotonic() + 0.2
+        order = []
+        
+        def worker(name, priority):
+            scheduler.acquire("fake", "m", priority=priority)
+            order.append(name)
+        
+        threads = []
+        for name, priority in [("batch0", PRIORITY_BATCH), ("batch1", PRIORITY_BATCH),
+                               ("chat", PRIORITY_INTERACTIVE)]:
+            threads.append(threading.Thread(target=worker, args=(name, priority)))
+            threads[-1].start()
+            while scheduler.stats()["fake/m"]["queued"] < len(threads):
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join(5)
+        assert order == ["chat", "batch0", "batch1"]
+    
+    def test_throttled_call_is_retried_after_reset(self):
+        """Test a 429 pauses the model for its Retry-After and the call is retried."""
+        scheduler = RateLimitScheduler()
+        inner = Mock(provider="openai", model="gpt-4")
+        inner.chat.side_effect = [ThrottleError({"retry-after": "0.05", "x-ratelimit-limit-requests": "100"}),
+                                  "ok"]
+        client = RateLimitedLLMClient(inner, scheduler)
+        assert client.chat([{"role": "user", "content": "hi"}]) == "ok"
+        stats = scheduler.stats()["openai/gpt-4"]
+        assert stats["throttled"] == 1
+        assert stats["granted"] == 2
+        assert stats["waited"] == 1
+        assert scheduler._quota("openai", "gpt-4").requests.capacity == 100
+    
+    def test_other_errors_are_not_retried(self):
+        """Test non-429 errors propagate immediately."""
+        inner = Mock(provider="openai", model="gpt-4")
+        inner.chat.side_effect = RuntimeError("boom")
+        with pytest.raises(RuntimeError):
+            RateLimitedLLMClient(inner).chat([{"role": "user", "content": "hi"}])
+        assert inner.chat.call_count == 1
+    
+    def test_priority_from_context(self):
+        """Test calls use the priority set with llm_priority."""
+        scheduler = Mock()
+        client = RateLimitedLLMClient(FakeLLMClient(responses=["x"]), scheduler)
+        with llm_priority(PRIORITY_BATCH):
+            assert "".join(client.stream_chat([{"role": "user", "content": "hi"}], max_tokens=10)) == "x"
+        client.chat([{"role": "user", "content": "hi"}])
+        priorities = [call.args[3] for call in scheduler.acquire.call_args_list]
+        assert priorities == [PRIORITY_BATCH, PRIORITY_INTERACTIVE]
+
+
+class StatusError(Exception):
+    """Stand-in for an SDK APIStatusError."""
+    
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestResilientLLMClient:
+    """Tests for deadlines, retries and hedged requests."""
+    
+    MESSAGES = [{"role": "user", "content": "hi"}]
+    
+    def test_transient_errors(self):
+        """Test which errors are considered worth retrying."""
+        assert is_transient_error(StatusError(503))
+        assert is_transient_error(StatusError(529))
+        assert is_transient_error(ConnectionError())
+        assert is_transient_error(TimeoutError())
+        assert not is_transient_error(StatusError(400))
+        assert not is_transient_error(ValueError("bad"))
+        assert not is_transient_error(StatusError(429), retry_throttled=False)
+    
+    def test_retries_transient_errors(self):
+        """Test transient failures are retried and counted."""
+        inner = Mock(provider="openai", model="gpt-4")
+        inner.chat.side_effect = [StatusError(503), ConnectionError(), "ok"]
+        client = ResilientLLMClient(inner, max_retries=2, backoff_factor=0)
+        assert client.chat(self.MESSAGES) == "ok"
+        metrics = client.metrics()
+        assert (metrics["calls"], metrics["retries"], metrics["failures"]) == (1, 2, 0)
+        assert metrics["latency"]["retries"] == 2
+    
+    def test_permanent_errors_are_raised(self):
+        """Test non-transient errors and exhausted retries are raised."""
+        inner = Mock(provider="openai", model="gpt-4")
+        inner.chat.side_effect = StatusError(400)
+        client = ResilientLLMClient(inner, max_retries=3, backoff_factor=0)
+        with pytest.raises(StatusError):
+            client.chat(self.MESSAGES)
+        assert inner.chat.call_count == 1
+        
+        inner.chat.side_effect = StatusError(500)
+        with pytest.raises(StatusError):
+            client.chat(self.MESSAGES)
+        assert inner.chat.call_count == 1 + 4
+        assert client.metrics()["failures"] == 2
+    
+    def test_deadline(self):
+        """Test a slow call is abandoned at the deadline."""
+        client = ResilientLLMClient(FakeLLMClient(latency=1.0), timeout=0.05)
+        with pytest.raises(LLMTimeoutError):
+            client.chat(self.MESSAGES)
+        assert client.metrics()["timeouts"] == 1
+    
+    def test_quota_timeout_without_deadline(self):
+        """Test a timeout from the quota hook is re-raised when the client has no deadline."""
+        inner = Mock(provider="openai", model="gpt-4")
+        inner.chat.side_effect = [StatusError(503), "ok"]
+        acquire = Mock(side_effect=TimeoutError("no quota within 1.0s"))
+        client = ResilientLLMClient(inner, timeout=None, max_retries=1, backoff_factor=0,
+                                    acquire=acquire)
+        with pytest.raises(TimeoutError, match="no quota within 1.0s"):
+            client.chat(self.MESSAGES)
+        assert acquire.call_args[0][2] is None
+        assert inner.chat.call_count == 1
+        assert client.metrics()["timeouts"] == 1
+    
+    def test_hedged_request_wins(self):
+        """Test a hedge is sent after the delay and the faster response is used."""
+        import threading
+        release = threading.Event()
+        responses = iter(["slow", "fast"])
+        
+        def chat(messages, **kwargs):
+            response = next(responses)
+            if response == "slow":
+                release.wait(5)
+            return response
+        
+        inner = Mock(provider="fake", model="m")
+        inner.chat.side_effect = chat
+        client = ResilientLLMClient(inner, hedge=True, hedge_after=0.02)
+        try:
+            assert client.chat(self.MESSAGES) == "fast"
+        finally:
+            release.set()
+        metrics = client.metrics()
+        assert (metrics["hedges"], metrics["hedge_wins"]) == (1, 1)
+    
+    def test_hedge_delay_uses_percentile(self):
+        """Test percentile hedging waits for enough samples."""
+        client = ResilientLLMClient(FakeLLMClient(), hedge=True, hedge_min_samples=3)
+        assert client.hedge_delay() is None
+        for latency in (0.1, 0.2, 0.3):
+            client.latency.record(latency)
+        assert client.hedge_delay() == pytest.approx(0.29)
+        assert ResilientLLMClient(FakeLLMClient()).hedge_delay() is None
+    
+    def test_stream_retries_before_first_chunk(self):
+        """Test a stream failing before any output is retried."""
+        inner = FakeLLMClient(responses=["streamed text"], failure_rate=0.5, failure_mode="timeout")
+        inner._random.random = iter([0.0, 1.0]).__next__  # first call fails, second succeeds
+        client = ResilientLLMClient(inner, max_retries=1, backoff_factor=0)
+        assert "".join(client.stream_chat(self.MESSAGES)) == "streamed text"
+        assert client.metrics()["retries"] == 1
+    
+    def test_stream_deadline(self):
+        """Test a stalled stream times out."""
+        client = ResilientLLMClient(FakeLLMClient(responses=["abcdefgh"], tokens_per_second=2), timeout=0.2)
+        chunks = []
+        with pytest.raises(LLMTimeoutError):
+            for chunk in client.stream_chat(self.MESSAGES):
+                chunks.append(chunk)
+        assert chunks == []
+    
+    def test_context_reaches_worker_thread(self):
+        """Test llm_priority set by the caller is visible to the wrapped client."""
+        from grafana_agent import llm_client as module
+        seen = []
+        inner = Mock(provider="fake", model="m")
+        inner.chat.side_effect = lambda messages, **kwargs: seen.append(module._priority.get()) or "ok"
+        with llm_priority(PRIORITY_BATCH):
+            ResilientLLMClient(inner).chat(self.MESSAGES)
+        assert seen == [PRIORITY_BATCH]
+    
+    def test_wrap_llm_client(self):
+        """Test policies are layered with the rate limiter outermost."""
+        inner = FakeLLMClient()
+        assert wrap_llm_client(inner) is inner
+        wrapped = wrap_llm_client(inner, timeout=5, max_retries=1, requests_per_minute=60)
+        assert isinstance(wrapped, RateLimitedLLMClient)
+        assert isinstance(wrapped.llm_client, ResilientLLMClient)
+        assert wrapped.llm_client.retry_throttled is False
+        assert wrapped.llm_client.acquire == wrapped.reserve
+        assert (wrapped.provider, wrapped.model) == ("fake", "fake")
+    
+    def test_retries_and_hedges_take_quota(self):
+        """Test every request sent below the rate limiter is charged to the scheduler."""
+        import threading
+        release = threading.Event()
+        responses = iter([StatusError(503), "slow", "fast"])
+        
+        def chat(messages, **kwargs):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            if response == "slow":
+                release.wait(5)
+            return response
+        
+        inner = Mock(provider="fake", model="m")
+        inner.chat.side_effect = chat
+        scheduler = RateLimitScheduler(requests_per_minute=60)
+        wrapped = wrap_llm_client(inner, timeout=5, max_retries=1, hedge=True, scheduler=scheduler)
+        wrapped.llm_client.hedge_after = 0.02
+        wrapped.llm_client.backoff_factor = 0
+        try:
+            assert wrapped.chat(self.MESSAGES) == "fast"
+        finally:
+            release.set()
+        assert scheduler.stats()["fake/m"]["granted"] == inner.chat.call_count == 3
+    
+    def test_hedge_skipped_without_quota(self):
+        """Test no hedge is sent when the quota is used up."""
+        inner = FakeLLMClient(responses=["ok"], latency=0.1)
+        wrapped = wrap_llm_client(inner, timeout=5, hedge=True, requests_per_minute=1)
+        wrapped.llm_client.hedge_after = 0.02
+        
+        assert wrapped.chat(self.MESSAGES) == "ok"
+        assert len(inner.calls) == 1
+        assert wrapped.llm_client.metrics()["hedges_skipped"] == 1
+
+
+class TestRouterLLMClient:
+    """Tests for multi-backend routing and failover."""
+    
+    MESSAGES = [{"role": "user", "content": "hi"}]
+    
+    def test_fails_over_to_next_backend(self):
+        """Test a failing backend is skipped for the call and after repeated failures."""
+        primary = Mock()
+        primary.chat.side_effect = RuntimeError("down")
+        router = RouterLLMClient({"primary": primary, "backup": FakeLLMClient(responses=["ok"])},
+                                 failure_threshold=2, probe_rate=0)
+        assert router.chat(self.MESSAGES) == "ok"
+        assert router.candidates() == ["primary", "backup"]
+        assert router.chat(self.MESSAGES) == "ok"
+        # Two failures in a row put the primary in cooldown
+        assert router.candidates() == ["backup", "primary"]
+        assert router.chat(self.MESSAGES) == "ok"
+        assert primary.chat.call_count == 2
+        stats = router.stats()
+        assert (stats["calls"], stats["failovers"]) == (3, 2)
+        assert stats["backends"]["primary"]["healthy"] is False
+    
+    def test_raises_when_all_backends_fail(self):
+        """Test the last error is raised when no backend succeeds."""
+        failing = Mock()
+        failing.chat.side_effect = RuntimeError("down")
+        router = RouterLLMClient({"a": failing, "b": failing}, probe_rate=0)
+        with pytest.raises(RuntimeError):
+            router.chat(self.MESSAGES)
+    
+    def test_routes_by_latency(self):
+        """Test a much slower preferred backend loses to a faster one."""
+        router = RouterLLMClient({"a": FakeLLMClient(), "b": FakeLLMClient()}, min_samples=3, probe_rate=0)
+        for _ in range(3):
+            router.backends["a"].latency.record(1.0)
+            router.backends["b"].latency.record(0.8)
+        assert router.candidates() == ["a", "b"]  # within tolerance: configured order wins
+        for _ in range(3):
+            router.backends["a"].latency.record(3.0)
+        assert router.candidates() == ["b", "a"]
+        # Errors count against a backend too
+        for _ in range(6):
+            router.backends["b"].latency.record(0.8, error=True)
+        assert router.candidates()[0] == "a"
+    
+    def test_probing_is_opt_in(self):
+        """Test healthy fallbacks get no calls unless probing is enabled."""
+        primary, backup = FakeLLMClient(), FakeLLMClient()
+        router = RouterLLMClient({"primary": primary, "backup": backup})
+        for _ in range(200):
+            router.chat(self.MESSAGES)
+        assert (len(primary.calls), len(backup.calls)) == (200, 0)
+
+        probing = RouterLLMClient({"primary": FakeLLMClient(), "backup": backup}, probe_rate=0.5, seed=1)
+        for _ in range(20):
+            probing.chat(self.MESSAGES)
+        assert probing.stats()["probes"] > 0 and backup.calls
+
+    def test_routes_by_task(self):
+        """Test tagged calls use their task's route."""
+        cheap, strong = FakeLLMClient(responses=["cheap"]), FakeLLMClient(responses=["strong"])
+        router = RouterLLMClient({"cheap": cheap, "strong": strong},
+                                 routes={"chat": ["cheap", "strong"], "default": ["strong", "cheap"]},
+                                 probe_rate=0)
+        with llm_task(TASK_CHAT):
+            assert router.chat(self.MESSAGES) == "cheap"
+        assert router.chat(self.MESSAGES) == "strong"
+        with pytest.raises(ValueError):
+            RouterLLMClient({"a": cheap}, routes={"chat": ["missing"]})
+    
+    def test_generator_and_chat_tag_tasks(self):
+        """Test dashboard creation and chat reach the backends routed for them."""
+        from grafana_agent.chat_interface import ChatInterface
+        from grafana_agent.dashboard_generator import DashboardGenerator
+        cheap, strong = FakeLLMClient(responses=["hello"]), FakeLLMClient()
+        router = RouterLLMClient({"cheap": cheap, "strong": strong},
+                                 routes={TASK_CHAT: ["cheap"], TASK_CREATE_DASHBOARD: ["strong"]},
+                                 probe_rate=0)
+        DashboardGenerator(router).create_dashboard("CPU usage", on_panel=lambda panel: None)
+        ChatInterface(router).chat("hi")
+        assert (len(cheap.calls), len(strong.calls)) == (1, 1)
+    
+    def test_stream_fails_over_before_first_chunk(self):
+        """Test streams move to the next backend only if nothing was sent yet."""
+        failing = FakeLLMClient(failure_rate=1.0)
+        router = RouterLLMClient({"a": failing, "b": FakeLLMClient(responses=["abcdef"])}, probe_rate=0)
+        assert "".join(router.stream_chat(self.MESSAGES)) == "abcdef"
+        assert router.stats()["failovers"] == 1
+    
+    def test_build_llm_client(self):
+        """Test fallbacks and task routes produce a router over wrapped backends."""
+        assert isinstance(build_llm_client("fake"), FakeLLMClient)
+        client = build_llm_client("fake", model="big", fallbacks=["fake:small"], routes={"chat": "fake:tiny"},
+                                  timeout=30)
+        assert isinstance(client, RouterLLMClient)
+        assert list(client.backends) == ["fake:big", "fake:small", "fake:tiny"]
+        assert client.routes == {"chat": ["fake:tiny", "fake:big", "fake:small"],
+                                 "default": ["fake:big", "fake:small"]}
+        assert isinstance(client.backends["fake:small"].client, ResilientLLMClient)
+        assert client.backends["fake:small"].client.model == "small"
+        with pytest.raises(ValueError):
+            build_llm_client("fake", fallbacks=["nope:model"])
+
+
+class TestPromptCaching:
+    """Tests for prompt caching and token usage reporting."""
+    
+    def test_anthropic_caches_first_system_block(self, mock_anthropic_client):
+        """Test only the leading system prompt gets a cache breakpoint."""
+        client = AnthropicClient(api_key="test-key")
+        client.chat([
+            {"role": "system", "content": "Static prompt"},
+            {"role": "system", "content": "Conversation summary"},
+            {"role": "user", "content": "test"},
+        ])
+        
+        system = mock_anthropic_client.messages.create.call_args[1]["system"]
+        assert [block["text"] for block in system] == ["Static prompt", "Conversation summary"]
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in system[1]
+    
+    def test_anthropic_prompt_cache_disabled(self, mock_anthropic_client):
+        """Test system messages are joined into a string without prompt caching."""
+        client = AnthropicClient(api_key="test-key", prompt_cache=False)
+        client.chat([{"role": "system", "content": "a"}, {"role": "system", "content": "b"},
+                     {"role": "user", "content": "test"}])
+        
+        assert mock_anthropic_client.messages.create.call_args[1]["system"] == "a\n\nb"
+    
+    def test_anthropic_usage(self, mock_anthropic_client):
+        """Test cache reads and writes are counted as input tokens."""
+        response = mock_anthropic_client.messages.create.return_value
+        response.usage = Mock(input_tokens=10, output_tokens=5, cache_read_input_tokens=900,
+                              cache_creation_input_tokens=0)
+        client = AnthropicClient(api_key="test-key")
+        client.chat([{"role": "user", "content": "test"}])
+        client.chat([{"role": "user", "content": "test"}])
+        
+        assert client.last_usage == TokenUsage(input_tokens=910, output_tokens=5, cached_input_tokens=900,
+                                               calls=1)
+        assert client.usage.input_tokens == 1820
+        assert client.usage.uncached_input_tokens == 20
+        assert client.usage.calls == 2
+    
+    def test_openai_usage(self, mock_openai_client):
+        """Test cached prompt tokens are read from the usage details."""
+        response = mock_openai_client.chat.completions.create.return_value
+        response.usage = Mock(prompt_tokens=2000, completion_tokens=100,
+                              prompt_tokens_details=Mock(cached_tokens=1536))
+        client = OpenAIClient(api_key="test-key")
+        client.chat([{"role": "user", "content": "test"}])
+        
+        assert client.usage.to_dict()["uncached_input_tokens"] == 464
+        assert client.usage.cache_hit_rate == pytest.approx(0.768)
+    
+    def test_openai_stream_requests_usage(self, mock_openai_client):
+        """Test streaming asks for usage and records it from the final chunk."""
+        final = MagicMock(choices=[], usage=Mock(prompt_tokens=50, completion_tokens=2,
+                                                 prompt_tokens_details=None))
+        mock_openai_client.chat.completions.create.return_value = iter([final])
+        client = OpenAIClient(api_key="test-key")
+        
+        list(client.stream_chat([{"role": "user", "content": "test"}]))
+        
+        call_args = mock_openai_client.chat.completions.create.call_args
+        assert call_args[1]["stream_options"] == {"include_usage": True}
+        assert client.usage == TokenUsage(input_tokens=50, output_tokens=2, calls=1)
+    
+    def test_fake_client_caches_system_prompt(self):
+        """Test the fake client reports the repeated system prompt as cached."""
+        client = FakeLLMClient(responses=["ok"])
+        messages = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "hi"}]
+        client.chat(messages)
+        assert client.last_usage.cached_input_tokens == 0
+        assert client.last_usage.cache_write_tokens > 0
+        
+        client.chat(messages)
+        assert client.last_usage.cached_input_tokens == client.usage.cache_write_tokens
+    
+    def test_total_usage_through_wrappers(self):
+        """Test usage is summed across router backends behind policy wrappers."""
+        backends = {"a": FakeLLMClient(), "b": FakeLLMClient()}
+        client = RouterLLMClient({name: wrap_llm_client(backend, timeout=5) for name, backend in backends.items()},
+                                 {"default": ["a", "b"]})
+        client.chat([{"role": "user", "content": "hi"}])
+        backends["b"].chat([{"role": "user", "content": "hi"}])
+        
+        assert total_usage(client).calls == 2
+        assert total_usage(MagicMock()) == TokenUsage()
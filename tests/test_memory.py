@@ -0,0 +1,134 @@
+"""Tests for conversation memory."""
+
+import pytest
+from grafana_agent.memory import ConversationMemory
+from grafana_agent.tokens import estimate_message_tokens
+
+
+SYSTEM = "You are a helpful assistant."
+
+
+def add_turns(memory, count, size=50):
+    for i in range(count):
+        memory.add("user", f"question {i} " + "word " * size)
+        memory.add("assistant", f"answer {i} " + "word " * size)
+
+
+class TestConversationMemory:
+    """Tests for token-bounded conversation memory."""
+    
+    def test_build_messages_within_budget(self):
+        """Test that small histories are sent unchanged."""
+        memory = ConversationMemory(token_budget=1000)
+        memory.add("user", "hello")
+        
+        messages = memory.build_messages(SYSTEM)
+        
+        assert messages == [{"role": "system", "content": SYSTEM}, {"role": "user", "content": "hello"}]
+        assert memory.stats()["last_tokens_sent"] == estimate_message_tokens(messages)
+    
+    def test_evicts_oldest_turns_to_fit_budget(self):
+        """Test that old turns are dropped when over the token budget."""
+        memory = ConversationMemory(token_budget=300)
+        add_turns(memory, 10)
+        memory.add("user", "latest")
+        
+        messages = memory.build_messages(SYSTEM)
+        
+        assert estimate_message_tokens(messages) <= 300
+        assert messages[-1]["content"] == "latest"
+        assert messages[1]["role"] == "user"
+        assert memory.stats()["evicted_messages"] > 0
+    
+    def test_max_turns(self):
+        """Test that only max_turns user turns are kept."""
+        memory = ConversationMemory(max_turns=2)
+        add_turns(memory, 5, size=1)
+        memory.add("user", "latest")
+        
+        memory.build_messages(SYSTEM)
+        
+        assert [m["role"] for m in memory.messages] == ["user", "assistant", "user"]
+        assert memory.messages[-1]["content"] == "latest"
+    
+    def test_evicted_turns_are_summarized(self, mock_llm_client):
+        """Test that evicted turns are folded into a rolling summary."""
+        mock_llm_client.chat.return_value = "User wants a CPU dashboard."
+        memory = ConversationMemory(token_budget=300, llm_client=mock_llm_client)
+        add_turns(memory, 10)
+        memory.add("user", "latest")
+        
+        messages = memory.build_messages(SYSTEM)
+        
+        assert messages[0]["content"] == SYSTEM
+        assert messages[1] == {"role": "system",
+                               "content": "Summary of the earlier conversation:\nUser wants a CPU dashboard."}
+        summary_request = mock_llm_client.chat.call_args[0][0][1]["content"]
+        assert "question 0" in summary_request
+    
+    def test_tokens_sent_stay_bounded(self):
+        """Test tokens sent per turn stop growing once the budget is reached."""
+        memory = ConversationMemory(token_budget=400)
+        for i in range(30):
+            memory.add("user", "word " * 40)
+            memory.build_messages(SYSTEM)
+            memory.add("assistant", "word " * 40)
+        
+        assert max(memory.stats()["tokens_sent_per_turn"]) <= 400
+        assert memory.stats()["total_tokens_sent"] == sum(memory.tokens_sent)
+    
+    def test_tokens_sent_history_is_bounded(self):
+        """Test only recent request sizes are kept, while totals cover every turn."""
+        memory = ConversationMemory(tokens_sent_window=5)
+        for i in range(12):
+            memory.add("user", f"question {i}")
+            memory.build_messages(SYSTEM)
+        
+        stats = memory.stats()
+        assert stats["turns"] == 12
+        assert len(stats["tokens_sent_per_turn"]) == 5
+        assert stats["total_tokens_sent"] > sum(stats["tokens_sent_per_turn"])
+    
+    def test_failed_summary_keeps_evicted_turns(self, mock_llm_client):
+        """Test turns evicted for a summary that failed stay in the history."""
+        mock_llm_client.chat.side_effect = RuntimeError("LLM down")
+        memory = ConversationMemory(max_turns=1, llm_client=mock_llm_client)
+        for i in range(3):
+            memory.add("user", f"question {i}")
+            memory.add("assistant", f"answer {i}")
+        memory.add("user", "latest")
+        
+        with pytest.raises(RuntimeError):
+            memory.build_messages(SYSTEM)
+        
+        assert len(memory.messages) == 7
+        assert memory.stats()["evicted_messages"] == 0
+        mock_llm_client.chat.side_effect = None
+        mock_llm_client.chat.return_value = "Summary"
+        assert len(memory.build_messages(SYSTEM)) == 3
+    
+    @pytest.mark.asyncio
+    async def test_abuild_messages_summarizes(self, mock_llm_client):
+        """Test async message building summarizes evicted turns."""
+        mock_llm_client.chat.return_value = "Summary"
+        memory = ConversationMemory(token_budget=300, llm_client=mock_llm_client)
+        add_turns(memory, 10)
+        memory.add("user", "latest")
+        
+        messages = await memory.abuild_messages(SYSTEM)
+        
+        assert memory.summary == "Summary"
+        assert messages[-1]["content"] == "latest"
+    
+    def test_reset(self):
+        """Test reset clears history, summary and metrics."""
+        memory = ConversationMemory()
+        memory.add("user", "hi")
+        memory.summary = "old"
+        memory.build_messages(SYSTEM)
+        
+        memory.reset()
+        
+        assert memory.messages == []
+        assert memory.summary == ""
+        assert memory.stats()["turns"] == 0
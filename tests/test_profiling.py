@@ -0,0 +1,126 @@
+"""Tests for CLI profiling mode."""
+
+import json
+import pstats
+import pytest
+from unittest.mock import patch
+from grafana_agent.profiling import Profiler, write_report
+from grafana_agent.tracing import span, spans_observed
+from grafana_agent.dashboard_generator import DashboardGenerator
+from grafana_agent.llm_client import FakeLLMClient
+
+
+class TestProfiler:
+    """Tests for the Profiler class."""
+
+    def test_phase_self_times(self):
+        """Test phases record totals and self times excluding child spans."""
+        profiler = Profiler(memory=False)
+        profiler.start()
+        with span("dashboard.create"):
+            with span("llm.chat"):
+                pass
+            with span("llm.chat"):
+                pass
+        profiler.stop()
+
+        report = profiler.report(command="create", argv=[])
+        create, chat = report["phases"]["dashboard.create"], report["phases"]["llm.chat"]
+        assert (create["count"], chat["count"]) == (1, 2)
+        assert create["self"] <= create["total"] - chat["total"] + 1e-5  # values are rounded to 1 µs
+        assert set(report["categories"]) == {"dashboard", "llm", "other"}
+        assert report["command"] == "create"
+        assert not spans_observed()
+
+    def test_pipeline_phases(self):
+        """Test dashboard creation reports prompt, LLM, parse and validation phases."""
+        profiler = Profiler()
+        profiler.start()
+        DashboardGenerator(FakeLLMClient()).create_dashboard("CPU usage")
+        profiler.stop()
+
+        report = profiler.report()
+        for name in ("dashboard.create", "dashboard.build_prompt", "llm.chat", "dashboard.parse",
+                     "dashboard.validate"):
+            assert name in report["phases"]
+        assert report["peak_memory_bytes"] > 0
+        assert report["cpu_time"] is not None
+
+    def test_batch_time_goes_to_llm(self):
+        """Test parallel batch items charge their LLM wait to the llm category, within the wall time."""
+        from grafana_agent.batch import BatchItem, run_batch
+
+        profiler = Profiler(memory=False)
+        profiler.start()
+        with span("cli.create_batch"):
+            list(run_batch(DashboardGenerator(FakeLLMClient(latency=0.05)),
+                           [BatchItem(index=i, description=f"Item {i}") for i in range(6)], max_workers=3))
+        profiler.stop()
+
+        report = profiler.report()
+        categories = report["categories"]
+        assert max(categories, key=categories.get) == "llm"
+        assert categories["llm"] > report["wall_time"] / 2
+        assert sum(categories.values()) <= report["wall_time"] + 1e-3
+        assert report["span_time"] > report["wall_time"]
+
+    def test_map_reduce_time_goes_to_llm(self):
+        """Test map-phase LLM calls are not charged to prompt building."""
+        panels = [{"id": i, "type": "timeseries", "title": f"Panel {i} " + "x" * 200} for i in range(30)]
+        profiler = Profiler(memory=False)
+        profiler.start()
+        DashboardGenerator(FakeLLMClient(latency=0.02), summary_token_budget=300).summarize_dashboard(
+            {"title": "Big", "panels": panels})
+        profiler.stop()
+
+        report = profiler.report()
+        categories = report["categories"]
+        assert max(categories, key=categories.get) == "llm"
+        assert report["phases"]["dashboard.build_prompt"]["total"] < report["phases"]["llm.chat"]["self"]
+
+    def test_cprofile_output(self, tmp_path):
+        """Test cProfile stats are written to the CPU profile file."""
+        path = str(tmp_path / "cpu.prof")
+        profiler = Profiler(cpu="cprofile", cpu_output=path, memory=False)
+        profiler.start()
+        sum(range(1000))
+        profiler.stop()
+
+        assert pstats.Stats(path).total_calls > 0
+        assert profiler.report()["cpu_profile"] == path
+
+    def test_invalid_cpu_profiler(self):
+        """Test error for unsupported CPU profilers."""
+        with pytest.raises(ValueError, match="Unsupported CPU profiler"):
+            Profiler(cpu="perf", cpu_output="out")
+        with pytest.raises(ValueError, match="cpu_output is required"):
+            Profiler(cpu="cprofile")
+
+    def test_pyinstrument_missing_package(self):
+        """Test error when pyinstrument is missing."""
+        profiler = Profiler(cpu="pyinstrument", cpu_output="profile.html", memory=False)
+        with patch.dict('sys.modules', {'pyinstrument': None}):
+            with pytest.raises(ImportError, match="pyinstrument package is required"):
+                profiler.start()
+
+
+class TestWriteReport:
+    """Tests for writing profile reports."""
+
+    def test_json_overwrites(self, tmp_path):
+        """Test .json reports are overwritten."""
+        path = str(tmp_path / "profile.json")
+        write_report({"wall_time": 1.0}, path)
+        write_report({"wall_time": 2.0}, path)
+
+        with open(path) as f:
+            assert json.load(f) == {"wall_time": 2.0}
+
+    def test_jsonl_appends(self, tmp_path):
+        """Test .jsonl reports are appended, one run per line."""
+        path = str(tmp_path / "runs" / "profile.jsonl")
+        write_report({"wall_time": 1.0}, path)
+        write_report({"wall_time": 2.0}, path)
+
+        with open(path) as f:
+            assert [json.loads(line)["wall_time"] for line in f] == [1.0, 2.0]
@@ -0,0 +1,217 @@
+"""Tests for the HTTP API server."""
+
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+from grafana_agent.cli import cli
+from grafana_agent.llm_client import FakeLLMClient
+from grafana_agent.server import AgentServer, QueueFullError, SessionStore
+
+aiohttp_test_utils = pytest.importorskip("aiohttp.test_utils")
+
+
+@asynccontextmanager
+async def serve(server):
+    """Test client for an AgentServer."""
+    client = aiohttp_test_utils.TestClient(aiohttp_test_utils.TestServer(server.app()))
+    await client.start_server()
+    try:
+        yield client
+    finally:
+        await client.close()
+
+
+def parse_sse(text):
+    """Split a server-sent events body into (event, data) pairs."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class BlockingLLMClient(FakeLLMClient):
+    """Fake client whose calls wait until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def _respond(self, messages):
+        self.started.release()
+        self.release.wait(5)
+        return super()._respond(messages)
+
+
+class TestSessionStore:
+    """Tests for session bookkeeping."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched session is dropped when the store is full."""
+        store = SessionStore(lambda: object(), max_sessions=2, ttl=None)
+        first, second = store.create(), store.create()
+        store.get(first.id)
+        store.create()
+        assert store.get(first.id) is first
+        assert store.get(second.id) is None
+
+    def test_expires_idle_sessions(self):
+        """Test sessions idle past the TTL disappear."""
+        store = SessionStore(lambda: object(), ttl=60)
+        session = store.create()
+        session.last_used -= 61
+        assert store.get(session.id) is None
+        assert len(store) == 0
+
+
+class TestAgentServer:
+    """Tests for the HTTP endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_create_dashboard_json(self):
+        """Test dashboard creation returns the dashboard JSON."""
+        async with serve(AgentServer(FakeLLMClient())) as client:
+            response = await client.post("/v1/dashboards", json={"description": "CPU", "title": "Hosts"})
+            assert response.status == 200
+            dashboard = await response.json()
+        assert dashboard["dashboard"]["title"] == "Hosts"
+        assert dashboard["dashboard"]["panels"]
+
+    @pytest.mark.asyncio
+    async def test_create_dashboard_streams_panels(self):
+        """Test streamed creation sends panel events followed by the dashboard."""
+        async with serve(AgentServer(FakeLLMClient(tokens_per_second=10000))) as client:
+            response = await client.post("/v1/dashboards?stream=1", json={"description": "CPU"})
+            assert response.headers["Content-Type"] == "text/event-stream"
+            events = parse_sse(await response.text())
+        names = [name for name, _ in events]
+        assert names[-1] == "done"
+        assert names.count("panel") == len(events[-1][1]["dashboard"]["panels"])
+
+    @pytest.mark.asyncio
+    async def test_summarize_streams_chunks(self):
+        """Test summary chunks are streamed and joined in the final event."""
+        async with serve(AgentServer(FakeLLMClient())) as client:
+            response = await client.post("/v1/summaries", json={"dashboard": {"title": "CPU", "panels": []}},
+                                         headers={"Accept": "text/event-stream"})
+            events = parse_sse(await response.text())
+        chunks = [data for name, data in events if name == "chunk"]
+        assert events[-1] == ("done", "".join(chunks))
+
+    @pytest.mark.asyncio
+    async def test_bad_request(self):
+        """Test missing fields and invalid JSON are rejected with 400."""
+        async with serve(AgentServer(FakeLLMClient())) as client:
+            missing = await client.post("/v1/dashboards", json={})
+            invalid = await client.post("/v1/summaries", data="not json")
+        assert missing.status == 400
+        assert invalid.status == 400
+
+    @pytest.mark.asyncio
+    async def test_sessions_keep_separate_history(self):
+        """Test each session has its own conversation history."""
+        async with serve(AgentServer(FakeLLMClient(responses=["hi"]))) as client:
+            first = (await (await client.post("/v1/sessions")).json())["session_id"]
+            second = (await (await client.post("/v1/sessions")).json())["session_id"]
+            reply = await client.post(f"/v1/sessions/{first}/messages", json={"message": "hello"})
+            assert (await reply.json()) == {"reply": "hi"}
+
+            first_record = await (await client.get(f"/v1/sessions/{first}")).json()
+            second_record = await (await client.get(f"/v1/sessions/{second}")).json()
+            assert [m["role"] for m in first_record["messages"]] == ["user", "assistant"]
+            assert second_record["messages"] == []
+
+            assert (await client.delete(f"/v1/sessions/{first}")).status == 200
+            assert (await client.get(f"/v1/sessions/{first}")).status == 404
+            missing = await client.post(f"/v1/sessions/{first}/messages", json={"message": "again"})
+            assert missing.status == 404
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """Test requests beyond the concurrency limit and queue get 503."""
+        llm_client = BlockingLLMClient()
+        server = AgentServer(llm_client, max_concurrency=1, max_queue=1)
+        async with serve(server) as client:
+            body = {"dashboard": {"title": "CPU"}}
+            running = asyncio.ensure_future(client.post("/v1/summaries", json=body))
+            await asyncio.get_running_loop().run_in_executor(None, llm_client.started.acquire, True, 5)
+            queued = asyncio.ensure_future(client.post("/v1/summaries", json=body))
+            while server.queued < 1:
+                await asyncio.sleep(0.01)
+
+            rejected = await client.post("/v1/summaries", json=body)
+            assert rejected.status == 503
+            assert rejected.headers["Retry-After"] == "1"
+            health = await (await client.get("/healthz")).json()
+            assert health["in_flight"] == 1 and health["queued"] == 1 and health["rejected"] == 1
+
+            llm_client.release.set()
+            assert (await running).status == 200
+            assert (await queued).status == 200
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_keeps_slot_until_work_finishes(self):
+        """Test a cancelled request's slot stays taken while its work still runs."""
+        llm_client = BlockingLLMClient()
+        server = AgentServer(llm_client, max_concurrency=1, max_queue=0)
+        loop = asyncio.get_running_loop()
+
+        messages = [{"role": "user", "content": "hi"}]
+
+        async def request():
+            events = server._stream(lambda emit: llm_client.chat(messages))
+            return await server._respond(None, events, "reply")
+
+        with patch.object(AgentServer, "_wants_stream", return_value=False):
+            task = asyncio.ensure_future(request())
+            await loop.run_in_executor(None, llm_client.started.acquire, True, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert server.in_flight == 1 and server.queued == 0
+            with pytest.raises(QueueFullError):
+                await request()
+            assert server.rejected == 1
+
+            llm_client.release.set()
+            for _ in range(500):
+                if server.in_flight == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert server.in_flight == 0 and server.queued == 0
+            assert (await request()).status == 200
+
+
+class TestServeCommand:
+    """Tests for the serve CLI command."""
+
+    def test_serve_builds_server(self):
+        """Test serve passes its limits to the server."""
+        with patch("grafana_agent.server.run_server") as run_server:
+            result = CliRunner().invoke(cli, ["serve", "--provider", "fake", "--port", "9999",
+                                              "--max-concurrency", "3", "--max-queue", "5"])
+        assert result.exit_code == 0, result.output
+        server = run_server.call_args[0][0]
+        assert (server.max_concurrency, server.max_queue) == (3, 5)
+        assert run_server.call_args[1] == {"host": "127.0.0.1", "port": 9999}
+
+    def test_serve_routes(self):
+        """Test --route and --fallback build a router with per-task routes."""
+        from grafana_agent.llm_client import RouterLLMClient
+        with patch("grafana_agent.server.run_server") as run_server:
+            result = CliRunner().invoke(cli, ["serve", "--provider", "fake", "--fallback", "fake:backup",
+                                              "--route", "chat=fake:small"])
+        assert result.exit_code == 0, result.output
+        llm_client = run_server.call_args[0][0].llm_client
+        assert isinstance(llm_client, RouterLLMClient)
+        assert llm_client.routes["chat"] == ["fake:small", "fake", "fake:backup"]
+
+        result = CliRunner().invoke(cli, ["serve", "--provider", "fake", "--route", "chat"])
+        assert result.exit_code == 1
+        assert "expected TASK=PROVIDER[:MODEL]" in result.output
@@ -0,0 +1,64 @@
+"""Tests for request statistics."""
+
+from grafana_agent.stats import percentile, LatencyTracker, RequestStats
+
+
+class TestPercentile:
+    """Tests for percentile calculation."""
+    
+    def test_percentile(self):
+        """Test interpolated percentiles."""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert percentile(values, 50) == 3.0
+        assert percentile(values, 0) == 1.0
+        assert percentile(values, 100) == 5.0
+        assert percentile(values, 25) == 2.0
+        assert percentile([1.0, 2.0], 50) == 1.5
+    
+    def test_empty(self):
+        """Test empty samples return zero."""
+        assert percentile([], 99) == 0.0
+
+
+class TestLatencyTracker:
+    """Tests for latency trackers."""
+    
+    def test_summary(self):
+        """Test counters and percentiles in the summary."""
+        tracker = LatencyTracker()
+        for latency in (0.1, 0.2, 0.3):
+            tracker.record(latency)
+        tracker.record(1.0, error=True, retries=2)
+        
+        summary = tracker.summary()
+        assert summary["count"] == 4
+        assert summary["errors"] == 1
+        assert summary["retries"] == 2
+        assert summary["max"] == 1.0
+        assert tracker.error_rate() == 0.25
+    
+    def test_window(self):
+        """Test that only the most recent latencies are kept."""
+        tracker = LatencyTracker(window=2)
+        for latency in (5.0, 1.0, 2.0):
+            tracker.record(latency)
+        
+        assert tracker.latencies() == [1.0, 2.0]
+        assert tracker.count == 3
+
+
+class TestRequestStats:
+    """Tests for per-operation statistics."""
+    
+    def test_keyed_summary(self):
+        """Test statistics are kept per operation."""
+        stats = RequestStats()
+        stats.record("GET /a", 0.1)
+        stats.record("POST /b", 0.2, error=True)
+        
+        summary = stats.summary()
+        assert set(summary) == {"GET /a", "POST /b"}
+        assert summary["POST /b"]["errors"] == 1
+        
+        stats.reset()
+        assert stats.summary() == {}
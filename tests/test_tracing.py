@@ -0,0 +1,123 @@
+"""Tests for pipeline tracing."""
+
+import json
+import pytest
+from unittest.mock import patch
+from grafana_agent import tracing
+from grafana_agent.tracing import span, traced, configure_tracing
+from grafana_agent.dashboard_generator import DashboardGenerator
+from grafana_agent.llm_client import FakeLLMClient
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Finished spans, recorded by an in-memory exporter."""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_tracer", provider.get_tracer("test"))
+    yield exporter.get_finished_spans
+
+
+class TestSpans:
+    """Tests for span helpers."""
+
+    def test_noop_without_opentelemetry(self, monkeypatch):
+        """Test spans are no-ops when OpenTelemetry is not installed."""
+        monkeypatch.setattr(tracing, "_tracer", None)
+        with patch.dict('sys.modules', {'opentelemetry': None}):
+            with span("work", {"key": "value"}) as current:
+                current.set_attribute("other", 1)
+        assert not current.is_recording()
+
+    def test_traced_decorator(self, spans):
+        """Test decorated functions are traced and keep their return value."""
+        @traced("unit.work")
+        def work(value):
+            return value * 2
+
+        assert work(21) == 42
+        assert [s.name for s in spans()] == ["unit.work"]
+
+    def test_configure_tracing_missing_package(self):
+        """Test error when the OpenTelemetry SDK is missing."""
+        with patch.dict('sys.modules', {'opentelemetry': None, 'opentelemetry.sdk': None}):
+            with pytest.raises(ImportError, match="opentelemetry-sdk package is required"):
+                configure_tracing("spans.jsonl")
+
+
+class TestPipelineSpans:
+    """Tests for spans emitted by the dashboard pipeline."""
+
+    def test_create_dashboard_phases(self, spans):
+        """Test dashboard creation is traced phase by phase under one span."""
+        DashboardGenerator(FakeLLMClient()).create_dashboard("CPU usage")
+
+        finished = {s.name: s for s in spans()}
+        root = finished["dashboard.create"]
+        for name in ("dashboard.build_prompt", "llm.chat", "dashboard.parse", "dashboard.repair",
+                     "dashboard.validate"):
+            assert finished[name].parent.span_id == root.context.span_id
+        assert finished["llm.chat"].attributes["llm.provider"] == "fake"
+        assert finished["dashboard.repair"].attributes["dashboard.salvaged"] is False
+
+    def test_chunk_summaries_nest_under_summary(self, spans):
+        """Test map-reduce chunk calls on worker threads nest under the map-reduce span."""
+        panels = [{"id": i, "type": "timeseries", "title": f"Panel {i} " + "x" * 200} for i in range(30)]
+        DashboardGenerator(FakeLLMClient(), summary_token_budget=300).summarize_dashboard(
+            {"title": "Big", "panels": panels})
+
+        finished = spans()
+        map_reduce = next(s for s in finished if s.name == "dashboard.map_reduce")
+        chunk_calls = [s for s in finished
+                       if s.name == "llm.chat" and s.parent.span_id == map_reduce.context.span_id]
+        assert len(chunk_calls) > 1
+        build = next(s for s in finished if s.name == "dashboard.build_prompt")
+        assert not [s for s in finished if s.parent is not None and s.parent.span_id == build.context.span_id]
+
+    def test_batch_items_nest_under_caller(self, spans):
+        """Test batch items generated on worker threads keep the caller's span as parent."""
+        from grafana_agent.batch import BatchItem, run_batch
+
+        with span("cli.create_batch"):
+            list(run_batch(DashboardGenerator(FakeLLMClient()),
+                           [BatchItem(index=i, description=f"Item {i}") for i in range(3)], max_workers=3))
+
+        finished = spans()
+        root = next(s for s in finished if s.name == "cli.create_batch")
+        creates = [s for s in finished if s.name == "dashboard.create"]
+        assert len(creates) == 3
+        assert all(s.parent.span_id == root.context.span_id for s in creates)
+
+    def test_grafana_request_span(self, spans):
+        """Test Grafana API requests are traced with their status code."""
+        from grafana_agent.fake_grafana import FakeGrafana
+        from grafana_agent.grafana_client import GrafanaClient
+
+        with FakeGrafana(seed=1) as server:
+            client = GrafanaClient(server.url, api_key="test-key")
+            client.create_dashboard({"title": "CPU", "panels": []})
+            client.close()
+
+        (request,) = [s for s in spans() if s.name.startswith("grafana ")]
+        assert request.name == "grafana POST /api/dashboards/db"
+        assert request.attributes["http.response.status_code"] == 200
+
+    def test_file_exporter(self, tmp_path, spans):
+        """Test the file exporter writes one JSON object per span."""
+        from grafana_agent.tracing import FileSpanExporter
+
+        with span("outer"):
+            with span("inner"):
+                pass
+        exporter = FileSpanExporter(str(tmp_path / "spans.jsonl"))
+        exporter.export(spans())
+        exporter.shutdown()
+
+        lines = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["inner", "outer"]